@@ -0,0 +1,442 @@
+"""Benchmark Harness for SSSP and APSP Implementations
+
+Every SSSP variant in spalgm.py (including each deque backend of
+CalculateSSSPDEQII()) is run from the same random source nodes on the bundled
+networks in data/ and/or synthetic grid networks. For each of them, it records
+
+    1. running time, where a reused SSSPWorkspace is shared by all sources,
+    2. number of node scans, measured by a separate untimed run,
+    3. peak memory allocated by Python (tracemalloc) in the untimed run,
+    4. maximum distance difference from CalculateSSSPDijkstraII().
+
+Floyd-Warshall (CalculateAPSPFWII()) is included if NumPy is available and
+the APSP mode (all nodes as sources) is requested. The results are printed as
+a table and can be written to a JSON file, e.g.,
+
+    python benchmark.py -n chicago asu grid:100x100 -s 50 -o results.json
+
+Networks can be renumbered by utils.ReorderNodes() first (-r), e.g., to
+measure the effect of node orders on SSSP throughput.
+
+The many-to-many engines in m2malgm.py can be compared on random n x n OD
+matrices as well (-m), e.g., the numbers of their commit on ASU come from
+
+    python benchmark.py -n asu -v DijkstraII -m 10 100 500 1000
+
+The exit status is 1 if any variant disagrees with the reference.
+"""
+
+
+from array import array
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import tracemalloc
+from random import Random
+from time import time
+
+try:
+    import numpy as np
+except ImportError:
+    # FWII is skipped without NumPy
+    np = None
+
+from chalgm import BuildContractionHierarchy
+from classes import CSRGraph, ScanCounter, SSSPWorkspace
+from m2malgm import BenchmarkManyToMany
+from spalgm import MAX_DIAL_SPAN, CalculateAPSPFWII, \
+                   CalculateSSSPDEQI, CalculateSSSPDEQC, CalculateSSSPDEQII, \
+                   CalculateSSSPDEQIII, CalculateSSSPDial, \
+                   CalculateSSSPDijkstraC, CalculateSSSPDijkstraI, \
+                   CalculateSSSPDijkstraII, CalculateSSSPDijkstraIII, \
+                   CalculateSSSPFIFOI, CalculateSSSPFIFOII, \
+                   CalculateSSSPLLL, CalculateSSSPRadix, CalculateSSSPSLF, \
+                   CalculateSSSPThreshold
+from utils import MAX_LABEL, NODE_ORDERS, GetCSRGraph, GetNumLinks, \
+                  GetScaledLens, ReadNetwork, ReorderNodes
+
+
+# the reference variant all the others are checked against
+REF_VARIANT = 'DijkstraII'
+# all SSSP variants with the same signature (srcNodeID, numNode, dist, pred,
+# csr, ws)
+SSSP_VARIANTS = {
+    'FIFOI': lambda s, n, d, p, csr, ws:
+        CalculateSSSPFIFOI(s, d, p, csr, ws),
+    'FIFOII': lambda s, n, d, p, csr, ws:
+        CalculateSSSPFIFOII(s, n, d, p, csr, ws),
+    'DEQI': lambda s, n, d, p, csr, ws:
+        CalculateSSSPDEQI(s, n, d, p, csr, ws),
+    'DEQII-py': lambda s, n, d, p, csr, ws:
+        CalculateSSSPDEQII(s, n, d, p, csr, ws, 'py'),
+    'DEQII-c': lambda s, n, d, p, csr, ws:
+        CalculateSSSPDEQII(s, n, d, p, csr, ws, 'c'),
+    'DEQII-builtin': lambda s, n, d, p, csr, ws:
+        CalculateSSSPDEQII(s, n, d, p, csr, ws, 'builtin'),
+    'DEQIII': lambda s, n, d, p, csr, ws:
+        CalculateSSSPDEQIII(s, n, d, p, csr, ws),
+    'DEQIII-c': lambda s, n, d, p, csr, ws:
+        _RunNative(CalculateSSSPDEQC, s, n, d, p, csr),
+    'SLF': lambda s, n, d, p, csr, ws:
+        CalculateSSSPSLF(s, n, d, p, csr, ws),
+    'LLL': lambda s, n, d, p, csr, ws:
+        CalculateSSSPLLL(s, n, d, p, csr, ws),
+    'Threshold': lambda s, n, d, p, csr, ws:
+        CalculateSSSPThreshold(s, n, d, p, 0.5, csr, ws),
+    'DijkstraI': lambda s, n, d, p, csr, ws:
+        CalculateSSSPDijkstraI(s, n, d, p, csr, ws),
+    'DijkstraII': lambda s, n, d, p, csr, ws:
+        CalculateSSSPDijkstraII(s, d, p, csr, ws),
+    'DijkstraII-c': lambda s, n, d, p, csr, ws:
+        _RunNative(CalculateSSSPDijkstraC, s, n, d, p, csr),
+    'DijkstraIII': lambda s, n, d, p, csr, ws:
+        CalculateSSSPDijkstraIII(s, n, d, p, 4, csr, ws),
+    'Dial': lambda s, n, d, p, csr, ws:
+        CalculateSSSPDial(s, n, d, p, None, csr, ws),
+    'Radix': lambda s, n, d, p, csr, ws:
+        CalculateSSSPRadix(s, n, d, p, None, csr, ws),
+}
+# native variants in SimpleDequeC, which cannot count scans
+NATIVE_VARIANTS = ('DEQIII-c', 'DijkstraII-c')
+# all variants including those for APSP only
+ALL_VARIANTS = tuple(SSSP_VARIANTS) + ('FWII',)
+
+
+def _RunNative(kernel, srcNodeID, numNode, dist, pred, csr):
+    """ run a native kernel on arrays and copy its results to lists dist and
+    pred, where the copy is timed as well
+    """
+    dist_ = array('d', bytes(8 * numNode))
+    pred_ = array('i', bytes(4 * numNode))
+    kernel(srcNodeID, dist_, pred_, csr)
+    dist[:] = dist_
+    pred[:] = pred_
+
+
+def GenerateGridNetwork(dirName, numRow, numCol, seed=0):
+    """ write a numRow x numCol grid network with two-way links of random
+    lengths (0.01 to 10 with two decimal places) to node.csv and link.csv
+    under dirName, and return the paths to the two files
+    """
+    rng = Random(seed)
+    nodeFile = os.path.join(dirName, 'node.csv')
+    linkFile = os.path.join(dirName, 'link.csv')
+
+    with open(nodeFile, 'w') as f:
+        f.write('node_id,x_coord,y_coord\n')
+        for r in range(numRow):
+            for c in range(numCol):
+                f.write('{0},{1},{2}\n'.format(r * numCol + c, c, r))
+
+    with open(linkFile, 'w') as f:
+        f.write('link_id,from_node_id,to_node_id,length\n')
+        linkID = 0
+        for r in range(numRow):
+            for c in range(numCol):
+                i = r * numCol + c
+                adj = []
+                if c + 1 < numCol:
+                    adj.append(i + 1)
+                if r + 1 < numRow:
+                    adj.append(i + numCol)
+                for j in adj:
+                    for tail, head in ((i, j), (j, i)):
+                        f.write('{0},{1},{2},{3}\n'.format(
+                            linkID, tail, head, rng.randint(1, 1000) / 100))
+                        linkID += 1
+
+    return nodeFile, linkFile
+
+
+def _LoadNetwork(name, dataDir, tmpDir, seed):
+    """ load network name, which is either one in dataDir (e.g., chicago for
+    node_chicago.csv and link_chicago.csv, and sample for node.csv and
+    link.csv) or grid:RxC for a synthetic R x C grid network
+    """
+    if name.startswith('grid:'):
+        try:
+            numRow, numCol = (int(x) for x in name[5:].lower().split('x'))
+        except ValueError:
+            raise Exception('Please choose correct grid size, e.g., '
+                            +'grid:100x100.')
+        nodeFile, linkFile = GenerateGridNetwork(tmpDir, numRow, numCol,
+                                                 seed)
+    else:
+        suffix = '' if name == 'sample' else '_'+name
+        nodeFile = os.path.join(dataDir, 'node'+suffix+'.csv')
+        linkFile = os.path.join(dataDir, 'link'+suffix+'.csv')
+
+    ReadNetwork(nodeFile, linkFile)
+
+
+def _GetMaxError(dist, ref):
+    """ return the maximum relative difference between two lists of distance
+    labels, which is None if reachability differs
+    """
+    maxError = 0
+    for x, y in zip(dist, ref):
+        if x == y:
+            continue
+        if x == MAX_LABEL or y == MAX_LABEL:
+            return None
+        maxError = max(maxError, abs(x - y) / max(abs(y), 1))
+
+    return maxError
+
+
+def _RunSSSPVariant(variant, srcNodeIDs, csr, refs):
+    """ run one SSSP variant from each of srcNodeIDs and return its record """
+    sssp = SSSP_VARIANTS[variant]
+    numNode = csr.numNode
+
+    # timed run
+    ws = SSSPWorkspace(numNode)
+    maxError = 0
+    t = 0
+    for s, ref in zip(srcNodeIDs, refs):
+        st = time()
+        sssp(s, numNode, ws.dist, ws.pred, csr, ws)
+        t += time() - st
+        e = _GetMaxError(ws.dist, ref)
+        maxError = None if e is None or maxError is None else max(maxError, e)
+
+    # untimed run to count scans and measure peak memory
+    if variant in NATIVE_VARIANTS:
+        counter = None
+        csr_ = csr
+    else:
+        counter = ScanCounter(csr.offsets)
+        csr_ = CSRGraph.FromArrays(counter, csr.heads, csr.lens, csr.linkIDs,
+                                   check=False)
+        # share integer link lengths rather than allocating them again
+        csr_.scaledLens = csr.scaledLens
+    tracemalloc.start()
+    ws = SSSPWorkspace(numNode)
+    for s in srcNodeIDs:
+        sssp(s, numNode, ws.dist, ws.pred, csr_, ws)
+    peakMemory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'time': t,
+            'scans': None if counter is None else counter.count // 2,
+            'peakMemory': peakMemory,
+            'maxError': maxError}
+
+
+def _RunFW(csr, refs):
+    """ run CalculateAPSPFWII() once and return its record, where refs are the
+    distance labels from every node
+    """
+    st = time()
+    dist, _ = CalculateAPSPFWII(csr=csr)
+    t = time() - st
+    errors = [_GetMaxError(dist[s].tolist(), ref)
+              for s, ref in enumerate(refs)]
+    maxError = None if None in errors else max(errors, default=0)
+
+    # NumPy allocations are traced as well
+    del dist
+    tracemalloc.start()
+    CalculateAPSPFWII(csr=csr)
+    peakMemory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'time': t,
+            'scans': None,
+            'peakMemory': peakMemory,
+            'maxError': maxError}
+
+
+def _GetSkipReason(variant, csr, apsp):
+    """ return why variant cannot be run on csr, or None if it can """
+    if variant == 'FWII':
+        if not apsp:
+            return 'APSP only'
+        if np is None:
+            return 'NumPy not installed'
+        return None
+
+    if variant in ('Dial', 'Radix'):
+        try:
+            intLens, _ = GetScaledLens(None, csr)
+        except Exception as e:
+            return str(e)
+        # CalculateSSSPDial() would fall back to radix heap
+        maxLen = max(intLens, default=0)
+        if variant == 'Dial' and maxLen * csr.numNode > MAX_DIAL_SPAN:
+            return 'too many buckets: '+str(maxLen)
+
+    return None
+
+
+def BenchmarkNetwork(name, variants=ALL_VARIANTS, numSource=20, seed=0,
+                     dataDir='data', tol=1e-9, order='input'):
+    """ benchmark variants on network name (see _LoadNetwork()) from numSource
+    random source nodes (or all nodes if numSource is None, i.e., APSP)
+
+    Nodes are renumbered by ReorderNodes() unless order is input. The source
+    nodes are the same ones for every order.
+
+    It returns the list of records, one for each variant, as dicts of network,
+    order, numNode, numLink, variant, numSource, time (s), scans, peakMemory
+    (bytes), maxError, agree, and skipped (the reason or None).
+    """
+    for v in variants:
+        if v not in ALL_VARIANTS:
+            raise Exception('Please choose correct variant: '
+                            +'; '.join(ALL_VARIANTS)+'.')
+
+    with tempfile.TemporaryDirectory() as tmpDir:
+        _LoadNetwork(name, dataDir, tmpDir, seed)
+
+    numNode = GetCSRGraph().numNode
+    apsp = numSource is None or numSource >= numNode
+    if apsp:
+        srcNodeIDs = list(range(numNode))
+    else:
+        rng = Random(seed)
+        srcNodeIDs = [rng.randrange(numNode) for _ in range(numSource)]
+    if order != 'input':
+        newIDs = ReorderNodes(order, seed)
+        srcNodeIDs = [newIDs[s] for s in srcNodeIDs]
+
+    csr = GetCSRGraph()
+
+    # reference distance labels
+    sssp = SSSP_VARIANTS[REF_VARIANT]
+    ws = SSSPWorkspace(numNode)
+    refs = []
+    for s in srcNodeIDs:
+        sssp(s, numNode, ws.dist, ws.pred, csr, ws)
+        refs.append(list(ws.dist))
+
+    records = []
+    for v in variants:
+        record = {'network': name,
+                  'order': order,
+                  'numNode': numNode,
+                  'numLink': GetNumLinks(),
+                  'variant': v,
+                  'numSource': len(srcNodeIDs),
+                  'skipped': _GetSkipReason(v, csr, apsp)}
+        if record['skipped'] is None:
+            if v == 'FWII':
+                record.update(_RunFW(csr, refs))
+            else:
+                record.update(_RunSSSPVariant(v, srcNodeIDs, csr, refs))
+            record['agree'] = (record['maxError'] is not None
+                               and record['maxError'] <= tol)
+        else:
+            record.update(time=None, scans=None, peakMemory=None,
+                          maxError=None, agree=None)
+        records.append(record)
+
+    return records
+
+
+def BenchmarkManyToManyNetwork(name, sizes, seed=0, dataDir='data'):
+    """ run BenchmarkManyToMany() on network name (see _LoadNetwork()) with
+    its Contraction Hierarchy
+
+    It returns the list of records, one for each n in sizes, as dicts of
+    network, numNode, numLink, n, chTime (s), and the running times (s) of
+    plain, bucket, and bucket-ch, or raises an exception if any of them
+    disagree.
+    """
+    with tempfile.TemporaryDirectory() as tmpDir:
+        _LoadNetwork(name, dataDir, tmpDir, seed)
+
+    st = time()
+    ch = BuildContractionHierarchy()
+    chTime = time() - st
+
+    times = BenchmarkManyToMany(sizes, ch, seed=seed)
+    return [dict(network=name, numNode=GetCSRGraph().numNode,
+                 numLink=GetNumLinks(), n=n, chTime=chTime, **t)
+            for n, t in times.items()]
+
+
+def PrintRecords(records):
+    """ print records of BenchmarkNetwork() as a table """
+    print('{0:<16}{1:<9}{2:<15}{3:>10}{4:>12}{5:>12}{6:>8}'
+          .format('network', 'order', 'variant', 'time (s)', 'scans',
+                  'peak (KB)', 'agree'))
+    for r in records:
+        if r['skipped'] is not None:
+            print('{0:<16}{1:<9}{2:<15}  skipped: {3}'
+                  .format(r['network'], r['order'], r['variant'],
+                          r['skipped']))
+            continue
+        print('{0:<16}{1:<9}{2:<15}{3:>10.3f}{4:>12}{5:>12.0f}{6:>8}'
+              .format(r['network'], r['order'], r['variant'], r['time'],
+                      '-' if r['scans'] is None else r['scans'],
+                      r['peakMemory'] / 1024, str(r['agree'])))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='benchmark SSSP and APSP implementations')
+    parser.add_argument('-n', '--networks', nargs='+',
+                        default=['sample', 'chicago', 'asu', 'grid:100x100'],
+                        help='networks in data directory or grid:RxC')
+    parser.add_argument('-v', '--variants', nargs='+', default=ALL_VARIANTS,
+                        choices=ALL_VARIANTS, metavar='VARIANT',
+                        help='one or more of '+', '.join(ALL_VARIANTS))
+    parser.add_argument('-s', '--sources', default='20',
+                        help='number of random source nodes or all for APSP')
+    parser.add_argument('-d', '--data-dir',
+                        default=os.path.join(os.path.dirname(
+                            os.path.abspath(__file__)), os.pardir, 'data'),
+                        help='directory of the bundled networks')
+    parser.add_argument('-r', '--orders', nargs='+', default=['input'],
+                        choices=('input',) + NODE_ORDERS,
+                        help='node orders, see utils.ReorderNodes()')
+    parser.add_argument('-m', '--many-to-many', nargs='+', type=int,
+                        default=[], metavar='N',
+                        help='also compare many-to-many engines on random '
+                        +'N x N OD matrices')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='JSON file of the results')
+    args = parser.parse_args(argv)
+
+    numSource = None if args.sources == 'all' else int(args.sources)
+    records = []
+    for name in args.networks:
+        for order in args.orders:
+            records_ = BenchmarkNetwork(name, args.variants, numSource,
+                                        args.seed, args.data_dir, 1e-9, order)
+            PrintRecords(records_)
+            records.extend(records_)
+
+    m2mRecords = []
+    if args.many_to_many:
+        for name in args.networks:
+            m2mRecords.extend(BenchmarkManyToManyNetwork(
+                name, args.many_to_many, args.seed, args.data_dir))
+        print('{0:<16}{1:>6}{2:>10}{3:>10}{4:>11}'
+              .format('network', 'n', 'plain', 'bucket', 'bucket-ch'))
+        for r in m2mRecords:
+            print('{0:<16}{1:>6}{2:>10.2f}{3:>10.2f}{4:>11.2f}'
+                  .format(r['network'], r['n'], r['plain'], r['bucket'],
+                          r['bucket-ch']))
+
+    if args.output:
+        meta = {'python': platform.python_version(),
+                'platform': platform.platform(),
+                'processor': platform.processor(),
+                'numpy': None if np is None else np.__version__,
+                'numSource': args.sources,
+                'seed': args.seed,
+                'time': time()}
+        with open(args.output, 'w') as f:
+            json.dump({'meta': meta, 'results': records,
+                       'manyToMany': m2mRecords}, f, indent=2, default=str)
+
+    return 0 if all(r['agree'] is not False for r in records) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
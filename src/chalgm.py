@@ -0,0 +1,366 @@
+"""Implementation of Contraction Hierarchies (CH) for Point-to-Point Shortest
+Path Problem including:
+
+    1. Node ordering by edge difference with lazy updates
+    2. Shortcut insertion with witness searches
+    3. Upward and downward bidirectional query
+    4. Path unpacking to original links
+    5. Serialization of the preprocessed hierarchy
+"""
+
+
+from array import array
+from math import inf
+from time import time
+import heapq
+import struct
+
+from classes import ContractionHierarchy, CSRGraph, Link
+from utils import MAX_LABEL, GetCSRGraph, GetLink, GetNetworkFingerprint, \
+                  GetNodeID, GetNumNodes
+
+
+# header of the CH file: magic, version, number of nodes, number of edges, and
+# network fingerprint, which is followed by ranks, offsets, heads, lens, and
+# linkIDs of upGraph and downGraph, tails, heads, linkIDs, children1, and
+# children2 (all int32 but lens in float64)
+CH_FILE_HEADER = struct.Struct('<4sIII40s')
+CH_FILE_MAGIC = b'CH\0\0'
+CH_FILE_VERSION = 2
+
+
+def _SearchWitness(u, v, maxDist, outAdj, lens, maxSettled):
+    """ Dijkstra's algorithm from u on the remaining network without v
+
+    It stops once the minimum distance label exceeds maxDist or maxSettled
+    nodes are settled. The returned distance labels are therefore upper bounds
+    of the shortest path distances, which are enough to prove witness paths.
+    """
+    dist = {u: 0}
+    selist = [(0, u)]
+    numSettled = 0
+    while selist:
+        (k, i) = heapq.heappop(selist)
+        if k > dist[i]:
+            continue
+        if k > maxDist or numSettled == maxSettled:
+            break
+        numSettled += 1
+        for j, e in outAdj[i].items():
+            if j == v:
+                continue
+            if dist.get(j, inf) > k + lens[e]:
+                dist[j] = k + lens[e]
+                heapq.heappush(selist, (dist[j], j))
+
+    return dist
+
+
+def _GetShortcuts(v, outAdj, inAdj, lens, maxSettled):
+    """ return the shortcuts needed to contract node v
+
+    For each pair of an incoming link (u, v) and an outgoing link (v, w), a
+    shortcut (u, w) is needed if there is no witness path from u to w without
+    v which is no longer than (u, v, w). Each shortcut is a tuple of u, w, its
+    length, and the two edges it replaces.
+    """
+    shortcuts = []
+    for u, e1 in inAdj[v].items():
+        targets = [(w, lens[e1] + lens[e2], e2)
+                   for w, e2 in outAdj[v].items() if w != u]
+        if not targets:
+            continue
+
+        maxDist = max(t[1] for t in targets)
+        dist = _SearchWitness(u, v, maxDist, outAdj, lens, maxSettled)
+        for w, len_, e2 in targets:
+            if dist.get(w, inf) > len_:
+                shortcuts.append((u, w, len_, e1, e2))
+
+    return shortcuts
+
+
+def _GetPriority(v, outAdj, inAdj, lens, maxSettled, contractedNbrs):
+    """ priority of node v for contraction (the lower, the earlier)
+
+    It is the edge difference, i.e., the number of shortcuts added minus the
+    number of links removed by contracting v, plus the number of contracted
+    neighbors of v, which spreads contraction uniformly over the network.
+    """
+    numShortcut = len(_GetShortcuts(v, outAdj, inAdj, lens, maxSettled))
+    edgeDiff = numShortcut - len(inAdj[v]) - len(outAdj[v])
+    return edgeDiff + contractedNbrs[v]
+
+
+def BuildContractionHierarchy(maxSettled=100):
+    """ build Contraction Hierarchy (CH) of the current network
+
+    Nodes are contracted in the order given by _GetPriority(), which is lazily
+    updated, i.e., the priority of the node on top of the heap is recomputed
+    and the node is pushed back if it is no longer the minimum. maxSettled
+    limits each witness search. A larger value leads to fewer shortcuts but
+    longer preprocessing time.
+
+    Only the shortest one of parallel links is kept, and self loops are
+    dropped as neither of them is on any shortest path.
+
+    See ContractionHierarchy for the returned object.
+    """
+    st = time()
+
+    csr = GetCSRGraph()
+    numNode = csr.numNode
+    # remaining network, where outAdj[u][w] and inAdj[w][u] are the edge id of
+    # (u, w)
+    outAdj = [{} for _ in range(numNode)]
+    inAdj = [{} for _ in range(numNode)]
+    tails = []
+    heads = []
+    lens = []
+    linkIDs = []
+    children1 = []
+    children2 = []
+
+    def AddEdge(u, w, len_, linkID, e1, e2):
+        if u == w:
+            return
+        e = outAdj[u].get(w)
+        if e is not None and lens[e] <= len_:
+            return
+        e = len(lens)
+        tails.append(u)
+        heads.append(w)
+        lens.append(len_)
+        linkIDs.append(linkID)
+        children1.append(e1)
+        children2.append(e2)
+        outAdj[u][w] = e
+        inAdj[w][u] = e
+
+    for i in range(numNode):
+        for k in range(csr.offsets[i], csr.offsets[i+1]):
+            AddEdge(i, csr.heads[k], csr.lens[k], csr.linkIDs[k], -1, -1)
+
+    contractedNbrs = [0] * numNode
+    selist = [(_GetPriority(v, outAdj, inAdj, lens, maxSettled,
+                            contractedNbrs), v)
+              for v in range(numNode)]
+    heapq.heapify(selist)
+
+    ranks = array('i', [0] * numNode)
+    # edges to higher rank nodes
+    upEdges = []
+    # edges from higher rank nodes
+    downEdges = []
+    rank = 0
+    while selist:
+        v = heapq.heappop(selist)[1]
+        p = _GetPriority(v, outAdj, inAdj, lens, maxSettled, contractedNbrs)
+        if selist and p > selist[0][0]:
+            heapq.heappush(selist, (p, v))
+            continue
+
+        for u, w, len_, e1, e2 in _GetShortcuts(v, outAdj, inAdj, lens,
+                                                maxSettled):
+            AddEdge(u, w, len_, -1, e1, e2)
+
+        ranks[v] = rank
+        rank += 1
+        for w, e in outAdj[v].items():
+            upEdges.append(Link(e, None, v, w, lens[e]))
+            del inAdj[w][v]
+            contractedNbrs[w] += 1
+        for u, e in inAdj[v].items():
+            downEdges.append(Link(e, None, u, v, lens[e]))
+            del outAdj[u][v]
+            contractedNbrs[u] += 1
+        outAdj[v] = {}
+        inAdj[v] = {}
+
+    ch = ContractionHierarchy(ranks,
+                              CSRGraph(numNode, upEdges),
+                              CSRGraph(numNode, downEdges, reverse=True),
+                              array('i', tails),
+                              array('i', heads),
+                              array('i', linkIDs),
+                              array('i', children1),
+                              array('i', children2),
+                              GetNetworkFingerprint(csr))
+
+    print('Processing time for CH\t: {0: .2f}'.format(time() - st)+' s.')
+    print('Number of shortcuts\t: '+str(ch.GetNumShortcuts()))
+
+    return ch
+
+
+def CalculateP2PCH(srcNodeID, destNodeID, ch, distF, predF, distB, predB):
+    """ Upward and downward bidirectional query on Contraction Hierarchy
+
+    The forward search from srcNodeID only follows ch.upGraph and the backward
+    search from destNodeID only follows ch.downGraph, i.e., both of them go
+    upward in the hierarchy. Each search stops on its own once its minimum key
+    is no less than mu, the length of the shortest path found so far.
+
+    predF[i] (predB[i]) is the edge id of CH entering (leaving) node i on the
+    shortest path. See UnpackPathCH() to get the original links.
+
+    It returns mu, the node where the two searches meet (-1 if destNodeID is
+    not reachable), and the number of settled nodes.
+    """
+    distF[srcNodeID] = 0
+    distB[destNodeID] = 0
+    if srcNodeID == destNodeID:
+        return 0, srcNodeID, 0
+
+    searches = [
+        ([(0, srcNodeID)], distF, predF, distB, ch.upGraph),
+        ([(0, destNodeID)], distB, predB, distF, ch.downGraph)
+    ]
+    mu = MAX_LABEL
+    meetNodeID = -1
+    numSettled = 0
+    active = 0
+    while True:
+        # drop the search which can no longer improve mu
+        searches = [x for x in searches if x[0] and x[0][0][0] < mu]
+        if not searches:
+            break
+
+        active = (active + 1) % len(searches)
+        selist, dist, pred, distOther, graph = searches[active]
+        (k, i) = heapq.heappop(selist)
+        if k > dist[i]:
+            continue
+        numSettled += 1
+        for p in range(graph.offsets[i], graph.offsets[i+1]):
+            j = graph.heads[p]
+            if dist[j] > k + graph.lens[p]:
+                dist[j] = k + graph.lens[p]
+                pred[j] = graph.linkIDs[p]
+                heapq.heappush(selist, (dist[j], j))
+                if dist[j] + distOther[j] < mu:
+                    mu = dist[j] + distOther[j]
+                    meetNodeID = j
+
+    return mu, meetNodeID, numSettled
+
+
+def UnpackPathCH(srcNodeID, destNodeID, meetNodeID, ch, predF, predB):
+    """ return the list of internal link ids on the shortest path from
+    CalculateP2PCH() by recursively replacing shortcuts with the two edges
+    they represent
+    """
+    edges = []
+    # edges from srcNodeID to meetNodeID, which are collected backward
+    i = meetNodeID
+    while i != srcNodeID:
+        e = predF[i]
+        edges.append(e)
+        i = ch.tails[e]
+    edges.reverse()
+    # edges from meetNodeID to destNodeID
+    i = meetNodeID
+    while i != destNodeID:
+        e = predB[i]
+        edges.append(e)
+        i = ch.heads[e]
+
+    linkIDs = []
+    stack = edges[::-1]
+    while stack:
+        e = stack.pop()
+        if ch.linkIDs[e] != -1:
+            linkIDs.append(ch.linkIDs[e])
+        else:
+            stack.append(ch.children2[e])
+            stack.append(ch.children1[e])
+
+    return linkIDs
+
+
+def FindShortestPathCH(origNodeUID, destNodeUID, ch):
+    """ find the shortest path between two user-defined node ids using
+    Contraction Hierarchy ch
+
+    It returns the shortest path distance and the list of user-defined link
+    ids on the path, which are MAX_LABEL and an empty list if destNodeUID is
+    not reachable.
+    """
+    srcNodeID = GetNodeID(origNodeUID)
+    destNodeID = GetNodeID(destNodeUID)
+    numNode = GetNumNodes()
+
+    distF = [MAX_LABEL] * numNode
+    predF = [-1] * numNode
+    distB = [MAX_LABEL] * numNode
+    predB = [-1] * numNode
+    mu, meetNodeID, _ = CalculateP2PCH(srcNodeID, destNodeID, ch, distF,
+                                       predF, distB, predB)
+    if meetNodeID == -1:
+        return mu, []
+
+    linkIDs = UnpackPathCH(srcNodeID, destNodeID, meetNodeID, ch, predF,
+                           predB)
+    return mu, [GetLink(k).uid for k in linkIDs]
+
+
+def SaveContractionHierarchy(ch, fileName):
+    """ save Contraction Hierarchy ch to fileName
+
+    See CH_FILE_HEADER for the file format.
+    """
+    with open(fileName, 'wb') as f:
+        f.write(CH_FILE_HEADER.pack(CH_FILE_MAGIC, CH_FILE_VERSION,
+                                    len(ch.ranks), len(ch.tails),
+                                    ch.fingerprint.encode()))
+        ch.ranks.tofile(f)
+        for g in (ch.upGraph, ch.downGraph):
+            for a in (g.offsets, g.heads, g.lens, g.linkIDs):
+                a.tofile(f)
+        for a in (ch.tails, ch.heads, ch.linkIDs, ch.children1,
+                  ch.children2):
+            a.tofile(f)
+
+
+def _ReadArray(f, typecode, n):
+    """ read an array of n elements of typecode from file object f """
+    a = array(typecode)
+    a.fromfile(f, n)
+    return a
+
+
+def LoadContractionHierarchy(fileName):
+    """ load Contraction Hierarchy from fileName
+
+    It raises an exception if the file is saved by an incompatible version or
+    for a different network (in terms of topology and link lengths) from the
+    current one.
+    """
+    with open(fileName, 'rb') as f:
+        header = f.read(CH_FILE_HEADER.size)
+        if len(header) < CH_FILE_HEADER.size:
+            raise Exception('INCOMPATIBLE CH FILE: '+fileName)
+
+        magic, version, numNode, numEdge, fingerprint = \
+            CH_FILE_HEADER.unpack(header)
+        if magic != CH_FILE_MAGIC or version != CH_FILE_VERSION:
+            raise Exception('INCOMPATIBLE CH FILE: '+fileName)
+
+        fingerprint = fingerprint.decode()
+        if fingerprint != GetNetworkFingerprint():
+            raise Exception('CH FILE '+fileName+' IS NOT BUILT on the '
+                            +'CURRENT NETWORK!!')
+
+        ranks = _ReadArray(f, 'i', numNode)
+        graphs = []
+        for reverse in (False, True):
+            offsets = _ReadArray(f, 'i', numNode + 1)
+            numLink = offsets[-1]
+            graphs.append(CSRGraph.FromArrays(offsets,
+                                              _ReadArray(f, 'i', numLink),
+                                              _ReadArray(f, 'd', numLink),
+                                              _ReadArray(f, 'i', numLink),
+                                              reverse))
+        edges = [_ReadArray(f, 'i', numEdge) for _ in range(5)]
+
+    return ContractionHierarchy(ranks, *graphs, *edges, fingerprint)
@@ -4,6 +4,14 @@
 """
 
 
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from math import inf
+
+import SimpleDequeC
+
+
 class Node:
 
     def __init__(self, nodeID, nodeUID):
@@ -12,17 +20,28 @@ class Node:
         # user-defined node id defined by user or input file
         self.uid = nodeUID
         self.outgoingLinks = []
+        self.incomingLinks = []
 
     def AddOutgoingLinks(self, linkID):
         self.outgoingLinks.append(linkID)
 
+    def AddIncomingLinks(self, linkID):
+        self.incomingLinks.append(linkID)
+
     def GetOutgoingLinks(self):
         return self.outgoingLinks
 
+    def GetIncomingLinks(self):
+        return self.incomingLinks
+
     def GetOutgoingLinksIter(self):
         for i in self.outgoingLinks:
             yield i
 
+    def GetIncomingLinksIter(self):
+        for i in self.incomingLinks:
+            yield i
+
 
 class Link:
 
@@ -45,6 +64,267 @@ class Link:
         return self.linkLen
 
 
+class CSRGraph:
+    """ Compressed Sparse Row (CSR) representation of the network
+
+    The outgoing links of node i are stored consecutively in positions
+    offsets[i], offsets[i]+1, ..., offsets[i+1]-1, where heads and lens give
+    the destination node and the length of each link. linkIDs keeps the
+    internal link id at each position so that it can always be mapped back to
+    the corresponding Link object (and its user-defined id).
+
+    All of them are typed arrays from the built-in array module. The label
+    correcting loops walk these arrays directly rather than looking up Node
+    and Link objects and calling their methods for each link.
+
+    If reverse is True, it is built on the reverse network, i.e., positions
+    offsets[i] to offsets[i+1]-1 are for the incoming links of node i and heads
+    gives their origin nodes. It is used by backward searches.
+    """
+    def __init__(self, numNode, links, reverse=False):
+        numLink = len(links)
+        if reverse:
+            getTail = Link.GetDestNodeID
+            getHead = Link.GetOrigNodeID
+        else:
+            getTail = Link.GetOrigNodeID
+            getHead = Link.GetDestNodeID
+
+        # count the number of outgoing links for each node
+        offsets = array('i', [0] * (numNode + 1))
+        for link in links:
+            offsets[getTail(link) + 1] += 1
+        for i in range(numNode):
+            offsets[i + 1] += offsets[i]
+
+        heads = array('i', [0] * numLink)
+        lens = array('d', [0] * numLink)
+        linkIDs = array('i', [0] * numLink)
+        # next available position for each node, which keeps the order of
+        # outgoing (incoming) links the same as Node.GetOutgoingLinks()
+        # (Node.GetIncomingLinks())
+        pos = offsets[:-1]
+        for link in links:
+            i = getTail(link)
+            k = pos[i]
+            heads[k] = getHead(link)
+            lens[k] = link.GetLen()
+            linkIDs[k] = link.id
+            pos[i] = k + 1
+
+        self.numNode = numNode
+        self.numLink = numLink
+        self.reverse = reverse
+        # integer link lengths keyed by scaling factor, see GetScaledLens()
+        self.scaledLens = {}
+        self.offsets = offsets
+        self.heads = heads
+        self.lens = lens
+        self.linkIDs = linkIDs
+
+    @classmethod
+    def FromArrays(cls, offsets, heads, lens, linkIDs, reverse=False,
+                   check=True):
+        """ create CSR graph from existing arrays (or memoryviews) without
+        copying them, e.g., those of GraphCache
+
+        offsets and heads are checked once here by SimpleDequeC.check_csr(),
+        which the native SSSP kernels rely on, unless check is False (e.g.,
+        offsets is a ScanCounter wrapping those of a checked graph).
+        """
+        if check:
+            SimpleDequeC.check_csr(offsets, heads)
+        csr = cls.__new__(cls)
+        csr.numNode = len(offsets) - 1
+        csr.numLink = len(heads)
+        csr.reverse = reverse
+        csr.scaledLens = {}
+        csr.offsets = offsets
+        csr.heads = heads
+        csr.lens = lens
+        csr.linkIDs = linkIDs
+        return csr
+
+    def __getstate__(self):
+        # memoryviews (see FromArrays()) cannot be pickled
+        state = self.__dict__.copy()
+        for k in ('offsets', 'heads', 'lens', 'linkIDs'):
+            if isinstance(state[k], memoryview):
+                state[k] = array(state[k].format, state[k])
+        return state
+
+    def GetArrays(self):
+        """ return offsets, heads, and lens for the label correcting loops """
+        return self.offsets, self.heads, self.lens
+
+
+class GraphCache:
+    """ network kept in flat arrays rather than Node and Link objects
+
+    It is either loaded from a binary cache file (see utils.ReadNetwork()) or
+    read in bulk (see utils.ReadNetworkBulk()). For the former, all arrays are
+    memoryviews of the mapped file, i.e., nothing is parsed or copied on
+    loading. The file is mapped copy-on-write so that link lengths can still
+    be changed in memory without touching the file.
+
+    linkPos[k] is the position of link k in csr. User-defined ids are UTF-8
+    strings concatenated in nodeUIDs (linkUIDs), where the one of node (link)
+    i is from nodeUIDOffsets[i] to nodeUIDOffsets[i+1].
+    """
+    def __init__(self, buf, csr, csrRev, linkPos, xCoords, yCoords,
+                 nodeUIDOffsets, nodeUIDs, linkUIDOffsets, linkUIDs):
+        self.numNode = csr.numNode
+        self.numLink = csr.numLink
+        self.buf = buf
+        self.csr = csr
+        self.csrRev = csrRev
+        self.linkPos = linkPos
+        self.xCoords = xCoords
+        self.yCoords = yCoords
+        self.nodeUIDOffsets = nodeUIDOffsets
+        self.nodeUIDs = nodeUIDs
+        self.linkUIDOffsets = linkUIDOffsets
+        self.linkUIDs = linkUIDs
+
+    def GetNodeUID(self, nodeID):
+        i = self.nodeUIDOffsets[nodeID]
+        j = self.nodeUIDOffsets[nodeID+1]
+        return str(self.nodeUIDs[i:j], 'utf-8')
+
+    def GetLinkUID(self, linkID):
+        i = self.linkUIDOffsets[linkID]
+        j = self.linkUIDOffsets[linkID+1]
+        return str(self.linkUIDs[i:j], 'utf-8')
+
+    def GetNodeUIDs(self):
+        return [self.GetNodeUID(i) for i in range(self.numNode)]
+
+    def CreateNode(self, nodeID):
+        """ create the Node object of nodeID """
+        node = Node(nodeID, self.GetNodeUID(nodeID))
+        for csr, links in ((self.csr, node.outgoingLinks),
+                           (self.csrRev, node.incomingLinks)):
+            links.extend(csr.linkIDs[csr.offsets[nodeID]:
+                                     csr.offsets[nodeID+1]])
+        return node
+
+    def CreateLink(self, linkID):
+        """ create the Link object of linkID """
+        k = self.linkPos[linkID]
+        tail = bisect_right(self.csr.offsets, k) - 1
+        return Link(linkID, self.GetLinkUID(linkID), tail, self.csr.heads[k],
+                    self.csr.lens[k])
+
+
+class ContractionHierarchy:
+    """ Contraction Hierarchy (CH) of the network
+
+    Nodes are contracted one by one in the order of ranks. Each edge e of CH
+    goes from node tails[e] to node heads[e]. It is either an original link
+    (linkIDs[e] is its internal link id) or a shortcut (linkIDs[e] is -1)
+    replacing edges children1[e] and children2[e] through the contracted node
+    in between.
+
+    upGraph is the CSR graph of all edges going from lower rank nodes to higher
+    rank nodes, and downGraph is the reverse CSR graph of all edges going from
+    higher rank nodes to lower rank nodes, i.e., both of them only lead to
+    higher rank nodes. Their linkIDs are edge ids of CH rather than link ids.
+
+    fingerprint identifies the network on which CH is built.
+    """
+    def __init__(self, ranks, upGraph, downGraph, tails, heads, linkIDs,
+                 children1, children2, fingerprint):
+        self.ranks = ranks
+        self.upGraph = upGraph
+        self.downGraph = downGraph
+        self.tails = tails
+        self.heads = heads
+        self.linkIDs = linkIDs
+        self.children1 = children1
+        self.children2 = children2
+        self.fingerprint = fingerprint
+
+    def GetNumShortcuts(self):
+        return self.linkIDs.count(-1)
+
+
+class Landmarks:
+    """ Landmarks and their distance tables for ALT (A*, Landmarks, and
+    Triangle inequality)
+
+    distFrom[l][i] is the shortest path distance from landmark l (i.e., node
+    nodeIDs[l]) to node i, and distTo[l][i] is the one from node i to landmark
+    l. Both of them are k x n TypedMatrix, where k is the number of landmarks.
+
+    fingerprint identifies the network on which they are calculated.
+    """
+    def __init__(self, nodeIDs, distFrom, distTo, fingerprint):
+        self.nodeIDs = nodeIDs
+        self.distFrom = distFrom
+        self.distTo = distTo
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.nodeIDs)
+
+
+class TypedMatrix:
+    """ Matrix of typed elements stored row by row in one contiguous buffer
+
+    The buffer can be any object supporting the buffer protocol, e.g.,
+    bytearray for an in-memory matrix, mmap for a matrix backed by a file, or
+    the buffer of multiprocessing.shared_memory.SharedMemory. Each element
+    takes only itemsize bytes (e.g., 4 bytes for typecode 'f' and 'i') rather
+    than a Python object.
+
+    m[i] returns row i as a memoryview so that m[i][j] works the same as a
+    list of lists. buf can be larger than the matrix (e.g., padded for mmap
+    or rounded up to pages for SharedMemory), and only its prefix is used.
+    """
+    def __init__(self, numRow, numCol, typecode, buf):
+        self.numRow = numRow
+        self.numCol = numCol
+        self.typecode = typecode
+        self.buf = buf
+        size_ = numRow * numCol * array(typecode).itemsize
+        self.data = memoryview(buf).cast('B')[:size_].cast(typecode)
+
+    def __len__(self):
+        return self.numRow
+
+    def __getitem__(self, i):
+        return self.data[i*self.numCol:(i+1)*self.numCol]
+
+    def __eq__(self, other):
+        if not isinstance(other, TypedMatrix):
+            return NotImplemented
+
+        return (self.numRow == other.numRow
+                and self.numCol == other.numCol
+                and self.data == other.data)
+
+    def SetRow(self, i, values):
+        """ set row i from a list or a buffer with the same typecode """
+        if not isinstance(values, (array, memoryview)):
+            values = array(self.typecode, values)
+        self.data[i*self.numCol:(i+1)*self.numCol] = values
+
+    def tolist(self):
+        return [self[i].tolist() for i in range(self.numRow)]
+
+    def Flush(self):
+        """ write changes back to the file if it is backed by mmap """
+        if hasattr(self.buf, 'flush'):
+            self.buf.flush()
+
+    def Close(self):
+        """ release the buffer, and close the file if it is backed by mmap """
+        self.Flush()
+        self.data.release()
+        if hasattr(self.buf, 'close'):
+            self.buf.close()
+
+
 class SimpleDequePy:
     """ Special implementation of deque using fix-length array
 
@@ -60,12 +340,13 @@ class SimpleDequePy:
         return self.head != -1
 
     def appendleft(self, nodeID):
-        self.nodes[nodeID] = self.head
-        self.head = nodeID
-
+        # check it before head is overwritten
         if self.head == -1:
             self.tail = nodeID
 
+        self.nodes[nodeID] = self.head
+        self.head = nodeID
+
     def append(self, nodeID):
         if self.head == -1:
             self.head = nodeID
@@ -87,6 +368,199 @@ class SimpleDequePy:
         self.tail = -1
 
 
+class IndexedHeapPy:
+    """ Indexed d-ary min-heap using fix-length arrays
+
+    Each node appears in the heap at most once. Its position in the heap is
+    tracked by pos[nodeID] (-1 if it is not in the heap), which enables the
+    decrease-key operation in O(log_d(n)) time. Keys are kept in keys[nodeID]
+    rather than tuples allocated for each push.
+
+    A larger d makes the heap shallower, i.e., faster decrease-key but slower
+    pop as each sift-down compares d children.
+    """
+    def __init__(self, size_, d=4):
+        self.d = d
+        self.nodes = [-1] * size_
+        self.keys = [0] * size_
+        self.pos = [-1] * size_
+        self.size = 0
+        # maximum size of the heap ever reached
+        self.maxSize = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, nodeID, key):
+        """ insert nodeID with key, or decrease its key if it is in heap """
+        if self.pos[nodeID] == -1:
+            p = self.size
+            self.size += 1
+            if self.size > self.maxSize:
+                self.maxSize = self.size
+        elif key < self.keys[nodeID]:
+            p = self.pos[nodeID]
+        else:
+            return
+
+        self.keys[nodeID] = key
+        self._siftup(nodeID, key, p)
+
+    def pop(self):
+        """ remove the node with the minimum key and return it """
+        nodes = self.nodes
+        top = nodes[0]
+        self.pos[top] = -1
+        self.size -= 1
+        if self.size:
+            last = nodes[self.size]
+            self._siftdown(last, self.keys[last], 0)
+
+        return top
+
+    def _siftup(self, nodeID, key, p):
+        nodes = self.nodes
+        keys = self.keys
+        pos = self.pos
+        d = self.d
+        while p:
+            q = (p - 1) // d
+            parent = nodes[q]
+            if keys[parent] <= key:
+                break
+            nodes[p] = parent
+            pos[parent] = p
+            p = q
+
+        nodes[p] = nodeID
+        pos[nodeID] = p
+
+    def _siftdown(self, nodeID, key, p):
+        nodes = self.nodes
+        keys = self.keys
+        pos = self.pos
+        d = self.d
+        size_ = self.size
+        while True:
+            first = d * p + 1
+            if first >= size_:
+                break
+            # the child with the minimum key
+            c = first
+            minKey = keys[nodes[first]]
+            for q in range(first + 1, min(first + d, size_)):
+                if keys[nodes[q]] < minKey:
+                    c = q
+                    minKey = keys[nodes[q]]
+            if minKey >= key:
+                break
+            nodes[p] = nodes[c]
+            pos[nodes[c]] = p
+            p = c
+
+        nodes[p] = nodeID
+        pos[nodeID] = p
+
+    def clear(self):
+        for i in range(self.size):
+            self.pos[self.nodes[i]] = -1
+        self.size = 0
+
+
+class BucketQueuePy:
+    """ Dial's bucket queue for non-negative integer keys
+
+    As keys in the queue are always within [cur, cur+maxKeyDiff] for the
+    monotone label setting algorithm, where cur is the key of the last popped
+    node and maxKeyDiff is the maximum (integer) link length, maxKeyDiff+1
+    buckets are used circularly. Both push and pop take O(1) time except the
+    scan over empty buckets.
+
+    Outdated entries are NOT removed. The caller should skip a popped node if
+    its key differs from its current distance label.
+    """
+    def __init__(self, maxKeyDiff):
+        self.numBucket = maxKeyDiff + 1
+        self.buckets = [[] for _ in range(self.numBucket)]
+        self.cur = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, nodeID, key):
+        self.buckets[key % self.numBucket].append(nodeID)
+        self.size += 1
+
+    def pop(self):
+        """ remove a node with the minimum key and return the key and node """
+        b = self.buckets[self.cur % self.numBucket]
+        while not b:
+            self.cur += 1
+            b = self.buckets[self.cur % self.numBucket]
+
+        self.size -= 1
+        return self.cur, b.pop()
+
+    def clear(self):
+        # all buckets are already empty if size is 0
+        if self.size:
+            for b in self.buckets:
+                b.clear()
+        self.cur = 0
+        self.size = 0
+
+
+class RadixHeapPy:
+    """ Radix heap for non-negative integer keys
+
+    It only works for monotone priority queues, i.e., no key smaller than the
+    last popped one is pushed. Bucket b holds the entries whose keys differ
+    from the last popped key in bit b-1 at most, i.e., bucket 0 holds the keys
+    equal to it. Once bucket 0 is empty, the first non-empty bucket is
+    redistributed to the lower buckets according to its minimum key. Each
+    entry is moved at most log(C) times, where C is the maximum key
+    difference.
+
+    Outdated entries are NOT removed. See BucketQueuePy.
+    """
+    def __init__(self, maxKey):
+        self.buckets = [[] for _ in range(maxKey.bit_length() + 1)]
+        self.last = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, nodeID, key):
+        self.buckets[(key ^ self.last).bit_length()].append((key, nodeID))
+        self.size += 1
+
+    def pop(self):
+        """ remove a node with the minimum key and return the key and node """
+        buckets = self.buckets
+        if not buckets[0]:
+            b = 1
+            while not buckets[b]:
+                b += 1
+            entries = buckets[b]
+            buckets[b] = []
+            last = min(entries)[0]
+            for e in entries:
+                buckets[(e[0] ^ last).bit_length()].append(e)
+            self.last = last
+
+        self.size -= 1
+        return buckets[0].pop()
+
+    def clear(self):
+        if self.size:
+            for b in self.buckets:
+                b.clear()
+        self.last = 0
+        self.size = 0
+
+
 class SpecialDequePy:
     """ Special implementation of deque using fix-length array
 
@@ -110,12 +584,13 @@ class SpecialDequePy:
         return self.head != -1
 
     def appendleft(self, nodeID):
-        self.nodes[nodeID] = self.head
-        self.head = nodeID
-
+        # check it before head is overwritten
         if self.head == -1:
             self.tail = nodeID
 
+        self.nodes[nodeID] = self.head
+        self.head = nodeID
+
     def append(self, nodeID):
         if self.head == -1:
             self.head = nodeID
@@ -140,4 +615,218 @@ class SpecialDequePy:
 
     def clear(self):
         self.head = -1
-        self.tail = -1
\ No newline at end of file
+        self.tail = -1
+
+
+class SSSPWorkspace:
+    """ Reusable buffers for SSSP from different source nodes
+
+    It holds distance labels, predecessors, status array, and scan eligible
+    lists (e.g., deque and heap), which are allocated once rather than for
+    each source node.
+
+    touched keeps the nodes labeled by the last run. Reset() only restores
+    these nodes to their initial states, which takes time proportional to the
+    number of them rather than n. It works as each SSSP implementation leaves
+    its status array (except for the touched nodes) and scan eligible list
+    empty at termination.
+    """
+    def __init__(self, numNode):
+        self.numNode = numNode
+        self.dist = [inf] * numNode
+        self.pred = [-1] * numNode
+        self.status = [0] * numNode
+        self.touched = []
+        # scan eligible lists keyed by their types and arguments
+        self.selists = {}
+
+    def GetSEList(self, type_, *args):
+        """ return the (empty) scan eligible list of type_(*args) and create it
+        if necessary
+        """
+        key = (type_,) + args
+        try:
+            return self.selists[key]
+        except KeyError:
+            selist = type_(*args)
+            self.selists[key] = selist
+            return selist
+
+    def Reset(self):
+        dist = self.dist
+        pred = self.pred
+        status = self.status
+        for i in self.touched:
+            dist[i] = inf
+            pred[i] = -1
+            status[i] = 0
+
+        for selist in self.selists.values():
+            # nodes scanned before are marked by SpecialDequePy itself
+            if isinstance(selist, SpecialDequePy):
+                for i in self.touched:
+                    selist.nodes[i] = -1
+            selist.clear()
+
+        self.touched.clear()
+
+
+class SSSPStats:
+    """ Counters and phase timers of instrumented SSSP (see
+    spalgm.CalculateSSSPWithStats())
+
+    numSearch is the number of SSSP runs accumulated, and the others are
+        1. scans: nodes removed from the scan eligible list and scanned;
+        2. relaxations: links examined by the scans;
+        3. updates: relaxations decreasing distance labels;
+        4. reinsertions: nodes put back into the scan eligible list after
+           being scanned (appendleft for deque), or pushed again before being
+           scanned (duplicate heap entries for heapq and buckets);
+        5. staleEntries: outdated heap or bucket entries popped and skipped;
+        6. maxQueueSize: maximum size of the scan eligible list;
+        7. times: seconds spent on each phase, i.e., reset (workspace and
+           initialization), search, and finalize (e.g., unscaling distance
+           labels).
+    """
+    def __init__(self):
+        self.numSearch = 0
+        self.scans = 0
+        self.relaxations = 0
+        self.updates = 0
+        self.reinsertions = 0
+        self.staleEntries = 0
+        self.maxQueueSize = 0
+        self.times = {'reset': 0, 'search': 0, 'finalize': 0}
+
+    def __iadd__(self, other):
+        self.numSearch += other.numSearch
+        self.scans += other.scans
+        self.relaxations += other.relaxations
+        self.updates += other.updates
+        self.reinsertions += other.reinsertions
+        self.staleEntries += other.staleEntries
+        self.maxQueueSize = max(self.maxQueueSize, other.maxQueueSize)
+        for k, v in other.times.items():
+            self.times[k] = self.times.get(k, 0) + v
+        return self
+
+    def AsDict(self):
+        d = {k: v for k, v in self.__dict__.items() if k != 'times'}
+        d['times'] = dict(self.times)
+        return d
+
+
+class ScanCounter:
+    """ offsets of a CSR graph counting how many times they are read
+
+    Each SSSP implementation in spalgm.py reads offsets[i] and offsets[i+1]
+    exactly once for every scan of node i, and nowhere else. Therefore, the
+    number of scans is count // 2.
+    """
+    def __init__(self, offsets):
+        self.offsets = offsets
+        self.count = 0
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        self.count += 1
+        return self.offsets[i]
+
+
+class SPTCache:
+    """ LRU cache of shortest path trees (SPT) keyed by source node
+
+    Each SPT is kept as compact arrays of distance labels (of distType, i.e.,
+    float64 or float32) and predecessors (int32), i.e., 12 (or 8) bytes per
+    node. The least recently used ones are evicted once their total size
+    exceeds maxBytes. All of them are dropped as soon as a different network
+    version (see utils.GetNetworkVersion()) is given, e.g., after any link
+    length is changed.
+
+    See spalgm.CalculateSSSPCached().
+    """
+    def __init__(self, maxBytes, distType='d'):
+        if distType not in ('d', 'f'):
+            raise Exception('Please choose correct type of distance labels: '
+                            +'d (float64); f (float32).')
+
+        self.maxBytes = maxBytes
+        self.distType = distType
+        self.version = None
+        # (dist, pred) keyed by source node id in the order of last use
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _CheckVersion(self, version):
+        if version != self.version:
+            self.Invalidate()
+            self.version = version
+
+    def Get(self, srcNodeID, version):
+        """ return (dist, pred) of srcNodeID on network version, or None if it
+        is not cached
+        """
+        self._CheckVersion(version)
+        try:
+            spt = self.entries[srcNodeID]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(srcNodeID)
+        self.hits += 1
+        return spt
+
+    def Put(self, srcNodeID, version, dist, pred):
+        """ cache dist and pred of srcNodeID on network version as arrays and
+        return them
+
+        Nothing is cached if they alone exceed maxBytes.
+        """
+        self._CheckVersion(version)
+        spt = (array(self.distType, dist), array('i', pred))
+        size_ = sum(len(a) * a.itemsize for a in spt)
+        if srcNodeID in self.entries:
+            old = self.entries.pop(srcNodeID)
+            self.size -= sum(len(a) * a.itemsize for a in old)
+        if size_ > self.maxBytes:
+            return spt
+
+        self.entries[srcNodeID] = spt
+        self.size += size_
+        while self.size > self.maxBytes:
+            _, old = self.entries.popitem(last=False)
+            self.size -= sum(len(a) * a.itemsize for a in old)
+            self.evictions += 1
+
+        return spt
+
+    def Invalidate(self):
+        """ drop all SPTs """
+        if self.entries:
+            self.invalidations += 1
+        self.entries.clear()
+        self.size = 0
+
+    def GetStats(self):
+        """ return hits, misses, evictions, invalidations, hit rate, number of
+        SPTs, and their size in bytes as a dict
+        """
+        numQuery = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hitRate': self.hits / numQuery if numQuery else 0,
+                'numEntry': len(self.entries),
+                'size': self.size,
+                'maxBytes': self.maxBytes}
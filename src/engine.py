@@ -0,0 +1,313 @@
+"""Instance-based Networks and Query Engine
+
+Different from the network in the module globals of utils.py, a Graph holds
+its own copy of the CSR graph, user-defined node ids, and coordinates, which
+are never changed after it is created. Several of them (e.g., different
+scenarios) can be loaded at the same time, and each of them can be shared by
+any number of threads as all the buffers of a query (i.e., SSSPWorkspace and
+the arrays of the native kernels) are kept in a QueryContext for each thread.
+
+Engine answers batches of origin-destination queries on a Graph by a thread
+pool. The native kernels (dij-c and deq-c) release the GIL, and only they run
+in parallel on multiple cores.
+"""
+
+
+import csv
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from math import nan
+from random import Random
+from time import time
+
+from classes import CSRGraph, Link, SSSPWorkspace
+from m2malgm import CalculateOneToMany
+from spalgm import SSSP_METHODS, CalculateSSSP, CalculateSSSPDEQC, \
+                   CalculateSSSPDijkstraC, CalculateSSSPDijkstraII
+from utils import MAX_LABEL, GetCSRGraph, GetNodeCoords, GetNodeUID, \
+                  GetNumNodes, GetScaledLens
+
+
+# native kernels available to Graph and Engine in addition to SSSP_METHODS
+NATIVE_METHODS = ('dij-c', 'deq-c')
+
+
+def _CopyArray(typecode, a):
+    """ copy an array or memoryview a to a new array of typecode """
+    b = array(typecode)
+    b.frombytes(memoryview(a).cast('B'))
+    return b
+
+
+def _CheckMethod(method):
+    """ return method in lower case if it is in SSSP_METHODS or NATIVE_METHODS
+    """
+    method_ = method.lower()
+    if method_ in NATIVE_METHODS or (method_.startswith(SSSP_METHODS)
+                                     and not method_.endswith('-c')):
+        return method_
+
+    raise Exception('Please choose correct shortest path algorithm: '
+                    +'; '.join(SSSP_METHODS + NATIVE_METHODS)+'.')
+
+
+class QueryContext:
+    """ buffers of the queries from one thread on a Graph
+
+    ws is used by the implementations in spalgm.py, and dist and pred are the
+    arrays for the native ones.
+    """
+    def __init__(self, numNode):
+        self.ws = SSSPWorkspace(numNode)
+        self.dist = array('d', bytes(8 * numNode))
+        self.pred = array('i', bytes(4 * numNode))
+
+
+class Graph:
+    """ network shared by threads, which must not be modified after it is
+    created
+
+    Node i has user-defined id nodeUIDs[i] and coordinates (xCoords[i],
+    yCoords[i]). Internal node ids are the same as those of the network it is
+    created from.
+
+    Link lengths are scaled to integers for dial and radix (see
+    utils.GetScaledLens()) when it is created, and scale is the default
+    scaling factor, which is None if they cannot be scaled.
+    """
+    def __init__(self, csr, nodeUIDs, xCoords, yCoords):
+        self.csr = csr
+        self.numNode = csr.numNode
+        self.numLink = csr.numLink
+        self.nodeUIDs = tuple(nodeUIDs)
+        self.mapUIDs = {uid: i for i, uid in enumerate(self.nodeUIDs)}
+        self.xCoords = xCoords
+        self.yCoords = yCoords
+        # csr.scaledLens must not be filled lazily by queries of threads
+        try:
+            _, self.scale = GetScaledLens(None, csr)
+        except Exception:
+            self.scale = None
+        # QueryContext of each thread
+        self._local = threading.local()
+
+    @classmethod
+    def Read(cls, nodeFile, linkFile, delimiter_=','):
+        """ read a new Graph from nodeFile and linkFile in the same format as
+        utils.ReadNodes() and utils.ReadLinks() without touching the current
+        network
+        """
+        nodeUIDs = []
+        mapUIDs = {}
+        xCoords = array('d')
+        yCoords = array('d')
+        with open(nodeFile) as f:
+            next(f)
+            for r in csv.reader(f, delimiter=delimiter_):
+                nodeUID = r[0].strip()
+                if nodeUID in mapUIDs:
+                    raise Exception('DUPLICATE NODE ID FOUND: '+nodeUID)
+                mapUIDs[nodeUID] = len(nodeUIDs)
+                nodeUIDs.append(nodeUID)
+                try:
+                    x, y = float(r[1]), float(r[2])
+                except (IndexError, ValueError):
+                    x, y = nan, nan
+                xCoords.append(x)
+                yCoords.append(y)
+
+        links = []
+        with open(linkFile) as f:
+            next(f)
+            for r in csv.reader(f, delimiter=delimiter_):
+                try:
+                    tail = mapUIDs[r[1].strip()]
+                    head = mapUIDs[r[2].strip()]
+                except KeyError as e:
+                    raise Exception('INCONSISTENCY FOUND between LINK and '
+                                    +'NODE FILES: Node '+str(e.args[0])
+                                    +' NOT EXIST in NODE FILE!!')
+                links.append(Link(len(links), r[0].strip(), tail, head,
+                                  float(r[3])))
+
+        return cls(CSRGraph(len(nodeUIDs), links), nodeUIDs, xCoords,
+                   yCoords)
+
+    @classmethod
+    def FromCurrentNetwork(cls):
+        """ create a Graph from a copy of the current network in utils.py,
+        which can be loaded by any means (e.g., from a binary cache)
+        """
+        csr = GetCSRGraph()
+        csr_ = CSRGraph.FromArrays(_CopyArray('i', csr.offsets),
+                                   _CopyArray('i', csr.heads),
+                                   _CopyArray('d', csr.lens),
+                                   _CopyArray('i', csr.linkIDs))
+        xCoords, yCoords = GetNodeCoords()
+        return cls(csr_, [GetNodeUID(i) for i in range(GetNumNodes())],
+                   _CopyArray('d', xCoords), _CopyArray('d', yCoords))
+
+    def GetNodeID(self, nodeUID):
+        try:
+            return self.mapUIDs[nodeUID]
+        except KeyError:
+            raise Exception('Node '+str(nodeUID)+' NOT EXIST!!')
+
+    def GetNodeUID(self, nodeID):
+        return self.nodeUIDs[nodeID]
+
+    def GetContext(self):
+        """ return the QueryContext of the calling thread """
+        try:
+            return self._local.ctx
+        except AttributeError:
+            self._local.ctx = QueryContext(self.numNode)
+            return self._local.ctx
+
+    def CalculateSSSP(self, srcNodeID, method='dij', targets=(), scale=None):
+        """ SSSP from srcNodeID using one of SSSP_METHODS and NATIVE_METHODS
+
+        It returns the distance labels and predecessors in the QueryContext
+        of the calling thread, which are overwritten by its next query. For
+        dij, the search stops once all nodes in targets (a set of node ids)
+        are settled, and only their distance labels are final then. scale is
+        passed to spalgm.CalculateSSSP() for dial and radix, which is
+        self.scale by default and must have been applied to link lengths
+        before (e.g., by Engine()).
+        """
+        method_ = _CheckMethod(method)
+        ctx = self.GetContext()
+        if method_ == 'dij-c':
+            CalculateSSSPDijkstraC(srcNodeID, ctx.dist, ctx.pred, self.csr)
+            return ctx.dist, ctx.pred
+        if method_ == 'deq-c':
+            CalculateSSSPDEQC(srcNodeID, ctx.dist, ctx.pred, self.csr)
+            return ctx.dist, ctx.pred
+
+        if method_.startswith(('dial', 'radix')):
+            if scale is None:
+                scale = self.scale
+            if scale not in self.csr.scaledLens:
+                raise Exception('LINK LENGTHS are NOT SCALED by '+str(scale)
+                                +'!!')
+
+        ws = ctx.ws
+        if method_.startswith('dij'):
+            CalculateSSSPDijkstraII(srcNodeID, ws.dist, ws.pred, self.csr, ws,
+                                    targets)
+        else:
+            CalculateSSSP(srcNodeID, self.numNode, ws.dist, ws.pred, method_,
+                          self.csr, ws, scale)
+        return ws.dist, ws.pred
+
+
+class Engine:
+    """ thread pool answering batches of shortest path queries on Graph graph
+    using method in SSSP_METHODS or NATIVE_METHODS
+
+    scale is the scaling factor of link lengths for dial and radix (see
+    utils.GetScaledLens()). It can be used as a context manager, which shuts
+    down the pool on exit.
+    """
+    def __init__(self, graph, method='dij', numThread=None, scale=None):
+        self.graph = graph
+        self.method = _CheckMethod(method)
+        # scale link lengths before any query rather than by each thread
+        if self.method.startswith(('dial', 'radix')):
+            _, scale = GetScaledLens(scale, graph.csr)
+        self.scale = scale
+        self.pool = ThreadPoolExecutor(numThread)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.Close()
+
+    def _QueryOrigin(self, srcNodeID, destNodeIDs):
+        dist, _ = self.graph.CalculateSSSP(srcNodeID, self.method,
+                                           set(destNodeIDs), self.scale)
+        return [dist[j] for j in destNodeIDs]
+
+    def QueryBatch(self, odPairs):
+        """ return the list of shortest path distances of odPairs, i.e., pairs
+        of user-defined node ids, which is MAX_LABEL if it is not reachable
+
+        Pairs from the same origin are answered by one SSSP, and different
+        origins are run on the threads of the pool.
+        """
+        graph = self.graph
+        groups = {}
+        for k, (o, d) in enumerate(odPairs):
+            groups.setdefault(graph.GetNodeID(o), []).append(
+                (k, graph.GetNodeID(d)))
+
+        futures = [(self.pool.submit(self._QueryOrigin, s,
+                                     [j for _, j in pairs]), pairs)
+                   for s, pairs in groups.items()]
+
+        dists = [MAX_LABEL] * len(odPairs)
+        for f, pairs in futures:
+            for (k, _), d in zip(pairs, f.result()):
+                dists[k] = d
+
+        return dists
+
+    def Close(self):
+        self.pool.shutdown()
+
+
+def _GenerateODPairs(numNode, numOrig, numPair, rng):
+    """ return numPair random pairs of internal node ids from numOrig origins
+    """
+    origs = [rng.randrange(numNode) for _ in range(numOrig)]
+    return [(rng.choice(origs), rng.randrange(numNode))
+            for _ in range(numPair)]
+
+
+def BenchmarkEngine(numPair=2000, numOrig=50, methods=('dij', 'dij-c'),
+                    numThreads=(1, 2, 4), seed=0):
+    """ compare the throughput (queries per second) of Engine.QueryBatch()
+    with the global-state path, i.e., m2malgm.CalculateOneToMany() on the
+    current network, for random OD pairs from numOrig origins
+
+    It checks that all of them give the same distances (up to a relative
+    tolerance of 1e-9) and returns the throughputs as a dict keyed by global or
+    (method, numThread).
+    """
+    rng = Random(seed)
+    pairs = _GenerateODPairs(GetNumNodes(), numOrig, numPair, rng)
+
+    st = time()
+    groups = {}
+    for k, (s, j) in enumerate(pairs):
+        groups.setdefault(s, []).append((k, j))
+    ws = SSSPWorkspace(GetNumNodes())
+    ref = [MAX_LABEL] * numPair
+    for s, pairs_ in groups.items():
+        dists = CalculateOneToMany(s, [j for _, j in pairs_], 'dij', ws=ws)
+        for (k, _), d in zip(pairs_, dists):
+            ref[k] = d
+    stats = {'global': numPair / (time() - st)}
+
+    graph = Graph.FromCurrentNetwork()
+    uidPairs = [(GetNodeUID(s), GetNodeUID(j)) for s, j in pairs]
+    for method in methods:
+        for n in numThreads:
+            with Engine(graph, method, n) as engine:
+                st = time()
+                dists = engine.QueryBatch(uidPairs)
+                stats[(method, n)] = numPair / (time() - st)
+            # scaled integer lengths of dial and radix are rounded
+            if any(a != b and ((a == MAX_LABEL) != (b == MAX_LABEL)
+                               or abs(a - b) > 1e-9 * max(b, 1))
+                   for a, b in zip(dists, ref)):
+                raise Exception('INCONSISTENT RESULTS FOUND between global '
+                                +'state and Engine ('+method+')!!')
+
+    for k, v in stats.items():
+        name = k if k == 'global' else k[0]+' x '+str(k[1])+' threads'
+        print('{0}\t: {1: .0f} queries/s'.format(name, v))
+
+    return stats
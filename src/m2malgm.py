@@ -0,0 +1,312 @@
+"""Implementations of One-to-Many and Many-to-Many Shortest Path Queries
+
+Different from APSP in spalgm.py, only the shortest path distances between
+the given origins and destinations are calculated by either
+
+    1. one search from each origin, which stops as soon as all destinations
+       are settled or a distance cutoff is exceeded, or
+    2. the bucket-based algorithm, which runs one backward search from each
+       destination and one forward search from each origin, either on the
+       network or on its Contraction Hierarchy.
+"""
+
+
+from array import array
+from random import Random
+from time import time
+import heapq
+
+from classes import SSSPWorkspace, TypedMatrix
+from spalgm import SSSP_METHODS, CalculateSSSP, CalculateSSSPDijkstraII
+from utils import MAX_LABEL, GetCSRGraph, GetNodeID, GetNodeUID, \
+                  GetNumNodes, GetReverseCSRGraph
+
+
+# maximum number of nodes settled by each backward search of
+# CalculateManyToManyBucket() without a ContractionHierarchy
+BUCKET_SEARCH_SIZE = 64
+
+
+def _CreateODMatrix(numOrig, numDest):
+    """ create a numOrig x numDest TypedMatrix of float64 in memory """
+    return TypedMatrix(numOrig, numDest, 'd',
+                       bytearray(numOrig * numDest * array('d').itemsize))
+
+
+def CalculateOneToMany(srcNodeID, destNodeIDs, method='dij',
+                       maxDist=MAX_LABEL, csr=None, ws=None):
+    """ return the list of shortest path distances from srcNodeID to each node
+    of destNodeIDs, which is MAX_LABEL if it is not reachable within maxDist
+
+    For dij, CalculateSSSPDijkstraII() stops once all of destNodeIDs are
+    settled or maxDist is exceeded. The label correcting implementations
+    (e.g., deq and fifo) cannot tell whether a distance label is final until
+    the end, and they always run to exhaustion.
+
+    ws is an optional SSSPWorkspace reused by repeated calls.
+    """
+    if csr is None:
+        csr = GetCSRGraph()
+    if ws is None:
+        ws = SSSPWorkspace(csr.numNode)
+
+    method_ = method.lower()
+    if method_.startswith('dij'):
+        CalculateSSSPDijkstraII(srcNodeID, ws.dist, ws.pred, csr, ws,
+                                set(destNodeIDs), maxDist)
+    else:
+        CalculateSSSP(srcNodeID, csr.numNode, ws.dist, ws.pred, method_, csr,
+                      ws)
+
+    dist = ws.dist
+    return [dist[j] if dist[j] <= maxDist else MAX_LABEL for j in destNodeIDs]
+
+
+def CalculateManyToMany(origNodeUIDs, destNodeUIDs, method='dij',
+                        maxDist=MAX_LABEL):
+    """ calculate the shortest path distances between two lists of
+    user-defined node ids
+
+    It returns a len(origNodeUIDs) x len(destNodeUIDs) TypedMatrix of float64,
+    where m[i][j] is the distance from origNodeUIDs[i] to destNodeUIDs[j], or
+    MAX_LABEL if it is not reachable within maxDist.
+
+    Please choose one of the implementations in SSSP_METHODS. See
+    CalculateOneToMany() for early termination.
+    """
+    method_ = method.lower()
+    if not method_.startswith(SSSP_METHODS):
+        raise Exception('Please choose correct shortest path algorithm: '
+                        +'; '.join(SSSP_METHODS)+'.')
+
+    st = time()
+
+    origNodeIDs = [GetNodeID(x) for x in origNodeUIDs]
+    destNodeIDs = [GetNodeID(x) for x in destNodeUIDs]
+    numOrig = len(origNodeIDs)
+    numDest = len(destNodeIDs)
+    m = _CreateODMatrix(numOrig, numDest)
+
+    csr = GetCSRGraph()
+    ws = SSSPWorkspace(csr.numNode)
+    for i, s in enumerate(origNodeIDs):
+        m.SetRow(i, CalculateOneToMany(s, destNodeIDs, method_, maxDist, csr,
+                                       ws))
+
+    print('Processing time for {0} x {1} OD matrix\t: {2: .2f}'
+          .format(numOrig, numDest, time() - st)+' s.')
+
+    return m
+
+
+def _SearchBackward(t, destNodeID, csrRev, maxSettled, maxDist, buckets):
+    """ Dijkstra's algorithm from destNodeID on the reverse network csrRev,
+    which adds (t, d) to the bucket of each labeled node v within maxDist,
+    where d is the length of a path from v to destNodeID
+
+    It stops once maxSettled nodes are settled (never if it is None) or the
+    minimum distance label exceeds maxDist, and returns the radius of the
+    search, i.e., the minimum distance label of the nodes not settled
+    (MAX_LABEL if all reachable ones are settled). The distances to
+    destNodeID are exact for the settled nodes and no less than the radius
+    for the others.
+    """
+    dist = {destNodeID: 0}
+    selist = [(0, destNodeID)]
+    numSettled = 0
+    radius = MAX_LABEL
+    while selist:
+        (k, i) = heapq.heappop(selist)
+        if k > dist[i]:
+            continue
+        if k > maxDist or numSettled == maxSettled:
+            radius = k
+            break
+        numSettled += 1
+        for p in range(csrRev.offsets[i], csrRev.offsets[i+1]):
+            j = csrRev.heads[p]
+            if dist.get(j, MAX_LABEL) > k + csrRev.lens[p]:
+                dist[j] = k + csrRev.lens[p]
+                heapq.heappush(selist, (dist[j], j))
+
+    for v, d in dist.items():
+        if d <= maxDist:
+            buckets.setdefault(v, []).append((t, d))
+
+    return radius
+
+
+def _SearchForward(srcNodeID, csr, buckets, radii, maxDist, dist):
+    """ Dijkstra's algorithm from srcNodeID scanning the bucket of each
+    settled node, which returns the list of distances to the destinations of
+    _SearchBackward() indexed by t
+
+    Let u be the last node not settled by the backward search of t on the
+    shortest path from srcNodeID to t. The bucket entry of u is then exact
+    and no less than radii[t]. Therefore, the distance to t is final once all
+    nodes within row[t] - radii[t] are settled, where row[t] is the distance
+    found so far, and the search stops when it holds for all destinations.
+    The distance to t is final after the bucket of srcNodeID is scanned if
+    the backward search of t is exhaustive.
+
+    dist is a list of MAX_LABEL indexed by node id, which is restored before
+    it returns.
+    """
+    numDest = len(radii)
+    row = [MAX_LABEL] * numDest
+    done = [r == MAX_LABEL for r in radii]
+    numLeft = done.count(False)
+    # (row[t] - radii[t], t) for each row[t] updated
+    bounds = []
+    dist[srcNodeID] = 0
+    touched = [srcNodeID]
+    selist = [(0, srcNodeID)]
+    while selist:
+        (k, i) = heapq.heappop(selist)
+        if k > dist[i]:
+            continue
+        if k > maxDist:
+            break
+        for t, d in buckets.get(i, ()):
+            if row[t] > k + d:
+                row[t] = k + d
+                heapq.heappush(bounds, (row[t] - radii[t], t))
+        # all nodes with distance labels less than k are settled
+        while bounds and bounds[0][0] < k:
+            t = heapq.heappop(bounds)[1]
+            if not done[t]:
+                done[t] = True
+                numLeft -= 1
+        if not numLeft:
+            break
+        for p in range(csr.offsets[i], csr.offsets[i+1]):
+            j = csr.heads[p]
+            if dist[j] > k + csr.lens[p]:
+                if dist[j] == MAX_LABEL:
+                    touched.append(j)
+                dist[j] = k + csr.lens[p]
+                heapq.heappush(selist, (dist[j], j))
+
+    for j in touched:
+        dist[j] = MAX_LABEL
+
+    return row
+
+
+def CalculateManyToManyBucket(origNodeUIDs, destNodeUIDs, ch=None,
+                              maxDist=MAX_LABEL,
+                              maxSettled=BUCKET_SEARCH_SIZE):
+    """ bucket-based many-to-many shortest path distances
+
+    It follows Knopp et al. (2007).
+        1. A backward search from each destination t on the reverse network
+           stores (t, d) in the bucket of each labeled node v, where d is the
+           length of a path from v to t.
+        2. A forward search from each origin s scans the bucket of each
+           settled node v, and the distance from s to t is the minimum of
+           d(s, v) + d over all v with t in its bucket.
+
+    Without ch, both searches run on the CSR graph and its reverse. Each
+    backward search settles at most maxSettled nodes (all of them if it is
+    None), and each forward search stops as soon as the buckets have given
+    all distances from s (see _SearchForward()). Larger backward searches
+    make the forward ones shorter.
+
+    If ch is a ContractionHierarchy, both searches only go upward (on
+    ch.upGraph and ch.downGraph) and run to exhaustion, which meet at the
+    highest node on each shortest path. Their search spaces and buckets are
+    therefore tiny.
+
+    Both searches stop at maxDist, as neither half of a shortest path within
+    maxDist can exceed it. The returned matrix is the same as
+    CalculateManyToMany(origNodeUIDs, destNodeUIDs, 'dij', maxDist).
+    """
+    st = time()
+
+    origNodeIDs = [GetNodeID(x) for x in origNodeUIDs]
+    destNodeIDs = [GetNodeID(x) for x in destNodeUIDs]
+    numOrig = len(origNodeIDs)
+    numDest = len(destNodeIDs)
+    m = _CreateODMatrix(numOrig, numDest)
+
+    # buckets of the nodes labeled by any backward search
+    buckets = {}
+    if ch is None:
+        csr = GetCSRGraph()
+        csrRev = GetReverseCSRGraph()
+        radii = [_SearchBackward(t, j, csrRev, maxSettled, maxDist, buckets)
+                 for t, j in enumerate(destNodeIDs)]
+        dist = [MAX_LABEL] * csr.numNode
+    else:
+        ws = SSSPWorkspace(ch.upGraph.numNode)
+        dist = ws.dist
+        for t, j in enumerate(destNodeIDs):
+            CalculateSSSPDijkstraII(j, dist, ws.pred, ch.downGraph, ws, (),
+                                    maxDist)
+            # labeled nodes within maxDist are all settled
+            for v in ws.touched:
+                if dist[v] <= maxDist:
+                    buckets.setdefault(v, []).append((t, dist[v]))
+
+    numEntry = sum(len(b) for b in buckets.values())
+    for i, s in enumerate(origNodeIDs):
+        if ch is None:
+            row = _SearchForward(s, csr, buckets, radii, maxDist, dist)
+        else:
+            row = [MAX_LABEL] * numDest
+            CalculateSSSPDijkstraII(s, dist, ws.pred, ch.upGraph, ws, (),
+                                    maxDist)
+            for v in ws.touched:
+                k = dist[v]
+                if k > maxDist:
+                    continue
+                for t, d in buckets.get(v, ()):
+                    if row[t] > k + d:
+                        row[t] = k + d
+        m.SetRow(i, [d if d <= maxDist else MAX_LABEL for d in row])
+
+    print('Processing time for {0} x {1} OD matrix (bucket)\t: {2: .2f}'
+          .format(numOrig, numDest, time() - st)+' s.')
+    print('Number of bucket entries\t: '+str(numEntry))
+
+    return m
+
+
+def BenchmarkManyToMany(sizes=(10, 100, 500), ch=None, maxDist=MAX_LABEL,
+                        seed=0):
+    """ compare CalculateManyToMany() with CalculateManyToManyBucket() on
+    random n x n OD matrices for each n in sizes
+
+    The bucket-based one is run on the CSR graphs and also with ch if it is
+    given. It checks that all of them give the same distances within maxDist
+    and returns their running times as a dict keyed by n, each of which is a
+    dict keyed by plain, bucket, and bucket-ch.
+    """
+    names = ['bucket'] + ([] if ch is None else ['bucket-ch'])
+    numNode = GetNumNodes()
+    rng = Random(seed)
+    times = {}
+    for n in sizes:
+        origs = [GetNodeUID(rng.randrange(numNode)) for _ in range(n)]
+        dests = [GetNodeUID(rng.randrange(numNode)) for _ in range(n)]
+
+        st = time()
+        ref = CalculateManyToMany(origs, dests, maxDist=maxDist)
+        times[n] = {'plain': time() - st}
+        for name in names:
+            st = time()
+            m = CalculateManyToManyBucket(origs, dests,
+                                          ch if name == 'bucket-ch' else None,
+                                          maxDist)
+            times[n][name] = time() - st
+            for i in range(n):
+                for j in range(n):
+                    if abs(m[i][j] - ref[i][j]) > 1e-9 * max(ref[i][j], 1):
+                        raise Exception('INCONSISTENT DISTANCE FOUND from '
+                                        +origs[i]+' to '+dests[j]+'!!')
+
+        print('OD matrix '+str(n)+' x '+str(n)+'\t: '
+              +'; '.join('{0} {1:.2f} s'.format(k, t)
+                         for k, t in times[n].items()))
+
+    return times
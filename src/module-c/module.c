@@ -1,12 +1,18 @@
 /*
 special implemenation of deque using array in C with C/C++ extension modules for CPython
 
+native SSSP kernels, i.e., deque implementation of MLC and Dijkstra's algorithm
+using binary heap, over CSR arrays passed through the buffer protocol
+
 07/24/20, Peiheng Li (jdlph@hotmail.com)
 */
 
 
+#define PY_SSIZE_T_CLEAN
 #include <Python.h>
 #include <structmember.h>
+#include <math.h>
+#include <string.h>
 
 typedef struct {
     PyObject_HEAD
@@ -31,9 +37,22 @@ DequeC_init(DequeC *self, PyObject *args, PyObject *kwds)
 {
     int size_;
     if (!PyArg_ParseTuple(args, "i", &size_))
-        return NULL;
+        return -1;
+
+    if (size_<0)
+    {
+        PyErr_SetString(PyExc_ValueError, "size of DequeC must be non-negative");
+        return -1;
+    }
 
-    self->elem = (int *)malloc(sizeof(int)*size_);
+    /* __init__() might be called more than once */
+    PyMem_Free(self->elem);
+    self->elem = (int *)PyMem_Malloc(sizeof(int)*(size_ ? size_ : 1));
+    if (self->elem==NULL)
+    {
+        PyErr_NoMemory();
+        return -1;
+    }
     self->head = -1;
     self->tail = -1;
 
@@ -43,20 +62,27 @@ DequeC_init(DequeC *self, PyObject *args, PyObject *kwds)
 static PyObject *
 DequeC_appendleft(DequeC *self, PyObject *nodeID)
 {
-    int nodeID_ = _PyLong_AsInt(nodeID);
-    self->elem[nodeID_] = self->head;
-    self->head = nodeID_;
+    int nodeID_ = (int)PyLong_AsLong(nodeID);
+    if (nodeID_==-1 && PyErr_Occurred())
+        return NULL;
 
+    /* check it before head is overwritten */
     if (self->head==-1)
         self->tail = nodeID_;
 
+    self->elem[nodeID_] = self->head;
+    self->head = nodeID_;
+
     Py_RETURN_NONE;
 }
 
 static PyObject *
 DequeC_append(DequeC *self, PyObject *nodeID)
 {
-    int nodeID_ = PyLong_AsLong(nodeID);
+    int nodeID_ = (int)PyLong_AsLong(nodeID);
+    if (nodeID_==-1 && PyErr_Occurred())
+        return NULL;
+
     if (self->head==-1)
     {
         self->head = nodeID_;
@@ -98,6 +124,7 @@ DequeC_clear(DequeC *self)
 static void
 DequeC_dealloc(DequeC *self)
 {
+    PyMem_Free(self->elem);
     Py_TYPE(self)->tp_free((PyObject *)self);
 }
 
@@ -120,7 +147,6 @@ static PyMethodDef DequeC_methods[] = {
     {"appendleft", (PyCFunction)DequeC_appendleft, METH_O, "append a new node from front"},
     {"popleft", (PyCFunction)DequeC_popleft, METH_NOARGS, "pop the first node in DequeC and return its index"},
     {"clear", (PyCFunction)DequeC_clear, METH_NOARGS, "clear the DequeC for new use but not release the memory"},
-    {"dealloc", (PyCFunction)DequeC_dealloc, METH_NOARGS, "destruct the DequeC object and release the momory"},
     {NULL} /* Sentinel */
 };
 
@@ -165,13 +191,382 @@ static PyTypeObject ClassyType = {
     DequeC_new,                               /* tp_new */
 };
 
+/* native SSSP kernels */
+
+/* get a C-contiguous one-dimensional buffer of type i (int) or d (double) */
+static int
+get_buffer(PyObject *obj, Py_buffer *view, char type, int writable, const char *name)
+{
+    const char *f;
+    size_t len;
+    Py_ssize_t itemsize = type=='i' ? sizeof(int) : sizeof(double);
+    int flags = PyBUF_FORMAT | PyBUF_C_CONTIGUOUS;
+    if (writable)
+        flags |= PyBUF_WRITABLE;
+
+    if (PyObject_GetBuffer(obj, view, flags) < 0)
+        return -1;
+
+    f = view->format;
+    len = strlen(f);
+    /* native byte order only */
+    if (view->ndim>1 || view->itemsize!=itemsize || len==0 || f[len-1]!=type
+        || (len==2 && f[0]!='@' && f[0]!='=' && !(f[0]=='<' && PY_LITTLE_ENDIAN))
+        || len>2)
+    {
+        PyErr_Format(PyExc_TypeError, "%s must be a buffer of type '%c'", name, type);
+        PyBuffer_Release(view);
+        return -1;
+    }
+
+    return 0;
+}
+
+typedef struct {
+    Py_buffer offsets;
+    Py_buffer heads;
+    Py_buffer lens;
+    Py_buffer dist;
+    Py_buffer pred;
+    int numNode;
+    int numLink;
+} SSSPArgs;
+
+static void
+release_sssp_args(SSSPArgs *a)
+{
+    PyBuffer_Release(&a->offsets);
+    PyBuffer_Release(&a->heads);
+    PyBuffer_Release(&a->lens);
+    PyBuffer_Release(&a->dist);
+    PyBuffer_Release(&a->pred);
+}
+
+/*
+check CSR arrays offsets and heads of n nodes and m links, i.e., offsets has
+n + 1 nondecreasing elements from 0 to m and each head is a node
+
+It is O(n + m) and only needed once for each graph as the topology never
+changes. The kernels trust the arrays checked by it (see parse_sssp_args()).
+*/
+static PyObject *
+check_csr(PyObject *self, PyObject *args)
+{
+    PyObject *offsets, *heads;
+    Py_buffer offsets_, heads_;
+    const int *o, *h;
+    Py_ssize_t n, m, i;
+
+    if (!PyArg_ParseTuple(args, "OO", &offsets, &heads))
+        return NULL;
+
+    if (get_buffer(offsets, &offsets_, 'i', 0, "offsets") < 0)
+        return NULL;
+    if (get_buffer(heads, &heads_, 'i', 0, "heads") < 0)
+    {
+        PyBuffer_Release(&offsets_);
+        return NULL;
+    }
+
+    n = offsets_.len / sizeof(int) - 1;
+    m = heads_.len / sizeof(int);
+    o = (const int *)offsets_.buf;
+    h = (const int *)heads_.buf;
+    if (n<0 || n>INT_MAX || m>INT_MAX || o[0]!=0 || o[n]!=m)
+    {
+        PyErr_SetString(PyExc_ValueError, "INVALID offsets");
+        goto error;
+    }
+    for (i=0; i<n; ++i)
+    {
+        if (o[i]>o[i+1])
+        {
+            PyErr_SetString(PyExc_ValueError, "INVALID offsets");
+            goto error;
+        }
+    }
+    for (i=0; i<m; ++i)
+    {
+        if (h[i]<0 || h[i]>=n)
+        {
+            PyErr_SetString(PyExc_ValueError, "INVALID heads");
+            goto error;
+        }
+    }
+
+    PyBuffer_Release(&offsets_);
+    PyBuffer_Release(&heads_);
+    Py_RETURN_NONE;
+
+error:
+    PyBuffer_Release(&offsets_);
+    PyBuffer_Release(&heads_);
+    return NULL;
+}
+
+/*
+parse (srcNodeID, offsets, heads, lens, dist, pred) with O(1) checks on their
+types and sizes, where offsets and heads must have been checked by check_csr()
+*/
+static int
+parse_sssp_args(PyObject *args, int *srcNodeID, SSSPArgs *a)
+{
+    PyObject *offsets, *heads, *lens, *dist, *pred;
+    Py_ssize_t n, m;
+
+    memset(a, 0, sizeof(SSSPArgs));
+    if (!PyArg_ParseTuple(args, "iOOOOO", srcNodeID, &offsets, &heads, &lens, &dist, &pred))
+        return -1;
+
+    if (get_buffer(offsets, &a->offsets, 'i', 0, "offsets") < 0
+        || get_buffer(heads, &a->heads, 'i', 0, "heads") < 0
+        || get_buffer(lens, &a->lens, 'd', 0, "lens") < 0
+        || get_buffer(dist, &a->dist, 'd', 1, "dist") < 0
+        || get_buffer(pred, &a->pred, 'i', 1, "pred") < 0)
+    {
+        release_sssp_args(a);
+        return -1;
+    }
+
+    n = a->offsets.len / sizeof(int) - 1;
+    m = a->heads.len / sizeof(int);
+    if (n<0 || n>INT_MAX || m>INT_MAX || a->lens.len/(Py_ssize_t)sizeof(double)!=m
+        || a->dist.len/(Py_ssize_t)sizeof(double)<n || a->pred.len/(Py_ssize_t)sizeof(int)<n
+        || ((const int *)a->offsets.buf)[n]!=m)
+    {
+        PyErr_SetString(PyExc_ValueError, "INCONSISTENT SIZES of CSR ARRAYS, dist, and pred");
+        release_sssp_args(a);
+        return -1;
+    }
+
+    if (*srcNodeID<0 || *srcNodeID>=n)
+    {
+        PyErr_Format(PyExc_ValueError, "NODE %d NOT EXIST", *srcNodeID);
+        release_sssp_args(a);
+        return -1;
+    }
+
+    a->numNode = (int)n;
+    a->numLink = (int)m;
+    return 0;
+}
+
+/*
+deque implementation of MLC, the same as CalculateSSSPDEQIII() in spalgm.py
+
+nodes[i] is -1 if node i has never been in deque, -3 if it was in deque before,
+and the next node in deque (or -1 for the tail) otherwise
+*/
+static void
+calculate_sssp_deq(int srcNodeID, const int *offsets, const int *heads,
+                   const double *lens, double *dist, int *pred, int *nodes,
+                   int numNode)
+{
+    int head, tail, i, j, k;
+
+    for (i=0; i<numNode; ++i)
+    {
+        dist[i] = Py_HUGE_VAL;
+        pred[i] = -1;
+        nodes[i] = -1;
+    }
+
+    dist[srcNodeID] = 0;
+    head = srcNodeID;
+    tail = srcNodeID;
+    while (head!=-1)
+    {
+        i = head;
+        head = nodes[i];
+        nodes[i] = -3;
+        for (k=offsets[i]; k<offsets[i+1]; ++k)
+        {
+            j = heads[k];
+            if (dist[j] > dist[i] + lens[k])
+            {
+                dist[j] = dist[i] + lens[k];
+                pred[j] = i;
+                if (nodes[j]==-3)
+                {
+                    /* appendleft */
+                    if (head==-1)
+                        tail = j;
+                    nodes[j] = head;
+                    head = j;
+                }
+                else if (nodes[j]==-1 && j!=tail)
+                {
+                    /* append */
+                    if (head==-1)
+                        head = j;
+                    else
+                        nodes[tail] = j;
+                    nodes[j] = -1;
+                    tail = j;
+                }
+            }
+        }
+    }
+}
+
+typedef struct {
+    double key;
+    int nodeID;
+} HeapEntry;
+
+/* the same order as tuple (key, nodeID) in heapq */
+#define ENTRY_LESS(a, b) ((a).key<(b).key || ((a).key==(b).key && (a).nodeID<(b).nodeID))
+
+/*
+Dijkstra's algorithm using binary heap without decrease-key, the same as
+CalculateSSSPDijkstraII() in spalgm.py
+
+Entries are popped in exactly the same order as heapq as both follow the order
+of (key, nodeID), i.e., ties are broken in the same way. Each node is settled
+once if lens are nonnegative, and each link pushes at most one entry then,
+i.e., there are no more than numLink + 1 entries at any time.
+
+It returns -1 if the heap of numLink + 1 entries would overflow, which only
+happens with negative lens, or 0 otherwise.
+*/
+static int
+calculate_sssp_dijkstra(int srcNodeID, const int *offsets, const int *heads,
+                        const double *lens, double *dist, int *pred,
+                        HeapEntry *heap, int numNode, int numLink)
+{
+    int size_ = 0, i, j, k, p, c;
+    double key;
+    HeapEntry e;
+
+    for (i=0; i<numNode; ++i)
+    {
+        dist[i] = Py_HUGE_VAL;
+        pred[i] = -1;
+    }
+
+    dist[srcNodeID] = 0;
+    heap[size_].key = 0;
+    heap[size_++].nodeID = srcNodeID;
+    while (size_)
+    {
+        /* pop */
+        key = heap[0].key;
+        i = heap[0].nodeID;
+        e = heap[--size_];
+        for (p=0; (c=2*p+1)<size_; p=c)
+        {
+            if (c+1<size_ && ENTRY_LESS(heap[c+1], heap[c]))
+                ++c;
+            if (!ENTRY_LESS(heap[c], e))
+                break;
+            heap[p] = heap[c];
+        }
+        heap[p] = e;
+
+        if (key > dist[i])
+            continue;
+
+        for (k=offsets[i]; k<offsets[i+1]; ++k)
+        {
+            j = heads[k];
+            if (dist[j] > key + lens[k])
+            {
+                dist[j] = key + lens[k];
+                pred[j] = i;
+                /* push */
+                if (size_>numLink)
+                    return -1;
+                e.key = dist[j];
+                e.nodeID = j;
+                for (p=size_++; p>0 && ENTRY_LESS(e, heap[(p-1)/2]); p=(p-1)/2)
+                    heap[p] = heap[(p-1)/2];
+                heap[p] = e;
+            }
+        }
+    }
+
+    return 0;
+}
+
+static PyObject *
+sssp_deq(PyObject *self, PyObject *args)
+{
+    SSSPArgs a;
+    int srcNodeID;
+    int *nodes;
+
+    if (parse_sssp_args(args, &srcNodeID, &a) < 0)
+        return NULL;
+
+    nodes = (int *)PyMem_RawMalloc(sizeof(int)*a.numNode);
+    if (nodes==NULL)
+    {
+        release_sssp_args(&a);
+        return PyErr_NoMemory();
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    calculate_sssp_deq(srcNodeID, (const int *)a.offsets.buf, (const int *)a.heads.buf,
+                       (const double *)a.lens.buf, (double *)a.dist.buf, (int *)a.pred.buf,
+                       nodes, a.numNode);
+    Py_END_ALLOW_THREADS
+
+    PyMem_RawFree(nodes);
+    release_sssp_args(&a);
+    Py_RETURN_NONE;
+}
+
+static PyObject *
+sssp_dijkstra(PyObject *self, PyObject *args)
+{
+    SSSPArgs a;
+    int srcNodeID;
+    HeapEntry *heap;
+    int ret;
+
+    if (parse_sssp_args(args, &srcNodeID, &a) < 0)
+        return NULL;
+
+    heap = (HeapEntry *)PyMem_RawMalloc(sizeof(HeapEntry)*((size_t)a.numLink+1));
+    if (heap==NULL)
+    {
+        release_sssp_args(&a);
+        return PyErr_NoMemory();
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    ret = calculate_sssp_dijkstra(srcNodeID, (const int *)a.offsets.buf, (const int *)a.heads.buf,
+                                  (const double *)a.lens.buf, (double *)a.dist.buf, (int *)a.pred.buf,
+                                  heap, a.numNode, a.numLink);
+    Py_END_ALLOW_THREADS
+
+    PyMem_RawFree(heap);
+    release_sssp_args(&a);
+    if (ret < 0)
+    {
+        PyErr_SetString(PyExc_ValueError, "NEGATIVE LINK LENGTH FOUND");
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef SimpleDequeC_methods[] = {
+    {"check_csr", (PyCFunction)check_csr, METH_VARARGS,
+     "check_csr(offsets, heads): check CSR arrays once for the native SSSP kernels"},
+    {"sssp_deq", (PyCFunction)sssp_deq, METH_VARARGS,
+     "sssp_deq(srcNodeID, offsets, heads, lens, dist, pred): deque implementation of MLC"},
+    {"sssp_dijkstra", (PyCFunction)sssp_dijkstra, METH_VARARGS,
+     "sssp_dijkstra(srcNodeID, offsets, heads, lens, dist, pred): Dijkstra's algorithm using binary heap"},
+    {NULL} /* Sentinel */
+};
+
 /* this defines the module name, which should match the one in setup.py */
 static struct PyModuleDef SimpleDequeCmodule = {
     PyModuleDef_HEAD_INIT,
     "SimpleDequeC",
-    "SimpleDeque module containing DequeC class",
+    "SimpleDeque module containing DequeC class and native SSSP kernels",
     -1,
-    DequeC_methods,
+    SimpleDequeC_methods,
     NULL,
 };
 
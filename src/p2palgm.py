@@ -0,0 +1,627 @@
+"""Implementations of Point-to-Point Shortest Path Algorithms including:
+
+    1. A* Search using node coordinates
+    2. Bidirectional Dijkstra's Algorithm
+    3. ALT (A* Search using Landmarks and Triangle inequality)
+
+Different from the SSSP implementations in spalgm.py, each of them stops as
+soon as the destination node is settled.
+"""
+
+
+from array import array
+from multiprocessing import Pool
+from random import Random
+from time import time
+import heapq
+import struct
+
+from classes import Landmarks, TypedMatrix
+from spalgm import CalculateSSSP, CalculateSSSPDijkstraII
+from utils import MAX_LABEL, GetCSRGraph, GetEuclideanDist, \
+                  GetHaversineDist, GetHeuristicScale, GetNetworkFingerprint, \
+                  GetNodeCoords, GetNodeID, GetNodePath, GetNodeUID, \
+                  GetNumNodes, GetReverseCSRGraph
+
+
+# header of the landmark file: magic, version, number of landmarks, number of
+# nodes, and network fingerprint, which is followed by node ids of landmarks
+# (int32), distFrom, and distTo (both float64) in row order
+LANDMARK_FILE_HEADER = struct.Struct('<4sIII40s')
+LANDMARK_FILE_MAGIC = b'ALT\0'
+LANDMARK_FILE_VERSION = 1
+
+
+def GetHeuristic(destNodeID, heuristic='euclidean'):
+    """ return the admissible heuristic function h(i) of destNodeID
+
+    h(i) is the scaled coordinate distance from node i to destNodeID, which is
+    a lower bound of the shortest path distance from node i to destNodeID. See
+    GetHeuristicScale() for details.
+    """
+    scale = GetHeuristicScale(heuristic)
+    if heuristic.lower().startswith('euc'):
+        distFunc = GetEuclideanDist
+    else:
+        distFunc = GetHaversineDist
+
+    x, y = GetNodeCoords()
+    xd = x[destNodeID]
+    yd = y[destNodeID]
+
+    def h(i):
+        return scale * distFunc(x[i], y[i], xd, yd)
+
+    return h
+
+
+def CalculateP2PAStar(srcNodeID, destNodeID, numNode, dist, pred, h,
+                      csr=None):
+    """ A* Search using heap
+
+    It is the same as CalculateSSSPDijkstraII() except that nodes are popped
+    by dist[i] + h(i) rather than dist[i]. As h is consistent, a node is
+    never improved once it is settled (popped for the first time), and the
+    search stops right after destNodeID is settled.
+
+    Outdated entries in the heap are skipped through the status array.
+
+    It returns the number of settled nodes.
+    """
+    if csr is None:
+        csr = GetCSRGraph()
+    offsets, heads, lens = csr.GetArrays()
+
+    status = [0] * numNode
+    numSettled = 0
+    dist[srcNodeID] = 0
+    # heap
+    selist = []
+    heapq.heappush(selist, (h(srcNodeID), srcNodeID))
+    # label setting
+    while selist:
+        i = heapq.heappop(selist)[1]
+        if status[i]:
+            continue
+        status[i] = 1
+        numSettled += 1
+        if i == destNodeID:
+            break
+        for k in range(offsets[i], offsets[i+1]):
+            j = heads[k]
+            if dist[j] > dist[i] + lens[k]:
+                dist[j] = dist[i] + lens[k]
+                pred[j] = i
+                heapq.heappush(selist, (dist[j] + h(j), j))
+
+    return numSettled
+
+
+def FindShortestPathAStar(origNodeUID, destNodeUID, heuristic='euclidean'):
+    """ find the shortest path between two user-defined node ids using A*
+
+    heuristic is either euclidean or haversine. Use haversine if coordinates
+    are longitudes and latitudes.
+
+    It returns the shortest path distance and the list of user-defined node
+    ids on the path, which are MAX_LABEL and an empty list if destNodeUID is
+    not reachable.
+    """
+    srcNodeID = GetNodeID(origNodeUID)
+    destNodeID = GetNodeID(destNodeUID)
+    numNode = GetNumNodes()
+
+    dist = [MAX_LABEL] * numNode
+    pred = [-1] * numNode
+    h = GetHeuristic(destNodeID, heuristic)
+    CalculateP2PAStar(srcNodeID, destNodeID, numNode, dist, pred, h)
+
+    path = GetNodePath(srcNodeID, destNodeID, pred)
+    return dist[destNodeID], [GetNodeUID(i) for i in path]
+
+
+def _SettleNextNode(selist, status, dist, pred, distOther, csrArrays):
+    """ settle the node with the minimum distance label from selist and
+    relax its links for CalculateP2PBiDijkstra()
+
+    It returns the shortest distance of all paths through the relaxed links
+    that have been reached by the search from the other direction (with
+    distance labels distOther) and the node where the two searches meet.
+    """
+    mu = MAX_LABEL
+    meetNodeID = -1
+    (k, i) = heapq.heappop(selist)
+    if status[i]:
+        return mu, meetNodeID
+
+    status[i] = 1
+    offsets, heads, lens = csrArrays
+    for p in range(offsets[i], offsets[i+1]):
+        j = heads[p]
+        if dist[j] > k + lens[p]:
+            dist[j] = k + lens[p]
+            pred[j] = i
+            heapq.heappush(selist, (dist[j], j))
+            if dist[j] + distOther[j] < mu:
+                mu = dist[j] + distOther[j]
+                meetNodeID = j
+
+    return mu, meetNodeID
+
+
+def CalculateP2PBiDijkstra(srcNodeID, destNodeID, numNode, distF, predF,
+                           distB, predB, csr=None, csrRev=None):
+    """ Bidirectional Dijkstra's Algorithm using heap
+
+    The forward search from srcNodeID on csr and the backward search from
+    destNodeID on csrRev (the reverse network) settle nodes in turn. mu, the
+    length of the shortest path found so far, is updated whenever a node is
+    reached by both searches. The standard stopping criterion is applied,
+    i.e., the search stops once the sum of the minimum keys of the two heaps
+    is no less than mu, as no other path can be shorter.
+
+    Note that predB[i] is the next node of i on the path to destNodeID.
+
+    It returns mu, the node where the two searches meet (-1 if destNodeID is
+    not reachable), and the number of settled nodes.
+    """
+    if csr is None:
+        csr = GetCSRGraph()
+    if csrRev is None:
+        csrRev = GetReverseCSRGraph()
+    csrArraysF = csr.GetArrays()
+    csrArraysB = csrRev.GetArrays()
+
+    statusF = [0] * numNode
+    statusB = [0] * numNode
+    distF[srcNodeID] = 0
+    distB[destNodeID] = 0
+    selistF = [(0, srcNodeID)]
+    selistB = [(0, destNodeID)]
+
+    if srcNodeID == destNodeID:
+        return 0, srcNodeID, 0
+
+    mu = MAX_LABEL
+    meetNodeID = -1
+    forward = False
+    while selistF and selistB:
+        if selistF[0][0] + selistB[0][0] >= mu:
+            break
+        forward = not forward
+        if forward:
+            mu_, i = _SettleNextNode(selistF, statusF, distF, predF, distB,
+                                     csrArraysF)
+        else:
+            mu_, i = _SettleNextNode(selistB, statusB, distB, predB, distF,
+                                     csrArraysB)
+        if mu_ < mu:
+            mu = mu_
+            meetNodeID = i
+
+    return mu, meetNodeID, sum(statusF) + sum(statusB)
+
+
+def FindShortestPathBiDijkstra(origNodeUID, destNodeUID):
+    """ find the shortest path between two user-defined node ids using
+    bidirectional Dijkstra's algorithm
+
+    It returns the shortest path distance and the list of user-defined node
+    ids on the path, which are MAX_LABEL and an empty list if destNodeUID is
+    not reachable.
+    """
+    srcNodeID = GetNodeID(origNodeUID)
+    destNodeID = GetNodeID(destNodeUID)
+    numNode = GetNumNodes()
+
+    distF = [MAX_LABEL] * numNode
+    predF = [-1] * numNode
+    distB = [MAX_LABEL] * numNode
+    predB = [-1] * numNode
+    mu, meetNodeID, _ = CalculateP2PBiDijkstra(srcNodeID, destNodeID, numNode,
+                                               distF, predF, distB, predB)
+    if meetNodeID == -1:
+        return mu, []
+
+    path = GetNodePath(srcNodeID, meetNodeID, predF)
+    i = meetNodeID
+    while i != destNodeID:
+        i = predB[i]
+        path.append(i)
+
+    return mu, [GetNodeUID(i) for i in path]
+
+
+def _CalculateSSSPDist(srcNodeID, numNode, method, csr):
+    """ return the distance labels from srcNodeID on csr """
+    dist = [MAX_LABEL] * numNode
+    pred = [-1] * numNode
+    CalculateSSSP(srcNodeID, numNode, dist, pred, method, csr)
+    return dist
+
+
+def _SelectLandmarksFarthest(k, method, rng):
+    """ select k landmarks one by one, each of which is the reachable node
+    farthest from all the selected ones
+
+    The first one is the farthest node from a random node. It returns the
+    landmarks and the distance labels from each of them.
+    """
+    csr = GetCSRGraph()
+    numNode = csr.numNode
+    dist = _CalculateSSSPDist(rng.randrange(numNode), numNode, method, csr)
+    nodeIDs = []
+    distFrom = []
+    while len(nodeIDs) < k:
+        # unreachable nodes are never selected
+        candidates = [i for i in range(numNode)
+                      if dist[i] < MAX_LABEL and i not in nodeIDs]
+        if not candidates:
+            break
+        l = max(candidates, key=dist.__getitem__)
+        nodeIDs.append(l)
+        distL = _CalculateSSSPDist(l, numNode, method, csr)
+        distFrom.append(distL)
+        if len(nodeIDs) == 1:
+            dist = distL
+        else:
+            dist = [min(a, b) for a, b in zip(dist, distL)]
+
+    return nodeIDs, distFrom
+
+
+def _SelectLandmarksAvoid(k, method, rng):
+    """ select k landmarks one by one using the avoid strategy by Goldberg and
+    Werneck
+
+    For a random root r, the weight of each node i is the gap between its
+    shortest path distance from r and the lower bound given by the selected
+    landmarks. On the shortest path tree from r, the subtree with the largest
+    total weight (and no landmark) is followed from r down to a leaf, which
+    becomes the next landmark, as the nodes in this subtree are poorly
+    covered by the existing landmarks.
+
+    It returns the landmarks and the distance labels from each of them.
+    """
+    csr = GetCSRGraph()
+    numNode = csr.numNode
+    # every node can be a landmark at most once, and a root that is not a
+    # landmark always gives one then
+    k = min(k, numNode)
+    nodeIDs = []
+    distFrom = []
+    while len(nodeIDs) < k:
+        r = rng.randrange(numNode)
+        dist = [MAX_LABEL] * numNode
+        pred = [-1] * numNode
+        CalculateSSSP(r, numNode, dist, pred, method, csr)
+
+        reached = sorted((i for i in range(numNode) if dist[i] < MAX_LABEL),
+                         key=dist.__getitem__, reverse=True)
+        children = [[] for _ in range(numNode)]
+        for i in reached:
+            if i != r:
+                children[pred[i]].append(i)
+
+        # accumulate subtree weights from leaves upward
+        size_ = [0] * numNode
+        for i in reached:
+            if i in nodeIDs:
+                size_[i] = -1
+                continue
+            if any(size_[j] == -1 for j in children[i]):
+                size_[i] = -1
+                continue
+            lb = max([0] + [d[i] - d[r] for d in distFrom
+                            if d[i] < MAX_LABEL and d[r] < MAX_LABEL])
+            size_[i] = dist[i] - lb + sum(size_[j] for j in children[i])
+
+        i = r
+        while True:
+            candidates = [j for j in children[i] if size_[j] != -1]
+            if not candidates:
+                break
+            i = max(candidates, key=size_.__getitem__)
+        if size_[i] == -1:
+            # every subtree of r has a landmark
+            candidates = [j for j in reached if j not in nodeIDs]
+            if not candidates:
+                continue
+            i = rng.choice(candidates)
+
+        nodeIDs.append(i)
+        distFrom.append(_CalculateSSSPDist(i, numNode, method, csr))
+
+    return nodeIDs, distFrom
+
+
+# states of each worker process for BuildLandmarks()
+_worker = {}
+
+
+def _InitLandmarkWorker(csrRev, method):
+    _worker['csrRev'] = csrRev
+    _worker['method'] = method
+
+
+def _CalculateLandmarkDistTo(nodeID):
+    """ return the distance labels to landmark nodeID """
+    csrRev = _worker['csrRev']
+    return array('d', _CalculateSSSPDist(nodeID, csrRev.numNode,
+                                         _worker['method'], csrRev))
+
+
+def BuildLandmarks(k=16, strategy='avoid', method='dij', numWorker=1,
+                   seed=0):
+    """ select k landmarks and calculate their distance tables for ALT
+
+    strategy is either farthest or avoid. See _SelectLandmarksFarthest() and
+    _SelectLandmarksAvoid(). Landmarks are selected sequentially as each of
+    them depends on the previous ones.
+
+    The forward SSSP from each landmark is already calculated during the
+    selection, which gives distFrom. Then, the backward SSSP from each
+    landmark on the reverse network is calculated by the implementation of
+    method (dij, deq, or fifo) in a pool of numWorker processes.
+    """
+    st = time()
+
+    strategy = strategy.lower()
+    rng = Random(seed)
+    if strategy.startswith('far'):
+        nodeIDs, dists = _SelectLandmarksFarthest(k, method, rng)
+    elif strategy.startswith('avoid'):
+        nodeIDs, dists = _SelectLandmarksAvoid(k, method, rng)
+    else:
+        raise Exception('Please choose correct landmark selection strategy: '
+                        +'farthest; avoid.')
+
+    csr = GetCSRGraph()
+    csrRev = GetReverseCSRGraph()
+    initArgs = (csrRev, method)
+    if numWorker == 1:
+        _InitLandmarkWorker(*initArgs)
+        distTos = [_CalculateLandmarkDistTo(l) for l in nodeIDs]
+    else:
+        with Pool(numWorker, _InitLandmarkWorker, initArgs) as pool:
+            distTos = pool.map(_CalculateLandmarkDistTo, nodeIDs)
+
+    k = len(nodeIDs)
+    numNode = csr.numNode
+    distFrom = TypedMatrix(k, numNode, 'd', bytearray(8 * k * numNode))
+    distTo = TypedMatrix(k, numNode, 'd', bytearray(8 * k * numNode))
+    for l, (dFrom, dTo) in enumerate(zip(dists, distTos)):
+        distFrom.SetRow(l, dFrom)
+        distTo.SetRow(l, dTo)
+
+    lm = Landmarks(array('i', nodeIDs), distFrom, distTo,
+                   GetNetworkFingerprint(csr))
+
+    print('Processing time for landmarks\t: {0: .2f}'.format(time() - st)
+          +' s.')
+
+    return lm
+
+
+def SaveLandmarks(lm, fileName):
+    """ save landmarks and their distance tables to fileName
+
+    See LANDMARK_FILE_HEADER for the file format.
+    """
+    k = len(lm)
+    numNode = lm.distFrom.numCol
+    with open(fileName, 'wb') as f:
+        f.write(LANDMARK_FILE_HEADER.pack(LANDMARK_FILE_MAGIC,
+                                          LANDMARK_FILE_VERSION, k, numNode,
+                                          lm.fingerprint.encode()))
+        lm.nodeIDs.tofile(f)
+        f.write(lm.distFrom.data)
+        f.write(lm.distTo.data)
+
+
+def LoadLandmarks(fileName):
+    """ load landmarks and their distance tables from fileName
+
+    It raises an exception if the file is saved by an incompatible version or
+    for a different network from the current one.
+    """
+    with open(fileName, 'rb') as f:
+        magic, version, k, numNode, fingerprint = LANDMARK_FILE_HEADER.unpack(
+            f.read(LANDMARK_FILE_HEADER.size))
+        if magic != LANDMARK_FILE_MAGIC or version != LANDMARK_FILE_VERSION:
+            raise Exception('INCOMPATIBLE LANDMARK FILE: '+fileName)
+
+        fingerprint = fingerprint.decode()
+        if fingerprint != GetNetworkFingerprint():
+            raise Exception('LANDMARK FILE '+fileName+' IS NOT BUILT on the '
+                            +'CURRENT NETWORK!!')
+
+        nodeIDs = array('i')
+        nodeIDs.fromfile(f, k)
+        distFrom = TypedMatrix(k, numNode, 'd', bytearray(f.read(8*k*numNode)))
+        distTo = TypedMatrix(k, numNode, 'd', bytearray(f.read(8*k*numNode)))
+
+    return Landmarks(nodeIDs, distFrom, distTo, fingerprint)
+
+
+def GetLandmarkHeuristic(srcNodeID, destNodeID, lm, numActive=4):
+    """ return the ALT heuristic function h(i) of destNodeID
+
+    By the triangle inequality, for each landmark l,
+
+        d(i, t) >= d(l, t) - d(l, i), and d(i, t) >= d(i, l) - d(t, l),
+
+    where t is destNodeID. h(i) is the maximum of these lower bounds over
+    numActive landmarks, which give the best lower bounds for srcNodeID. Terms
+    with unreachable t are dropped. As the maximum of consistent potentials,
+    h is consistent.
+    """
+    terms = []
+    for l in range(len(lm)):
+        distFrom = lm.distFrom[l]
+        distTo = lm.distTo[l]
+        if distFrom[destNodeID] < MAX_LABEL:
+            lb = distFrom[destNodeID] - distFrom[srcNodeID]
+            terms.append((lb, 0, distFrom, distFrom[destNodeID]))
+        if distTo[destNodeID] < MAX_LABEL:
+            lb = distTo[srcNodeID] - distTo[destNodeID]
+            terms.append((lb, 1, distTo, distTo[destNodeID]))
+
+    terms.sort(key=lambda x: x[0], reverse=True)
+    fromTerms = [(d, t) for _, b, d, t in terms[:numActive] if b == 0]
+    toTerms = [(d, t) for _, b, d, t in terms[:numActive] if b == 1]
+
+    def h(i):
+        lb = 0
+        for d, t in fromTerms:
+            if t - d[i] > lb:
+                lb = t - d[i]
+        for d, t in toTerms:
+            if d[i] - t > lb:
+                lb = d[i] - t
+        return lb
+
+    return h
+
+
+def FindShortestPathALT(origNodeUID, destNodeUID, lm):
+    """ find the shortest path between two user-defined node ids using ALT
+    with landmarks lm
+
+    It returns the shortest path distance and the list of user-defined node
+    ids on the path, which are MAX_LABEL and an empty list if destNodeUID is
+    not reachable.
+    """
+    srcNodeID = GetNodeID(origNodeUID)
+    destNodeID = GetNodeID(destNodeUID)
+    numNode = GetNumNodes()
+
+    dist = [MAX_LABEL] * numNode
+    pred = [-1] * numNode
+    h = GetLandmarkHeuristic(srcNodeID, destNodeID, lm)
+    CalculateP2PAStar(srcNodeID, destNodeID, numNode, dist, pred, h)
+
+    path = GetNodePath(srcNodeID, destNodeID, pred)
+    return dist[destNodeID], [GetNodeUID(i) for i in path]
+
+
+def _BenchmarkP2P(name, queries, query):
+    """ compare query(s, d) with CalculateSSSPDijkstraII() on node pairs in
+    queries
+
+    query(s, d) returns the shortest path distance from s to d and the number
+    of settled nodes. See BenchmarkAStar() for details.
+    """
+    numNode = GetNumNodes()
+    numQuery = len(queries)
+    csr = GetCSRGraph()
+
+    st = time()
+    distDij = []
+    settledDij = 0
+    for s, d in queries:
+        dist = [MAX_LABEL] * numNode
+        pred = [-1] * numNode
+        CalculateSSSPDijkstraII(s, dist, pred, csr)
+        distDij.append(dist[d])
+        settledDij += sum(1 for x in dist if x < MAX_LABEL)
+    timeDij = time() - st
+
+    st = time()
+    settled = 0
+    for (s, d), distRef in zip(queries, distDij):
+        dist, numSettled = query(s, d)
+        settled += numSettled
+        if dist != distRef and abs(dist - distRef) > 1e-9 * max(distRef, 1):
+            raise Exception('INCONSISTENT RESULTS FOUND between '+name
+                            +' and Dijkstra from Node '+GetNodeUID(s)+' to '
+                            +GetNodeUID(d)+'!!')
+    time_ = time() - st
+
+    stats = {
+        'dijkstra_time': timeDij,
+        'time': time_,
+        'dijkstra_settled': settledDij / numQuery,
+        'settled': settled / numQuery
+    }
+    print('Processing time for Dijkstra\t: {0: .2f}'.format(timeDij)+' s.')
+    print('Processing time for '+name+'\t: {0: .2f}'.format(time_)+' s.')
+    print('Average settled nodes\t\t: {0: .1f} vs {1: .1f}'
+          .format(stats['dijkstra_settled'], stats['settled']))
+
+    return stats
+
+
+def _GetRandomQueries(numQuery, seed):
+    """ return numQuery random pairs of internal node ids """
+    numNode = GetNumNodes()
+    rng = Random(seed)
+    return [(rng.randrange(numNode), rng.randrange(numNode))
+            for _ in range(numQuery)]
+
+
+def BenchmarkAStar(numQuery=100, heuristic='euclidean', seed=0):
+    """ compare A* with CalculateSSSPDijkstraII() on random node pairs of the
+    current network
+
+    It checks that both give the same shortest path distances, and reports the
+    total running times and the average numbers of settled nodes, which are
+    also returned as a dict.
+    """
+    numNode = GetNumNodes()
+    csr = GetCSRGraph()
+    queries = _GetRandomQueries(numQuery, seed)
+    # computed beforehand and excluded from the running time
+    hs = {d: GetHeuristic(d, heuristic) for _, d in queries}
+
+    def query(s, d):
+        dist = [MAX_LABEL] * numNode
+        pred = [-1] * numNode
+        numSettled = CalculateP2PAStar(s, d, numNode, dist, pred, hs[d], csr)
+        return dist[d], numSettled
+
+    return _BenchmarkP2P('A*\t', queries, query)
+
+
+def BenchmarkBiDijkstra(numQuery=100, seed=0):
+    """ compare bidirectional Dijkstra's algorithm with
+    CalculateSSSPDijkstraII() on random node pairs of the current network
+
+    See BenchmarkAStar() for details.
+    """
+    numNode = GetNumNodes()
+    csr = GetCSRGraph()
+    csrRev = GetReverseCSRGraph()
+    queries = _GetRandomQueries(numQuery, seed)
+
+    def query(s, d):
+        distF = [MAX_LABEL] * numNode
+        predF = [-1] * numNode
+        distB = [MAX_LABEL] * numNode
+        predB = [-1] * numNode
+        mu, _, numSettled = CalculateP2PBiDijkstra(s, d, numNode, distF,
+                                                   predF, distB, predB, csr,
+                                                   csrRev)
+        return mu, numSettled
+
+    return _BenchmarkP2P('BiDijkstra', queries, query)
+
+
+def BenchmarkALT(lm, numQuery=100, numActive=4, seed=0):
+    """ compare ALT using landmarks lm with CalculateSSSPDijkstraII() on random
+    node pairs of the current network
+
+    See BenchmarkAStar() for details.
+    """
+    numNode = GetNumNodes()
+    csr = GetCSRGraph()
+    queries = _GetRandomQueries(numQuery, seed)
+
+    def query(s, d):
+        dist = [MAX_LABEL] * numNode
+        pred = [-1] * numNode
+        h = GetLandmarkHeuristic(s, d, lm, numActive)
+        numSettled = CalculateP2PAStar(s, d, numNode, dist, pred, h, csr)
+        return dist[d], numSettled
+
+    return _BenchmarkP2P('ALT\t', queries, query)
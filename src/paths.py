@@ -0,0 +1,231 @@
+"""Batch Path Reconstruction from Predecessors
+
+Paths of many origin-destination (OD) pairs are reconstructed at once into
+flat arrays rather than one list per path:
+
+    1. GetPaths() for a PathBatch of node or link paths in memory,
+    2. WritePaths() for streaming them to a binary file read by ReadPaths(),
+    3. AccumulateLinkVolumes() for link volumes without any path at all.
+
+OD pairs from the same origin share one shortest path tree, which is either
+a row of given predecessors (e.g., pred_apsp), taken from an SPTCache, or
+calculated by CalculateSSSP().
+"""
+
+
+from array import array
+import struct
+
+from classes import SSSPWorkspace
+from spalgm import CalculateSSSP, CalculateSSSPCached
+from utils import GetCSRGraph, GetLink, GetNodeUID
+
+
+# file format of WritePaths(): a header of magic, version, and whether the
+# paths are of links, followed by (pair index, path length) and the path of
+# each reachable OD pair as int32
+PATH_FILE_MAGIC = b'SPP\0'
+PATH_FILE_VERSION = 1
+PATH_FILE_HEADER = struct.Struct('<4sI?3x')
+PATH_FILE_RECORD = struct.Struct('<qi')
+
+
+class PathBatch:
+    """ paths of OD pairs in flat arrays
+
+    The path of the k-th pair is items[offsets[k]:offsets[k+1]], which are
+    internal node ids (from origin to destination) or internal link ids if
+    useLinks is True. It is empty if the destination is not reachable. The
+    path from a node to itself has this node only (or no link).
+    """
+    def __init__(self, offsets, items, useLinks):
+        self.offsets = offsets
+        self.items = items
+        self.useLinks = useLinks
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, k):
+        return self.items[self.offsets[k]:self.offsets[k+1]]
+
+    def GetUIDs(self, k):
+        """ return the path of the k-th pair in user-defined node or link ids
+        """
+        if self.useLinks:
+            return [GetLink(i).uid for i in self[k]]
+
+        return [GetNodeUID(i) for i in self[k]]
+
+
+def _GetLinkMap(csr):
+    """ return the dict of the shortest link from tail to head keyed by
+    tail * n + head, i.e., the link used by shortest paths among parallel
+    ones (the first one in case of ties)
+    """
+    numNode = csr.numNode
+    offsets, heads, lens = csr.GetArrays()
+    linkIDs = csr.linkIDs
+    linkMap = {}
+    minLens = {}
+    for i in range(numNode):
+        for k in range(offsets[i], offsets[i+1]):
+            key = i * numNode + heads[k]
+            if key not in minLens or lens[k] < minLens[key]:
+                linkMap[key] = linkIDs[k]
+                minLens[key] = lens[k]
+
+    return linkMap
+
+
+def _GetTrees(odPairs, pred, method, cache):
+    """ generate (srcNodeID, predecessors of srcNodeID, indices of odPairs
+    from srcNodeID) for each origin of odPairs, where the first element of
+    each pair is its origin
+
+    The predecessors are pred[srcNodeID] if pred is not None, from SPTCache
+    cache if it is not None, or calculated by CalculateSSSP() using method.
+    """
+    groups = {}
+    for k, od in enumerate(odPairs):
+        groups.setdefault(od[0], []).append(k)
+
+    csr = GetCSRGraph()
+    ws = SSSPWorkspace(csr.numNode)
+    for s, ks in groups.items():
+        if pred is not None:
+            yield s, pred[s], ks
+        elif cache is not None:
+            yield s, CalculateSSSPCached(s, cache, method, ws)[1], ks
+        else:
+            CalculateSSSP(s, csr.numNode, ws.dist, ws.pred, method, csr, ws)
+            yield s, ws.pred, ks
+
+
+def _WalkPath(srcNodeID, destNodeID, pred, linkMap, numNode, buf):
+    """ put the path from srcNodeID to destNodeID into list buf and return
+    True, or return False if it is not reachable
+
+    The path is of links if linkMap (see _GetLinkMap()) is not None.
+    """
+    buf.clear()
+    if srcNodeID != destNodeID and pred[destNodeID] == -1:
+        return False
+
+    j = destNodeID
+    if linkMap is None:
+        buf.append(j)
+        while j != srcNodeID:
+            j = pred[j]
+            buf.append(j)
+    else:
+        while j != srcNodeID:
+            i = pred[j]
+            buf.append(linkMap[i * numNode + j])
+            j = i
+
+    buf.reverse()
+    return True
+
+
+def GetPaths(odPairs, useLinks=False, pred=None, method='dij', cache=None):
+    """ reconstruct the shortest paths of odPairs, i.e., pairs of internal node
+    ids, into a PathBatch of node paths (or link paths if useLinks is True)
+
+    See _GetTrees() for where the predecessors come from.
+    """
+    csr = GetCSRGraph()
+    numNode = csr.numNode
+    linkMap = _GetLinkMap(csr) if useLinks else None
+    numPair = len(odPairs)
+    # paths in the order of origins, which are reordered at the end
+    items_ = array('i')
+    starts = array('q', bytes(8 * numPair))
+    sizes = array('i', bytes(4 * numPair))
+    buf = []
+    for s, pred_, ks in _GetTrees(odPairs, pred, method, cache):
+        for k in ks:
+            if _WalkPath(s, odPairs[k][1], pred_, linkMap, numNode, buf):
+                starts[k] = len(items_)
+                sizes[k] = len(buf)
+                items_.extend(buf)
+
+    offsets = array('q', bytes(8 * (numPair + 1)))
+    items = array('i')
+    for k in range(numPair):
+        items.extend(items_[starts[k]:starts[k]+sizes[k]])
+        offsets[k+1] = len(items)
+
+    return PathBatch(offsets, items, useLinks)
+
+
+def WritePaths(fileName, odPairs, useLinks=False, pred=None, method='dij',
+               cache=None):
+    """ write the shortest paths of odPairs to fileName one by one as in
+    GetPaths() without holding them in memory
+
+    The paths are written in the order of origins rather than odPairs, and
+    unreachable pairs are skipped. It returns the number of paths written.
+    """
+    csr = GetCSRGraph()
+    numNode = csr.numNode
+    linkMap = _GetLinkMap(csr) if useLinks else None
+    numPath = 0
+    buf = []
+    with open(fileName, 'wb') as f:
+        f.write(PATH_FILE_HEADER.pack(PATH_FILE_MAGIC, PATH_FILE_VERSION,
+                                      useLinks))
+        for s, pred_, ks in _GetTrees(odPairs, pred, method, cache):
+            for k in ks:
+                if _WalkPath(s, odPairs[k][1], pred_, linkMap, numNode,
+                             buf):
+                    f.write(PATH_FILE_RECORD.pack(k, len(buf)))
+                    f.write(array('i', buf))
+                    numPath += 1
+
+    return numPath
+
+
+def ReadPaths(fileName):
+    """ generate (index of OD pair, path) from the file written by
+    WritePaths(), where each path is an array of internal node or link ids
+    """
+    with open(fileName, 'rb') as f:
+        header = f.read(PATH_FILE_HEADER.size)
+        magic, version, _ = PATH_FILE_HEADER.unpack(header)
+        if magic != PATH_FILE_MAGIC or version != PATH_FILE_VERSION:
+            raise Exception('INCOMPATIBLE PATH FILE: '+fileName)
+
+        while True:
+            b = f.read(PATH_FILE_RECORD.size)
+            if not b:
+                break
+            k, n = PATH_FILE_RECORD.unpack(b)
+            path = array('i')
+            path.frombytes(f.read(4 * n))
+            yield k, path
+
+
+def AccumulateLinkVolumes(odDemands, pred=None, method='dij', cache=None):
+    """ load the demand of each (origin, destination, demand) in odDemands
+    onto the links of its shortest path and return the volumes of all links
+    as an array indexed by internal link id
+
+    Each path is walked from the destination without being reconstructed.
+    See _GetTrees() for where the predecessors come from.
+    """
+    csr = GetCSRGraph()
+    numNode = csr.numNode
+    linkMap = _GetLinkMap(csr)
+    volumes = array('d', bytes(8 * csr.numLink))
+    for s, pred_, ks in _GetTrees(odDemands, pred, method, cache):
+        for k in ks:
+            _, j, v = odDemands[k]
+            if j != s and pred_[j] == -1:
+                continue
+            while j != s:
+                i = pred_[j]
+                volumes[linkMap[i * numNode + j]] += v
+                j = i
+
+    return volumes
@@ -0,0 +1,144 @@
+"""Sinks of All Pair Shortest Paths (APSP) streamed by spalgm.StreamAPSP()
+including:
+
+    1. CSVSkimSink for origin-destination (OD) skim in CSV
+    2. BinarySink for compressed binary rows
+    3. TopKSink for the k nearest destinations and/or those within a distance
+       threshold
+
+Each sink takes the distance labels and predecessors from one source node at
+a time through Write(srcNodeID, dist, pred), and Close() is called after the
+last one. None of them holds the n x n matrices in memory.
+"""
+
+
+from array import array
+import csv
+import gzip
+import heapq
+import struct
+
+from utils import MAX_LABEL, GetNodeUID, GetNumNodes
+
+
+# file format of BinarySink: a header of magic, version, numNode, and typecode
+# of distance labels, followed by (srcNodeID, dist, pred) of each row, where
+# dist and pred are arrays of numNode elements, all compressed by gzip
+BINARY_SINK_MAGIC = b'SPR\0'
+BINARY_SINK_VERSION = 1
+BINARY_SINK_HEADER = struct.Struct('<4sIic')
+BINARY_SINK_ROW = struct.Struct('<i')
+
+
+class CSVSkimSink:
+    """ write OD skim to fileName with one line of origin and destination
+    (user-defined node ids) and distance for each reachable pair
+
+    The predecessor of the destination is written as well if withPred is
+    True.
+    """
+    def __init__(self, fileName, withPred=False, delimiter_=','):
+        self.file = open(fileName, 'w', newline='')
+        self.writer = csv.writer(self.file, delimiter=delimiter_)
+        self.withPred = withPred
+        # look up user-defined node ids only once
+        self.uids = [GetNodeUID(i) for i in range(GetNumNodes())]
+
+        header = ['orig_node_id', 'dest_node_id', 'dist']
+        if withPred:
+            header.append('pred_node_id')
+        self.writer.writerow(header)
+
+    def Write(self, srcNodeID, dist, pred):
+        uids = self.uids
+        orig = uids[srcNodeID]
+        if self.withPred:
+            self.writer.writerows(
+                (orig, uids[j], d, uids[pred[j]] if pred[j] != -1 else '')
+                for j, d in enumerate(dist) if d < MAX_LABEL
+            )
+        else:
+            self.writer.writerows((orig, uids[j], d)
+                                  for j, d in enumerate(dist)
+                                  if d < MAX_LABEL)
+
+    def Close(self):
+        self.file.close()
+
+
+class BinarySink:
+    """ write each row as arrays of distType (float32 by default) and int32 to
+    fileName compressed by gzip, which can be read back by ReadBinaryRows()
+    """
+    def __init__(self, fileName, distType='f', compressLevel=6):
+        if distType not in ('d', 'f'):
+            raise Exception('Please choose correct type of distance labels: '
+                            +'d (float64); f (float32).')
+
+        self.numNode = GetNumNodes()
+        self.distType = distType
+        self.file = gzip.open(fileName, 'wb', compresslevel=compressLevel)
+        self.file.write(BINARY_SINK_HEADER.pack(BINARY_SINK_MAGIC,
+                                                BINARY_SINK_VERSION,
+                                                self.numNode,
+                                                distType.encode()))
+
+    def Write(self, srcNodeID, dist, pred):
+        self.file.write(BINARY_SINK_ROW.pack(srcNodeID))
+        self.file.write(array(self.distType, dist))
+        self.file.write(pred if isinstance(pred, array) else array('i', pred))
+
+    def Close(self):
+        self.file.close()
+
+
+def ReadBinaryRows(fileName):
+    """ generate (srcNodeID, dist, pred) from the file written by BinarySink,
+    where dist and pred are arrays
+    """
+    with gzip.open(fileName, 'rb') as f:
+        header = f.read(BINARY_SINK_HEADER.size)
+        magic, version, numNode, distType = BINARY_SINK_HEADER.unpack(header)
+        if magic != BINARY_SINK_MAGIC or version != BINARY_SINK_VERSION:
+            raise Exception('INCOMPATIBLE APSP FILE: '+fileName)
+
+        distType = distType.decode()
+        while True:
+            b = f.read(BINARY_SINK_ROW.size)
+            if not b:
+                break
+            srcNodeID = BINARY_SINK_ROW.unpack(b)[0]
+            dist = array(distType)
+            dist.frombytes(f.read(numNode * dist.itemsize))
+            pred = array('i')
+            pred.frombytes(f.read(numNode * pred.itemsize))
+            yield srcNodeID, dist, pred
+
+
+class TopKSink:
+    """ keep the k nearest destinations and/or those within maxDist from each
+    source node, i.e., O(nk) rather than O(n^2) memory
+
+    results[srcNodeID] is the list of (dist, destNodeID) in ascending order
+    of dist, which excludes srcNodeID itself and unreachable nodes. Either k or
+    maxDist can be None for no limit.
+    """
+    def __init__(self, k=None, maxDist=None):
+        if k is None and maxDist is None:
+            raise Exception('Please specify k and/or maxDist for TopKSink!!')
+
+        self.k = k
+        self.maxDist = MAX_LABEL if maxDist is None else maxDist
+        self.results = {}
+
+    def Write(self, srcNodeID, dist, pred):
+        maxDist = self.maxDist
+        pairs = ((d, j) for j, d in enumerate(dist)
+                 if d <= maxDist and d < MAX_LABEL and j != srcNodeID)
+        if self.k is None:
+            self.results[srcNodeID] = sorted(pairs)
+        else:
+            self.results[srcNodeID] = heapq.nsmallest(self.k, pairs)
+
+    def Close(self):
+        pass
@@ -3,28 +3,100 @@ Single Source Shortest Path Problem (SSSP) including:
 
     1. FIFO
     2. Double-Ended Queue (Deque)
-    3. Minimum Distance Label (essentially Dijkstra's Algorithm)
+    3. Small Label First (SLF), Large Label Last (LLL), and Threshold
+    4. Minimum Distance Label (essentially Dijkstra's Algorithm)
+    5. Bucket-based Dijkstra's Algorithm (Dial's buckets and radix heap)
+
+and Floyd-Warshall Algorithm for All Pair Shortest Paths (APSP), which can
+be updated incrementally after link lengths change or streamed row by row.
+
+All SSSP implementations walk the CSR arrays (offsets, heads, and lens) of
+the network directly. See classes.CSRGraph for details. Which one is the
+fastest depends on the network, and APSP can pick it by itself (auto) on a
+few sampled source nodes. See SelectSSSPMethod() for details.
+
+Their counters of scans, relaxations, updates, and so on are only collected
+by the separate instrumented kernels behind CalculateSSSPWithStats().
 
 07/19/20, Peiheng Li (jdlph@hotmail.com)
 """
 
 
-from time import time
+from array import array
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from random import Random
+from time import perf_counter, time
 import heapq
 import collections
+import os
+import warnings
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is only required by the Floyd-Warshall Algorithm
+    np = None
 
 import SimpleDequeC
-from classes import SimpleDequePy, SpecialDequePy
+from classes import BucketQueuePy, CSRGraph, IndexedHeapPy, RadixHeapPy, \
+                    ScanCounter, SimpleDequePy, SpecialDequePy, SPTCache, \
+                    SSSPStats, SSSPWorkspace, TypedMatrix
 from utils import MAX_LABEL, dist_apsp, pred_apsp, \
-                  GetNode, GetLink, GetNextNodeID, GetNumNodes
+                  CreateTypedMatrix, GetCSRGraph, GetLink, GetMatrixFileName, \
+                  GetNetworkVersion, GetNextNodeID, GetNumNodes, \
+                  GetReverseCSRGraph, GetScaledLens, SetLinkLen
+
+
+# SSSP implementations available to CalculateSSSP() and CalculateAPSP()
+SSSP_METHODS = ('dij', 'deq', 'fifo', 'dial', 'radix', 'slf', 'lll',
+                'threshold')
+# SSSP implementations with instrumented kernels for CalculateSSSPWithStats()
+STATS_METHODS = ('dij', 'deq', 'fifo', 'dial', 'radix')
+# SSSP implementations tried by SelectSSSPMethod() for auto, i.e., dij and the
+# label correcting ones with O(1) membership test
+AUTO_CANDIDATES = ('dij', 'deq', 'slf', 'lll', 'threshold')
+# number of source nodes sampled by auto
+AUTO_SAMPLE_SIZE = 3
+# deque implementations available to CalculateSSSPDEQII()
+DEQUE_TYPES = ('py', 'c', 'builtin')
+# CalculateSSSPDial() falls back to radix heap if C * n exceeds it, where C is
+# the maximum scaled link length, as each SSSP may scan up to C * n buckets
+MAX_DIAL_SPAN = 10**8
+
+
+def _GetCSRArrays(csr):
+    """ return the CSR arrays of csr or the current network if csr is None """
+    if csr is None:
+        csr = GetCSRGraph()
+
+    return csr.GetArrays()
+
+
+def _ResetWorkspace(srcNodeID, ws):
+    """ reset workspace ws and return the list of touched nodes (see
+    SSSPWorkspace) with srcNodeID, or None if ws is None
+
+    Without ws, nobody needs touched nodes, and the label updates of each
+    implementation skip the bookkeeping (track is False) in its inner loop.
+    """
+    if ws is None:
+        return None
+
+    ws.Reset()
+    ws.touched.append(srcNodeID)
+    return ws.touched
 
 
-def CalculateSSSPFIFOI(srcNodeID, dist, pred):
+def CalculateSSSPFIFOI(srcNodeID, dist, pred, csr=None, ws=None):
     """ FIFO implementation of MLC using built-in list and x in s operation
 
     The time complexity of x in s operation for built-in list is O(n), where n
     is the size of list at run time.
     """
+    offsets, heads, lens = _GetCSRArrays(csr)
+    touched = _ResetWorkspace(srcNodeID, ws)
+    track = ws is not None
     dist[srcNodeID] = 0
     # list
     selist = []
@@ -32,24 +104,28 @@ def CalculateSSSPFIFOI(srcNodeID, dist, pred):
     # label correcting
     while selist:
         i = selist.pop(0)
-        node = GetNode(i)
-        for linkID in node.GetOutgoingLinks():
-            link = GetLink(linkID)
-            j = link.GetDestNodeID()
-            if dist[j] > dist[i] + link.GetLen():
-                dist[j] = dist[i] + link.GetLen()
+        for k in range(offsets[i], offsets[i+1]):
+            j = heads[k]
+            if dist[j] > dist[i] + lens[k]:
+                if track and pred[j] == -1:
+                    touched.append(j)
+                dist[j] = dist[i] + lens[k]
                 pred[j] = i
                 if j not in selist:
                     selist.append(j)
 
 
-def CalculateSSSPFIFOII(srcNodeID, numNode, dist, pred):
+def CalculateSSSPFIFOII(srcNodeID, numNode, dist, pred, csr=None,
+                        ws=None):
     """ FIFO implementation of MLC using built-in list and indicator array
 
     x in s operation for built-in list can be replaced using an
     indicator/status array. The time complexity is only O(1).
     """
-    status = [0] * numNode
+    offsets, heads, lens = _GetCSRArrays(csr)
+    touched = _ResetWorkspace(srcNodeID, ws)
+    track = ws is not None
+    status = [0] * numNode if ws is None else ws.status
     dist[srcNodeID] = 0
     # list
     selist = []
@@ -59,25 +135,29 @@ def CalculateSSSPFIFOII(srcNodeID, numNode, dist, pred):
     while selist:
         i = selist.pop(0)
         status[i] = 0
-        node = GetNode(i)
-        for linkID in node.GetOutgoingLinks():
-            link = GetLink(linkID)
-            j = link.GetDestNodeID()
-            if dist[j] > dist[i] + link.GetLen():
-                dist[j] = dist[i] + link.GetLen()
+        for k in range(offsets[i], offsets[i+1]):
+            j = heads[k]
+            if dist[j] > dist[i] + lens[k]:
+                if track and pred[j] == -1:
+                    touched.append(j)
+                dist[j] = dist[i] + lens[k]
                 pred[j] = i
                 if not status[j]:
                     selist.append(j)
                     status[j] = 1
 
 
-def CalculateSSSPDEQI(srcNodeID, numNode, dist, pred):
+def CalculateSSSPDEQI(srcNodeID, numNode, dist, pred, csr=None,
+                      ws=None):
     """ Deque implementation of MLC using list and Dr. Zhou's approach.
 
     The time complexities of pop(0) and insert(0, x) for built-in list are both
     O(n), where n is the size of list at run time.
     """
-    status = [0] * numNode
+    offsets, heads, lens = _GetCSRArrays(csr)
+    touched = _ResetWorkspace(srcNodeID, ws)
+    track = ws is not None
+    status = [0] * numNode if ws is None else ws.status
     dist[srcNodeID] = 0
     # list
     selist = []
@@ -89,12 +169,12 @@ def CalculateSSSPDEQI(srcNodeID, numNode, dist, pred):
         # 2 indicates the current node p appeared in selist before
         # but is no longer in it.
         status[i] = 2
-        node = GetNode(i)
-        for linkID in node.GetOutgoingLinks():
-            link = GetLink(linkID)
-            j = link.GetDestNodeID()
-            if dist[j] > dist[i] + link.GetLen():
-                dist[j] = dist[i] + link.GetLen()
+        for k in range(offsets[i], offsets[i+1]):
+            j = heads[k]
+            if dist[j] > dist[i] + lens[k]:
+                if track and pred[j] == -1:
+                    touched.append(j)
+                dist[j] = dist[i] + lens[k]
                 pred[j] = i
                 if status[j] == 2:
                     selist.insert(0, j)
@@ -104,7 +184,25 @@ def CalculateSSSPDEQI(srcNodeID, numNode, dist, pred):
                     status[j] = 1
 
 
-def CalculateSSSPDEQII(srcNodeID, numNode, dist, pred):
+def _CreateDeque(dequeType, numNode, ws):
+    """ create an empty deque of dequeType in DEQUE_TYPES or get it from
+    workspace ws
+    """
+    if dequeType == 'py':
+        type_, args = SimpleDequePy, (numNode,)
+    elif dequeType == 'c':
+        type_, args = SimpleDequeC.deque, (numNode,)
+    elif dequeType == 'builtin':
+        type_, args = collections.deque, ()
+    else:
+        raise Exception('Please choose correct deque type: '
+                        +'; '.join(DEQUE_TYPES)+'.')
+
+    return type_(*args) if ws is None else ws.GetSEList(type_, *args)
+
+
+def CalculateSSSPDEQII(srcNodeID, numNode, dist, pred, csr=None,
+                       ws=None, dequeType='py'):
     """ Deque implementation of MLC using deque and Dr. Zhou's approach.
 
     The computation efficiency can be improve by replacing built-in list with
@@ -113,14 +211,18 @@ def CalculateSSSPDEQII(srcNodeID, numNode, dist, pred):
         2. appendleft(x).
     Their running times are both O(1).
 
+    dequeType is one of DEQUE_TYPES: py for SimpleDequePy, c for
+    SimpleDequeC.deque, and builtin for collections.deque.
+
     See https://github.com/jdlph/Path4GMNS for more efficient implementation
     """
-    status = [0] * numNode
+    offsets, heads, lens = _GetCSRArrays(csr)
+    touched = _ResetWorkspace(srcNodeID, ws)
+    track = ws is not None
+    status = [0] * numNode if ws is None else ws.status
     dist[srcNodeID] = 0
-    # deque, choose one of the following three
-    # selist = collections.deque()
-    selist = SimpleDequePy(numNode)
-    # selist = SimpleDequeC.deque(numNode)
+    # deque
+    selist = _CreateDeque(dequeType, numNode, ws)
     selist.append(srcNodeID)
     status[srcNodeID] = 1
     # label correcting
@@ -129,12 +231,12 @@ def CalculateSSSPDEQII(srcNodeID, numNode, dist, pred):
         # 2 indicates the current node p appeared in selist before
         # but is no longer in it.
         status[i] = 2
-        node = GetNode(i)
-        for linkID in node.GetOutgoingLinks():
-            link = GetLink(linkID)
-            j = link.GetDestNodeID()
-            if dist[j] > dist[i] + link.GetLen():
-                dist[j] = dist[i] + link.GetLen()
+        for k in range(offsets[i], offsets[i+1]):
+            j = heads[k]
+            if dist[j] > dist[i] + lens[k]:
+                if track and pred[j] == -1:
+                    touched.append(j)
+                dist[j] = dist[i] + lens[k]
                 pred[j] = i
                 if status[j] == 2:
                     selist.appendleft(j)
@@ -144,7 +246,8 @@ def CalculateSSSPDEQII(srcNodeID, numNode, dist, pred):
                     status[j] = 1
 
 
-def CalculateSSSPDEQIII(srcNodeID, numNode, dist, pred):
+def CalculateSSSPDEQIII(srcNodeID, numNode, dist, pred, csr=None,
+                        ws=None):
     """ Deque implementation of MLC using deque without status array
 
     It is equivalent to shortest_path_n() in
@@ -154,19 +257,23 @@ def CalculateSSSPDEQIII(srcNodeID, numNode, dist, pred):
     For their C++ counterparts, CalculateSSSPDEQIII() outperforms
     CalculateSSSPDEQII() by a 1% margin.
     """
+    offsets, heads, lens = _GetCSRArrays(csr)
+    touched = _ResetWorkspace(srcNodeID, ws)
+    track = ws is not None
     dist[srcNodeID] = 0
     # deque
-    selist = SpecialDequePy(numNode)
+    selist = (SpecialDequePy(numNode) if ws is None
+              else ws.GetSEList(SpecialDequePy, numNode))
     selist.append(srcNodeID)
     # label correcting
     while selist:
         i = selist.popleft()
-        node = GetNode(i)
-        for linkID in node.GetOutgoingLinks():
-            link = GetLink(linkID)
-            j = link.GetDestNodeID()
-            if dist[j] > dist[i] + link.GetLen():
-                dist[j] = dist[i] + link.GetLen()
+        for k in range(offsets[i], offsets[i+1]):
+            j = heads[k]
+            if dist[j] > dist[i] + lens[k]:
+                if track and pred[j] == -1:
+                    touched.append(j)
+                dist[j] = dist[i] + lens[k]
                 pred[j] = i
                 if selist.pastnode(j):
                     selist.appendleft(j)
@@ -174,7 +281,146 @@ def CalculateSSSPDEQIII(srcNodeID, numNode, dist, pred):
                     selist.append(j)
 
 
-def CalculateSSSPDijkstraI(srcNodeID, numNode, dist, pred):
+def CalculateSSSPSLF(srcNodeID, numNode, dist, pred, csr=None, ws=None):
+    """ Small Label First (SLF) implementation of MLC using SimpleDequePy
+
+    Following Bertsekas (1993), a node entering the deque is put at its front
+    if its distance label is smaller than that of the front node, or at its
+    end otherwise. Different from the deque implementation, whether a node has
+    been scanned before does not matter.
+    """
+    offsets, heads, lens = _GetCSRArrays(csr)
+    touched = _ResetWorkspace(srcNodeID, ws)
+    track = ws is not None
+    status = [0] * numNode if ws is None else ws.status
+    dist[srcNodeID] = 0
+    # deque
+    selist = (SimpleDequePy(numNode) if ws is None
+              else ws.GetSEList(SimpleDequePy, numNode))
+    selist.append(srcNodeID)
+    status[srcNodeID] = 1
+    # label correcting
+    while selist:
+        i = selist.popleft()
+        status[i] = 0
+        for k in range(offsets[i], offsets[i+1]):
+            j = heads[k]
+            if dist[j] > dist[i] + lens[k]:
+                if track and pred[j] == -1:
+                    touched.append(j)
+                dist[j] = dist[i] + lens[k]
+                pred[j] = i
+                if not status[j]:
+                    if selist and dist[j] < dist[selist.head]:
+                        selist.appendleft(j)
+                    else:
+                        selist.append(j)
+                    status[j] = 1
+
+
+def CalculateSSSPLLL(srcNodeID, numNode, dist, pred, csr=None, ws=None):
+    """ Large Label Last (LLL) implementation of MLC using SimpleDequePy
+
+    Following Bertsekas et al. (1996), the front node is moved to the end of
+    the queue as long as its distance label is larger than the average one of
+    all nodes in the queue, and the first one that is not is scanned. The sum
+    of distance labels is updated along with the queue.
+    """
+    offsets, heads, lens = _GetCSRArrays(csr)
+    touched = _ResetWorkspace(srcNodeID, ws)
+    track = ws is not None
+    status = [0] * numNode if ws is None else ws.status
+    dist[srcNodeID] = 0
+    # queue
+    selist = (SimpleDequePy(numNode) if ws is None
+              else ws.GetSEList(SimpleDequePy, numNode))
+    selist.append(srcNodeID)
+    status[srcNodeID] = 1
+    # size of selist and sum of distance labels of nodes in it
+    size = 1
+    total = 0
+    # label correcting
+    while selist:
+        # at most size - 1 moves in case total is off by rounding errors
+        for _ in range(size - 1):
+            if dist[selist.head] * size <= total:
+                break
+            selist.append(selist.popleft())
+        i = selist.popleft()
+        status[i] = 0
+        size -= 1
+        # start over rather than carrying rounding errors
+        total = total - dist[i] if size else 0
+        for k in range(offsets[i], offsets[i+1]):
+            j = heads[k]
+            if dist[j] > dist[i] + lens[k]:
+                if track and pred[j] == -1:
+                    touched.append(j)
+                if status[j]:
+                    total -= dist[j]
+                else:
+                    selist.append(j)
+                    status[j] = 1
+                    size += 1
+                dist[j] = dist[i] + lens[k]
+                pred[j] = i
+                total += dist[j]
+
+
+def CalculateSSSPThreshold(srcNodeID, numNode, dist, pred, factor=0.5,
+                           csr=None, ws=None):
+    """ Threshold implementation of MLC using two lists
+
+    Following Glover et al. (1985), nodes are scanned in FIFO order from the
+    list now (SimpleDequePy), while newly labeled nodes wait in the list next.
+    Once now is empty, the threshold is set to m + factor * (a - m), where m
+    and a are the minimum and average distance labels in next, and nodes in
+    next with distance labels no larger than it are moved to now.
+
+    A smaller factor scans nodes in an order closer to Dijkstra's algorithm
+    (i.e., fewer scans) at the cost of more passes over next.
+    """
+    offsets, heads, lens = _GetCSRArrays(csr)
+    touched = _ResetWorkspace(srcNodeID, ws)
+    track = ws is not None
+    status = [0] * numNode if ws is None else ws.status
+    dist[srcNodeID] = 0
+    # two lists
+    now = (SimpleDequePy(numNode) if ws is None
+           else ws.GetSEList(SimpleDequePy, numNode))
+    next_ = []
+    now.append(srcNodeID)
+    status[srcNodeID] = 1
+    # label correcting
+    while now or next_:
+        if not now:
+            labels = [dist[j] for j in next_]
+            m = min(labels)
+            # the average may fall below m by rounding errors
+            threshold = m + factor * max(sum(labels) / len(labels) - m, 0)
+            rest = []
+            for j in next_:
+                if dist[j] <= threshold:
+                    now.append(j)
+                else:
+                    rest.append(j)
+            next_ = rest
+        i = now.popleft()
+        status[i] = 0
+        for k in range(offsets[i], offsets[i+1]):
+            j = heads[k]
+            if dist[j] > dist[i] + lens[k]:
+                if track and pred[j] == -1:
+                    touched.append(j)
+                dist[j] = dist[i] + lens[k]
+                pred[j] = i
+                if not status[j]:
+                    next_.append(j)
+                    status[j] = 1
+
+
+def CalculateSSSPDijkstraI(srcNodeID, numNode, dist, pred, csr=None,
+                           ws=None):
     """ Minimum Distance Label Implementation without heap
 
     There are two major operations with this implementation:
@@ -187,7 +433,10 @@ def CalculateSSSPDijkstraI(srcNodeID, numNode, dist, pred):
     The overall time complexity of these two operations is O(n), where, n is
     the list size at run time.
     """
-    status = [0] * numNode
+    offsets, heads, lens = _GetCSRArrays(csr)
+    touched = _ResetWorkspace(srcNodeID, ws)
+    track = ws is not None
+    status = [0] * numNode if ws is None else ws.status
     dist[srcNodeID] = 0
     # list
     selist = []
@@ -198,19 +447,20 @@ def CalculateSSSPDijkstraI(srcNodeID, numNode, dist, pred):
         i = GetNextNodeID(selist, dist)
         selist.remove(i)
         status[i] = 0
-        node = GetNode(i)
-        for linkID in node.GetOutgoingLinks():
-            link = GetLink(linkID)
-            j = link.GetDestNodeID()
-            if dist[j] > dist[i] + link.GetLen():
-                dist[j] = dist[i] + link.GetLen()
+        for k in range(offsets[i], offsets[i+1]):
+            j = heads[k]
+            if dist[j] > dist[i] + lens[k]:
+                if track and pred[j] == -1:
+                    touched.append(j)
+                dist[j] = dist[i] + lens[k]
                 pred[j] = i
                 if not status[j]:
                     selist.append(j)
                     status[j] = 1
 
 
-def CalculateSSSPDijkstraII(srcNodeID, dist, pred):
+def CalculateSSSPDijkstraII(srcNodeID, dist, pred, csr=None, ws=None,
+                            targets=(), maxDist=MAX_LABEL):
     """ Minimum Distance Label Implementation using heap
 
     heappop(h) from heapq involves two operations:
@@ -229,9 +479,19 @@ def CalculateSSSPDijkstraII(srcNodeID, dist, pred):
     Omitting decrease-key(h, newval, i) WOULD NOT affect the correctness of the
     implementation.
 
+    The search stops early once all nodes in targets (a set of node ids) are
+    settled or the minimum distance label exceeds maxDist. Only the distance
+    labels of settled nodes are final then, i.e., those no larger than
+    maxDist.
+
     See https://github.com/jdlph/Path4GMNS for more efficient implementation
     """
+    offsets, heads, lens = _GetCSRArrays(csr)
+    touched = _ResetWorkspace(srcNodeID, ws)
+    track = ws is not None
     dist[srcNodeID] = 0
+    # number of targets not settled yet
+    numTarget = len(targets)
     # heap
     selist = []
     heapq.heapify(selist)
@@ -239,53 +499,1220 @@ def CalculateSSSPDijkstraII(srcNodeID, dist, pred):
     # label correcting
     while selist:
         (k, i) = heapq.heappop(selist)
-        node = GetNode(i)
-        for linkID in node.GetOutgoingLinks():
-            link = GetLink(linkID)
-            j = link.GetDestNodeID()
-            if dist[j] > k + link.GetLen():
-                dist[j] = k + link.GetLen()
+        # node i has been settled with a smaller key, and scanning it again
+        # would not update any distance label
+        if k > dist[i]:
+            continue
+        if k > maxDist:
+            break
+        if i in targets:
+            numTarget -= 1
+            if not numTarget:
+                break
+        for p in range(offsets[i], offsets[i+1]):
+            j = heads[p]
+            if dist[j] > k + lens[p]:
+                if track and pred[j] == -1:
+                    touched.append(j)
+                dist[j] = k + lens[p]
                 pred[j] = i
                 heapq.heappush(selist, (dist[j], j))
 
 
-def CalculateAPSP(method='dij'):
+def CalculateSSSPDijkstraIII(srcNodeID, numNode, dist, pred, d=4, csr=None,
+                             ws=None):
+    """ Minimum Distance Label Implementation using indexed d-ary heap
+
+    Different from CalculateSSSPDijkstraII(), IndexedHeapPy supports
+    decrease-key. Each node is in the heap at most once, i.e., the heap size
+    is bounded by n rather than m, and no tuple is allocated for each push.
+
+    Both push (insert or decrease-key) and pop take O(log_d(n)) time, where d
+    is the arity of the heap.
+    """
+    offsets, heads, lens = _GetCSRArrays(csr)
+    touched = _ResetWorkspace(srcNodeID, ws)
+    track = ws is not None
+    dist[srcNodeID] = 0
+    # heap
+    selist = (IndexedHeapPy(numNode, d) if ws is None
+              else ws.GetSEList(IndexedHeapPy, numNode, d))
+    selist.push(srcNodeID, 0)
+    # label correcting
+    while selist:
+        i = selist.pop()
+        for k in range(offsets[i], offsets[i+1]):
+            j = heads[k]
+            if dist[j] > dist[i] + lens[k]:
+                if track and pred[j] == -1:
+                    touched.append(j)
+                dist[j] = dist[i] + lens[k]
+                pred[j] = i
+                selist.push(j, dist[j])
+
+
+def _CalculateSSSPBucket(srcNodeID, dist, pred, selist, intLens, scale, csr,
+                         ws):
+    """ label setting with a monotone priority queue selist on integer link
+    lengths intLens
+
+    Distance labels are kept as integers during the search and divided by
+    scale afterward.
+    """
+    offsets, heads, _ = _GetCSRArrays(csr)
+    touched = _ResetWorkspace(srcNodeID, ws)
+    track = ws is not None
+    dist[srcNodeID] = 0
+    selist.push(srcNodeID, 0)
+    # label setting
+    while selist:
+        (k, i) = selist.pop()
+        # skip outdated entries
+        if k != dist[i]:
+            continue
+        for p in range(offsets[i], offsets[i+1]):
+            j = heads[p]
+            if dist[j] > k + intLens[p]:
+                if track and pred[j] == -1:
+                    touched.append(j)
+                dist[j] = k + intLens[p]
+                pred[j] = i
+                selist.push(j, dist[j])
+
+    if scale != 1:
+        if not track:
+            touched = [i for i, p in enumerate(pred)
+                       if p != -1 or i == srcNodeID]
+        for i in touched:
+            dist[i] /= scale
+
+
+def CalculateSSSPDial(srcNodeID, numNode, dist, pred, scale=None, csr=None,
+                      ws=None, maxSpan=MAX_DIAL_SPAN):
+    """ Minimum Distance Label Implementation using Dial's buckets
+
+    Link lengths are scaled to integers by scale (see GetScaledLens()), and
+    nodes are kept in C+1 circular buckets indexed by their distance labels,
+    where C is the maximum scaled link length. The time complexity is
+    O(m + nC). Therefore, it is only efficient for small C.
+
+    If C * n exceeds maxSpan (e.g., lengths with many decimal places scaled by
+    a large power of 10), it warns and falls back to CalculateSSSPRadix(),
+    which gives the same distance labels in O(m + nlog(nC)) time.
+
+    An exception is raised if link lengths cannot be scaled exactly.
+    """
+    if csr is None:
+        csr = GetCSRGraph()
+    intLens, scale = GetScaledLens(scale, csr)
+    maxKeyDiff = max(intLens, default=0)
+    if maxKeyDiff * numNode > maxSpan:
+        warnings.warn('TOO MANY BUCKETS for DIAL (C = '+str(maxKeyDiff)
+                      +' with scale '+str(scale)+'), USE RADIX HEAP INSTEAD')
+        CalculateSSSPRadix(srcNodeID, numNode, dist, pred, scale, csr, ws)
+        return
+
+    selist = (BucketQueuePy(maxKeyDiff) if ws is None
+              else ws.GetSEList(BucketQueuePy, maxKeyDiff))
+    _CalculateSSSPBucket(srcNodeID, dist, pred, selist, intLens, scale, csr,
+                         ws)
+
+
+def CalculateSSSPRadix(srcNodeID, numNode, dist, pred, scale=None, csr=None,
+                       ws=None):
+    """ Minimum Distance Label Implementation using radix heap
+
+    Link lengths are scaled to integers in the same way as CalculateSSSPDial().
+    The time complexity is O(m + nlog(nC)) as each node is moved among
+    log(nC) buckets at most.
+
+    An exception is raised if link lengths cannot be scaled exactly.
+    """
+    if csr is None:
+        csr = GetCSRGraph()
+    intLens, scale = GetScaledLens(scale, csr)
+    maxKey = max(intLens, default=0) * numNode
+    selist = (RadixHeapPy(maxKey) if ws is None
+              else ws.GetSEList(RadixHeapPy, maxKey))
+    _CalculateSSSPBucket(srcNodeID, dist, pred, selist, intLens, scale, csr,
+                         ws)
+
+
+def CalculateSSSPDEQC(srcNodeID, dist, pred, csr=None):
+    """ native CalculateSSSPDEQIII() in SimpleDequeC
+
+    The whole label correcting loop runs in C on the CSR arrays through the
+    buffer protocol and releases the GIL, i.e., different source nodes can be
+    run on threads at the same time. dist and pred must be writable buffers
+    of double and int (e.g., array('d') and array('i')) with at least n
+    elements, which are all initialized by it. The CSR arrays are not checked
+    for each call, as they are checked once for each CSRGraph (see
+    CSRGraph.FromArrays()).
+
+    The results are exactly the same as CalculateSSSPDEQIII().
+    """
+    offsets, heads, lens = _GetCSRArrays(csr)
+    SimpleDequeC.sssp_deq(srcNodeID, offsets, heads, lens, dist, pred)
+
+
+def CalculateSSSPDijkstraC(srcNodeID, dist, pred, csr=None):
+    """ native CalculateSSSPDijkstraII() in SimpleDequeC
+
+    The binary heap pops entries in the same order of (key, node) as heapq.
+    The requirements on dist and pred are the same as CalculateSSSPDEQC(),
+    and the results are exactly the same as CalculateSSSPDijkstraII(). Link
+    lengths must be nonnegative as its heap is sized for nodes settled only
+    once, and ValueError is raised if it would overflow.
+    """
+    offsets, heads, lens = _GetCSRArrays(csr)
+    SimpleDequeC.sssp_dijkstra(srcNodeID, offsets, heads, lens, dist, pred)
+
+
+def CalculateSSSP(srcNodeID, numNode, dist, pred, method='dij', csr=None,
+                  ws=None, scale=None):
+    """ Single Source Shortest Path (SSSP) using the implementation of method.
+
+    Please choose one of the implementations in SSSP_METHODS: dij, deq, fifo,
+    dial, radix, slf, lll, threshold. Link lengths are scaled to integers by
+    scale for dial and radix, which is chosen automatically if None (see
+    GetScaledLens()).
+
+    ws is an optional SSSPWorkspace, which avoids allocating the status array
+    and scan eligible list for each call. It is reset at the beginning of each
+    call, and dist and pred are usually ws.dist and ws.pred.
+    """
+    method_ = method.lower()
+    if method_.startswith('dij'):
+        # CalculateSSSPDijkstraI(srcNodeID, numNode, dist, pred, csr, ws)
+        # CalculateSSSPDijkstraIII(srcNodeID, numNode, dist, pred, 4, csr, ws)
+        CalculateSSSPDijkstraII(srcNodeID, dist, pred, csr, ws)
+    elif method_.startswith('deq'):
+        # CalculateSSSPDEQI(srcNodeID, numNode, dist, pred, csr, ws)
+        # CalculateSSSPDEQII(srcNodeID, numNode, dist, pred, csr, ws)
+        CalculateSSSPDEQIII(srcNodeID, numNode, dist, pred, csr, ws)
+    elif method_.startswith('fifo'):
+        CalculateSSSPFIFOI(srcNodeID, dist, pred, csr, ws)
+        # CalculateSSSPFIFOII(srcNodeID, numNode, dist, pred, csr, ws)
+    elif method_.startswith('dial'):
+        CalculateSSSPDial(srcNodeID, numNode, dist, pred, scale, csr, ws)
+    elif method_.startswith('radix'):
+        CalculateSSSPRadix(srcNodeID, numNode, dist, pred, scale, csr, ws)
+    elif method_.startswith('slf'):
+        CalculateSSSPSLF(srcNodeID, numNode, dist, pred, csr, ws)
+    elif method_.startswith('lll'):
+        CalculateSSSPLLL(srcNodeID, numNode, dist, pred, csr, ws)
+    elif method_.startswith('threshold'):
+        CalculateSSSPThreshold(srcNodeID, numNode, dist, pred, 0.5, csr, ws)
+    else:
+        raise Exception('Please choose correct shortest path algorithm: '
+                        +'; '.join(SSSP_METHODS)+'.')
+
+
+def SelectSSSPMethod(srcNodeIDs, candidates=AUTO_CANDIDATES, csr=None,
+                     ws=None):
+    """ return the fastest one of candidates (methods in SSSP_METHODS) on
+    csr (the current network if None) from srcNodeIDs and the records of all
+    of them
+
+    Each candidate runs from every node of srcNodeIDs in turn, i.e., they are
+    interleaved rather than one after another to be affected by warm-up or
+    system load equally. records[method] is a dict of its total running time
+    and number of node scans, which are counted by a separate untimed run
+    through ScanCounter.
+    """
+    if csr is None:
+        csr = GetCSRGraph()
+    if ws is None:
+        ws = SSSPWorkspace(csr.numNode)
+
+    numNode = csr.numNode
+    records = {m: {'time': 0, 'scans': 0} for m in candidates}
+    for s in srcNodeIDs:
+        for m in candidates:
+            st = perf_counter()
+            CalculateSSSP(s, numNode, ws.dist, ws.pred, m, csr, ws)
+            records[m]['time'] += perf_counter() - st
+
+    counter = ScanCounter(csr.offsets)
+    csr_ = CSRGraph.FromArrays(counter, csr.heads, csr.lens, csr.linkIDs,
+                               check=False)
+    # share integer link lengths (if any) rather than scaling them again
+    csr_.scaledLens = csr.scaledLens
+    for m in candidates:
+        counter.count = 0
+        for s in srcNodeIDs:
+            CalculateSSSP(s, numNode, ws.dist, ws.pred, m, csr_, ws)
+        records[m]['scans'] = counter.count // 2
+
+    method = min(candidates, key=lambda m: records[m]['time'])
+    return method, records
+
+
+def _GetAPSPMethod(method, csr):
+    """ return method in lower case, or the one selected by SelectSSSPMethod()
+    on AUTO_SAMPLE_SIZE source nodes evenly spread over csr if it is auto
+    """
+    method_ = method.lower()
+    if method_ != 'auto':
+        return method_
+
+    step = max(csr.numNode // AUTO_SAMPLE_SIZE, 1)
+    srcNodeIDs = range(0, csr.numNode, step)[:AUTO_SAMPLE_SIZE]
+    method_, records = SelectSSSPMethod(srcNodeIDs, csr=csr)
+    for m, r in records.items():
+        print('{0}\t: {1: .4f} s; {2} scans'.format(m, r['time'],
+                                                    r['scans']))
+    print('Method selected by auto\t: '+method_)
+
+    return method_
+
+
+def CalculateSSSPCached(srcNodeID, cache, method='dij', ws=None):
+    """ return distance labels and predecessors from srcNodeID on the current
+    network as arrays, which are taken from SPTCache cache if possible
+
+    Otherwise, they are calculated by CalculateSSSP() using method and put
+    into cache. The returned arrays are shared with cache and must not be
+    modified. ws is an optional SSSPWorkspace for the calculation.
+    """
+    version = GetNetworkVersion()
+    spt = cache.Get(srcNodeID, version)
+    if spt is not None:
+        return spt
+
+    csr = GetCSRGraph()
+    if ws is None:
+        ws = SSSPWorkspace(csr.numNode)
+    CalculateSSSP(srcNodeID, csr.numNode, ws.dist, ws.pred, method, csr, ws)
+    return cache.Put(srcNodeID, version, ws.dist, ws.pred)
+
+
+def BenchmarkSPTCache(budgets=(1<<20, 1<<22, 1<<24), numQuery=5000,
+                      numOrigin=500, skew=1.0, method='dij', seed=0):
+    """ compare CalculateSSSPCached() with SPTCache of each size in budgets
+    (in bytes) with CalculateSSSP() on the current network
+
+    Origins of numQuery queries are drawn from numOrigin random nodes, where
+    the k-th one is chosen with probability proportional to 1/k^skew. It
+    checks that all of them give the same distance labels and returns the
+    running times and the stats of each SPTCache as a dict keyed by None (no
+    cache) or budget.
+    """
+    csr = GetCSRGraph()
+    numNode = csr.numNode
+    rng = Random(seed)
+    origins = [rng.randrange(numNode) for _ in range(numOrigin)]
+    weights = [1 / (k + 1) ** skew for k in range(numOrigin)]
+    queries = rng.choices(origins, weights, k=numQuery)
+    dests = [rng.randrange(numNode) for _ in range(numQuery)]
+
+    ws = SSSPWorkspace(numNode)
+    st = time()
+    ref = []
+    for s, t in zip(queries, dests):
+        CalculateSSSP(s, numNode, ws.dist, ws.pred, method, csr, ws)
+        ref.append(ws.dist[t])
+    stats = {None: (time() - st, None)}
+
+    for b in budgets:
+        cache = SPTCache(b)
+        st = time()
+        for s, t, d in zip(queries, dests, ref):
+            dist, _ = CalculateSSSPCached(s, cache, method, ws)
+            if dist[t] != d:
+                raise Exception('INCONSISTENT RESULTS FOUND between cached '
+                                +'and uncached SSSP!!')
+        stats[b] = (time() - st, cache.GetStats())
+
+    for k, (t, cs) in stats.items():
+        if k is None:
+            print('no cache\t: {0: .2f} s'.format(t))
+        else:
+            print('{0} KB\t: {1: .2f} s, hit rate {2: .1%}, {3} evictions'
+                  .format(k >> 10, t, cs['hitRate'], cs['evictions']))
+
+    return stats
+
+
+def _CalculateSSSPFIFOStats(srcNodeID, dist, pred, csr, ws, stats):
+    """ instrumented CalculateSSSPFIFOI() with the same scan order """
+    st = perf_counter()
+    offsets, heads, lens = csr.GetArrays()
+    touched = _ResetWorkspace(srcNodeID, ws)
+    status = ws.status
+    dist[srcNodeID] = 0
+    selist = collections.deque()
+    selist.append(srcNodeID)
+    status[srcNodeID] = 1
+    scans = relaxations = updates = reinsertions = 0
+    size = maxSize = 1
+    t = perf_counter()
+    stats.times['reset'] += t - st
+    # label correcting
+    while selist:
+        i = selist.popleft()
+        size -= 1
+        # 2 indicates node i has been scanned and is no longer in selist
+        status[i] = 2
+        scans += 1
+        relaxations += offsets[i+1] - offsets[i]
+        for k in range(offsets[i], offsets[i+1]):
+            j = heads[k]
+            if dist[j] > dist[i] + lens[k]:
+                if pred[j] == -1:
+                    touched.append(j)
+                dist[j] = dist[i] + lens[k]
+                pred[j] = i
+                updates += 1
+                if status[j] != 1:
+                    if status[j] == 2:
+                        reinsertions += 1
+                    selist.append(j)
+                    status[j] = 1
+                    size += 1
+                    if size > maxSize:
+                        maxSize = size
+
+    stats.times['search'] += perf_counter() - t
+    return scans, relaxations, updates, reinsertions, 0, maxSize
+
+
+def _CalculateSSSPDEQStats(srcNodeID, dist, pred, csr, ws, stats):
+    """ instrumented CalculateSSSPDEQIII() with the same scan order """
+    st = perf_counter()
+    offsets, heads, lens = csr.GetArrays()
+    touched = _ResetWorkspace(srcNodeID, ws)
+    dist[srcNodeID] = 0
+    selist = ws.GetSEList(SpecialDequePy, csr.numNode)
+    selist.append(srcNodeID)
+    scans = relaxations = updates = reinsertions = 0
+    size = maxSize = 1
+    t = perf_counter()
+    stats.times['reset'] += t - st
+    # label correcting
+    while selist:
+        i = selist.popleft()
+        size -= 1
+        scans += 1
+        relaxations += offsets[i+1] - offsets[i]
+        for k in range(offsets[i], offsets[i+1]):
+            j = heads[k]
+            if dist[j] > dist[i] + lens[k]:
+                if pred[j] == -1:
+                    touched.append(j)
+                dist[j] = dist[i] + lens[k]
+                pred[j] = i
+                updates += 1
+                if selist.pastnode(j):
+                    selist.appendleft(j)
+                    reinsertions += 1
+                elif selist.newnode(j):
+                    selist.append(j)
+                else:
+                    continue
+                size += 1
+                if size > maxSize:
+                    maxSize = size
+
+    stats.times['search'] += perf_counter() - t
+    return scans, relaxations, updates, reinsertions, 0, maxSize
+
+
+def _CalculateSSSPDijkstraStats(srcNodeID, dist, pred, csr, ws, stats):
+    """ instrumented CalculateSSSPDijkstraII() without early termination """
+    st = perf_counter()
+    offsets, heads, lens = csr.GetArrays()
+    touched = _ResetWorkspace(srcNodeID, ws)
+    dist[srcNodeID] = 0
+    selist = [(0, srcNodeID)]
+    scans = relaxations = updates = reinsertions = staleEntries = 0
+    maxSize = 1
+    t = perf_counter()
+    stats.times['reset'] += t - st
+    # label setting
+    while selist:
+        (k, i) = heapq.heappop(selist)
+        if k > dist[i]:
+            staleEntries += 1
+            continue
+        scans += 1
+        relaxations += offsets[i+1] - offsets[i]
+        for p in range(offsets[i], offsets[i+1]):
+            j = heads[p]
+            if dist[j] > k + lens[p]:
+                if pred[j] == -1:
+                    touched.append(j)
+                else:
+                    reinsertions += 1
+                dist[j] = k + lens[p]
+                pred[j] = i
+                updates += 1
+                heapq.heappush(selist, (dist[j], j))
+                if len(selist) > maxSize:
+                    maxSize = len(selist)
+
+    stats.times['search'] += perf_counter() - t
+    return scans, relaxations, updates, reinsertions, staleEntries, maxSize
+
+
+def _CalculateSSSPBucketStats(srcNodeID, dist, pred, csr, ws, stats, radix):
+    """ instrumented CalculateSSSPDial() (or CalculateSSSPRadix() if radix is
+    True) with scaling factor from GetScaledLens()
+    """
+    st = perf_counter()
+    intLens, scale = GetScaledLens(None, csr)
+    if radix:
+        selist = ws.GetSEList(RadixHeapPy, max(intLens, default=0)
+                              * csr.numNode)
+    else:
+        selist = ws.GetSEList(BucketQueuePy, max(intLens, default=0))
+    offsets, heads, _ = csr.GetArrays()
+    touched = _ResetWorkspace(srcNodeID, ws)
+    dist[srcNodeID] = 0
+    selist.push(srcNodeID, 0)
+    scans = relaxations = updates = reinsertions = staleEntries = 0
+    maxSize = 1
+    t = perf_counter()
+    stats.times['reset'] += t - st
+    # label setting
+    while selist:
+        (k, i) = selist.pop()
+        if k != dist[i]:
+            staleEntries += 1
+            continue
+        scans += 1
+        relaxations += offsets[i+1] - offsets[i]
+        for p in range(offsets[i], offsets[i+1]):
+            j = heads[p]
+            if dist[j] > k + intLens[p]:
+                if pred[j] == -1:
+                    touched.append(j)
+                else:
+                    reinsertions += 1
+                dist[j] = k + intLens[p]
+                pred[j] = i
+                updates += 1
+                selist.push(j, dist[j])
+                if len(selist) > maxSize:
+                    maxSize = len(selist)
+
+    st = perf_counter()
+    stats.times['search'] += st - t
+    if scale != 1:
+        for i in touched:
+            dist[i] /= scale
+    stats.times['finalize'] += perf_counter() - st
+    return scans, relaxations, updates, reinsertions, staleEntries, maxSize
+
+
+def CalculateSSSPWithStats(srcNodeID, dist, pred, method='dij', csr=None,
+                           ws=None, stats=None):
+    """ instrumented SSSP with the same results as CalculateSSSP()
+
+    The counters and phase timers (see SSSPStats) of this run are added to
+    stats, which is returned. A new SSSPStats is created if stats is None.
+
+    Each method in STATS_METHODS has its own instrumented kernel, i.e., the
+    uninstrumented ones in CalculateSSSP() pay nothing for them. The running
+    times here are inflated by the counters and are only good for comparing
+    phases. For the other ones (slf, lll, and threshold), only their scans are
+    counted by SelectSSSPMethod().
+    """
+    if csr is None:
+        csr = GetCSRGraph()
+    if ws is None:
+        ws = SSSPWorkspace(csr.numNode)
+    if stats is None:
+        stats = SSSPStats()
+
+    method_ = method.lower()
+    if method_.startswith('dij'):
+        r = _CalculateSSSPDijkstraStats(srcNodeID, dist, pred, csr, ws, stats)
+    elif method_.startswith('deq'):
+        r = _CalculateSSSPDEQStats(srcNodeID, dist, pred, csr, ws, stats)
+    elif method_.startswith('fifo'):
+        r = _CalculateSSSPFIFOStats(srcNodeID, dist, pred, csr, ws, stats)
+    elif method_.startswith('dial'):
+        r = _CalculateSSSPBucketStats(srcNodeID, dist, pred, csr, ws, stats,
+                                      False)
+    elif method_.startswith('radix'):
+        r = _CalculateSSSPBucketStats(srcNodeID, dist, pred, csr, ws, stats,
+                                      True)
+    else:
+        raise Exception('Please choose correct shortest path algorithm: '
+                        +'; '.join(STATS_METHODS)+'.')
+
+    stats.numSearch += 1
+    stats.scans += r[0]
+    stats.relaxations += r[1]
+    stats.updates += r[2]
+    stats.reinsertions += r[3]
+    stats.staleEntries += r[4]
+    stats.maxQueueSize = max(stats.maxQueueSize, r[5])
+
+    return stats
+
+
+def ProfileSSSP(method='dij', srcNodeIDs=None):
+    """ run instrumented SSSP from each of srcNodeIDs (all nodes by default)
+    on the current network and return the accumulated SSSPStats
+    """
+    csr = GetCSRGraph()
+    ws = SSSPWorkspace(csr.numNode)
+    stats = SSSPStats()
+    if srcNodeIDs is None:
+        srcNodeIDs = range(csr.numNode)
+
+    for s in srcNodeIDs:
+        CalculateSSSPWithStats(s, ws.dist, ws.pred, method, csr, ws, stats)
+
+    return stats
+
+
+def _InitFWMatrices(csr):
+    """ set up the initial distance and predecessor matrices of Floyd-Warshall
+    from the CSR graph
+
+    Unreachable nodes have inf as distance label and -1 as predecessor. Only
+    the shortest one is kept for parallel links.
+    """
+    if np is None:
+        raise Exception('NumPy is REQUIRED for Floyd-Warshall Algorithm!!')
+
+    numNode = csr.numNode
+    dist = np.full((numNode, numNode), np.inf)
+    pred = np.full((numNode, numNode), -1, dtype=np.int32)
+
+    tails = np.repeat(np.arange(numNode, dtype=np.int32),
+                      np.diff(np.frombuffer(csr.offsets, dtype=np.int32)))
+    heads = np.frombuffer(csr.heads, dtype=np.int32)
+    lens = np.frombuffer(csr.lens, dtype=np.float64)
+    np.minimum.at(dist, (tails, heads), lens)
+    np.fill_diagonal(dist, 0)
+
+    # self loops are never part of any shortest path
+    linked = np.isfinite(dist)
+    np.fill_diagonal(linked, False)
+    pred[linked] = np.nonzero(linked)[0]
+
+    return dist, pred
+
+
+def _RelaxFWBlock(dist, pred, rows, cols, pivots):
+    """ update block dist[rows, cols] using each pivot node in pivots in turn
+
+    rows, cols, and pivots are all slices. The update on each pivot k is a
+    rank-1 update via np.minimum on dist[rows, k] + dist[k, cols].
+    """
+    distBlock = dist[rows, cols]
+    predBlock = pred[rows, cols]
+    for k in range(pivots.start, pivots.stop):
+        via = dist[rows, k, None] + dist[k, None, cols]
+        updated = via < distBlock
+        np.minimum(distBlock, via, out=distBlock)
+        np.copyto(predBlock, pred[k, None, cols], where=updated)
+
+
+def _RelaxFWBlockMinPlus(dist, pred, rows, cols, pivots):
+    """ update block dist[rows, cols] using all pivot nodes in pivots at once
+
+    It is only valid when dist[rows, pivots] and dist[pivots, cols] are NOT
+    affected by the update, i.e., the third phase of CalculateAPSPFWII(). The
+    update is then a min-plus product of the two blocks.
+    """
+    via = dist[rows, pivots, None] + dist[None, pivots, cols]
+    k = via.argmin(axis=1)
+    via = np.take_along_axis(via, k[:, None, :], axis=1)[:, 0, :]
+
+    distBlock = dist[rows, cols]
+    updated = via < distBlock
+    np.minimum(distBlock, via, out=distBlock)
+    via_ = pred[pivots, cols][k, np.arange(cols.stop - cols.start)]
+    np.copyto(pred[rows, cols], via_, where=updated)
+
+
+def CalculateAPSPFWI(csr=None):
+    """ Floyd-Warshall Algorithm vectorized by NumPy
+
+    For each pivot node k, the whole distance matrix is updated at once by
+
+        dist = min(dist, dist[:, k] + dist[k, :])
+
+    and pred[i, j] is replaced with pred[k, j] wherever dist[i, j] decreases.
+    The overall time complexity is still O(n^3) but the inner two loops are in
+    NumPy rather than Python.
+
+    It returns the n x n distance matrix (with inf for unreachable nodes) and
+    predecessor matrix (with -1 for unreachable nodes and the source nodes)
+    as NumPy arrays.
+    """
+    if csr is None:
+        csr = GetCSRGraph()
+
+    dist, pred = _InitFWMatrices(csr)
+    all_ = slice(0, csr.numNode)
+    _RelaxFWBlock(dist, pred, all_, all_, all_)
+
+    return dist, pred
+
+
+def CalculateAPSPFWII(blockSize=48, csr=None):
+    """ Blocked (tiled) Floyd-Warshall Algorithm vectorized by NumPy
+
+    Each rank-1 update in CalculateAPSPFWI() walks through the whole n x n
+    matrix, which falls out of cache on large networks. Here, the matrix is
+    divided into blockSize x blockSize blocks. For each diagonal block
+    (kb, kb), the pivot nodes of kb are applied
+
+        1. to block (kb, kb) itself;
+        2. to the blocks in row kb and column kb, which only depend on 1;
+        3. to all the remaining blocks, which only depend on 2.
+
+    All the updates on a block are done before moving to the next one so that
+    the block stays in cache. As the blocks in 3 do not depend on each other,
+    each of them is updated by one min-plus product over all pivot nodes of kb
+    rather than blockSize rank-1 updates. The default blockSize is tuned on
+    the Chicago Sketch Network. The returns are the same as CalculateAPSPFWI()
+    except that predecessors might differ between paths with the same length.
+    """
+    if csr is None:
+        csr = GetCSRGraph()
+
+    dist, pred = _InitFWMatrices(csr)
+    numNode = csr.numNode
+    blocks = [slice(i, min(i + blockSize, numNode))
+              for i in range(0, numNode, blockSize)]
+
+    for kb in blocks:
+        _RelaxFWBlock(dist, pred, kb, kb, kb)
+        for b in blocks:
+            if b is kb:
+                continue
+            _RelaxFWBlock(dist, pred, kb, b, kb)
+            _RelaxFWBlock(dist, pred, b, kb, kb)
+        for rb in blocks:
+            if rb is kb:
+                continue
+            for cb in blocks:
+                if cb is kb:
+                    continue
+                _RelaxFWBlockMinPlus(dist, pred, rb, cb, kb)
+
+    return dist, pred
+
+
+def _CreateAPSPMatrices(numNode, distType='d', mmapDir=None):
+    """ create dist_apsp and pred_apsp as TypedMatrix
+
+    distType is the typecode of distance labels, 'd' (float64) or 'f'
+    (float32). Predecessors are always int32 ('i'). Both are backed by
+    dist_apsp.bin and pred_apsp.bin under mmapDir if it is not None.
+    """
+    if distType not in ('d', 'f'):
+        raise Exception('Please choose correct type of distance labels: '
+                        +'d (float64); f (float32).')
+
+    global dist_apsp
+    global pred_apsp
+
+    dist_apsp = CreateTypedMatrix(numNode, distType, MAX_LABEL,
+                                  GetMatrixFileName(mmapDir, 'dist_apsp'))
+    pred_apsp = CreateTypedMatrix(numNode, 'i', -1,
+                                  GetMatrixFileName(mmapDir, 'pred_apsp'))
+
+
+def CalculateAPSP(method='dij', distType='d', mmapDir=None, scale=None):
     """ All Pair Shortest Paths (APSP) Algorithms.
 
-    Please choose one of the three implementations: fifo, deq, dij.
+    Please choose one of the implementations: fw, auto, or any one in
+    SSSP_METHODS (dij, deq, fifo, dial, radix, slf, lll, threshold). auto
+    picks the fastest one of AUTO_CANDIDATES on a few sampled source nodes
+    (see SelectSSSPMethod()) and uses it for all of them.
 
     All pair shortest paths can be calculated by:
         1. repeated Single-Source Shortest Path Algorithms
         2. Floyd-Warshall Algorithm
+
+    dist_apsp and pred_apsp are TypedMatrix of distType (float64 by default)
+    and int32, where unreachable nodes have MAX_LABEL (i.e., inf) and -1. They
+    are memory-mapped to files under mmapDir if it is specified. See
+    _CreateAPSPMatrices() for details. scale is passed to CalculateSSSP() for
+    dial and radix.
+
+    See CalculateAPSPParallel() for the parallel version of 1.
     """
     st = time()
 
     # initialization
-    global dist_apsp
-    global pred_apsp
-
     numNode = GetNumNodes()
-    dist_apsp = [[MAX_LABEL]*numNode for _ in range(numNode)]
-    pred_apsp = [[-1]*numNode for _ in range(numNode)]
+    _CreateAPSPMatrices(numNode, distType, mmapDir)
 
-    if method.lower().startswith('dij'):
-        for i in range(numNode):
-            # CalculateSSSPDijkstraI(i, numNode, dist_apsp[i], pred_apsp[i])
-            CalculateSSSPDijkstraII(i, dist_apsp[i], pred_apsp[i])
-    elif method.lower().startswith('deq'):
-        for i in range(numNode):
-            # CalculateSSSPDEQI(i, numNode, dist_apsp[i], pred_apsp[i])
-            # CalculateSSSPDEQII(i, numNode, dist_apsp[i], pred_apsp[i])
-            CalculateSSSPDEQIII(i, numNode, dist_apsp[i], pred_apsp[i])
-    elif method.lower().startswith('fifo'):
+    csr = GetCSRGraph()
+    method_ = _GetAPSPMethod(method, csr)
+    if method_.startswith(SSSP_METHODS):
+        # use lists of ws rather than rows of dist_apsp and pred_apsp for fast
+        # element access and full precision during label correcting, which
+        # are reused by all source nodes
+        ws = SSSPWorkspace(numNode)
         for i in range(numNode):
-            CalculateSSSPFIFOI(i, dist_apsp[i], pred_apsp[i])
-            # CalculateSSSPFIFOII(i, numNode, dist_apsp[i], pred_apsp[i])
-    elif method.lower().startswith('fw'):
-        # do nothing
-        print("not implemented yet")
+            CalculateSSSP(i, numNode, ws.dist, ws.pred, method_, csr, ws,
+                          scale)
+            dist_apsp.SetRow(i, ws.dist)
+            pred_apsp.SetRow(i, ws.pred)
+    elif method_.startswith('fw'):
+        # dist, pred = CalculateAPSPFWI()
+        dist, pred = CalculateAPSPFWII()
+        dist_apsp.data[:] = memoryview(dist.astype(distType).ravel())
+        pred_apsp.data[:] = memoryview(pred.ravel())
     else:
         raise Exception('Please choose correct shortest path algorithm: '
-                        +'dij; deq; fifo; fw.')
+                        +'; '.join(SSSP_METHODS)+'; auto; fw.')
+
+    print('Processing time for SPP\t: {0: .2f}'.format(time() - st)+' s.')
+
+
+# states of each worker process for CalculateAPSPParallel(), which are set up
+# once by _InitAPSPWorker() rather than passed (and pickled) for each task
+_worker = {}
+
+
+def _InitAPSPWorker(csr, distName, predName, distType, method, scale):
+    """ attach the worker process to the shared distance and predecessor
+    matrices
+    """
+    numNode = csr.numNode
+    # keep the references to SharedMemory objects, or their buffers will be
+    # released
+    _worker['shm'] = (SharedMemory(name=distName),
+                      SharedMemory(name=predName))
+    _worker['dist'] = TypedMatrix(numNode, numNode, distType,
+                                  _worker['shm'][0].buf)
+    _worker['pred'] = TypedMatrix(numNode, numNode, 'i',
+                                  _worker['shm'][1].buf)
+    _worker['csr'] = csr
+    _worker['method'] = method
+    _worker['scale'] = scale
+
+
+def _CalculateAPSPBlock(srcNodeIDs):
+    """ calculate SSSP from each node of srcNodeIDs in a worker process and
+    write the results into the shared matrices directly
+    """
+    csr = _worker['csr']
+    method = _worker['method']
+    scale = _worker['scale']
+    distMat = _worker['dist']
+    predMat = _worker['pred']
+    numNode = csr.numNode
+
+    ws = SSSPWorkspace(numNode)
+    for i in srcNodeIDs:
+        CalculateSSSP(i, numNode, ws.dist, ws.pred, method, csr, ws, scale)
+        distMat.SetRow(i, ws.dist)
+        predMat.SetRow(i, ws.pred)
+
+
+def CalculateAPSPParallel(method='dij', numWorker=None, distType='d',
+                          mmapDir=None, scale=None):
+    """ Parallel All Pair Shortest Paths (APSP) using repeated SSSP.
+
+    Source nodes are split into blocks and distributed to a pool of numWorker
+    processes (os.cpu_count() by default). Each worker gets a read-only copy of
+    the CSR graph once and writes its distance labels and predecessors into
+    two n x n matrices in shared memory directly. Therefore, nothing but block
+    boundaries is pickled between processes.
+
+    dist_apsp and pred_apsp are exactly the same as those from
+    CalculateAPSP(method, distType, mmapDir, scale).
+
+    Please choose one of the implementations in SSSP_METHODS or auto, which is
+    resolved once by the main process before the workers start.
+    """
+    st = time()
+
+    csr = GetCSRGraph()
+    method_ = _GetAPSPMethod(method, csr)
+    if not method_.startswith(SSSP_METHODS):
+        raise Exception('Please choose correct shortest path algorithm: '
+                        +'; '.join(SSSP_METHODS)+'; auto.')
+
+    if numWorker is None:
+        numWorker = os.cpu_count()
+
+    numNode = csr.numNode
+    _CreateAPSPMatrices(numNode, distType, mmapDir)
+
+    # at least one byte is required for SharedMemory
+    size_ = max(numNode * numNode, 1)
+    shmDist = SharedMemory(create=True, size=size_*array(distType).itemsize)
+    shmPred = SharedMemory(create=True, size=size_*array('i').itemsize)
+    try:
+        # several blocks for each worker to balance their loads
+        blockSize = max(numNode // (numWorker * 4), 1)
+        blocks = [range(i, min(i + blockSize, numNode))
+                  for i in range(0, numNode, blockSize)]
+        initArgs = (csr, shmDist.name, shmPred.name, distType, method_,
+                    scale)
+        with Pool(numWorker, _InitAPSPWorker, initArgs) as pool:
+            pool.map(_CalculateAPSPBlock, blocks)
+
+        distMat = TypedMatrix(numNode, numNode, distType, shmDist.buf)
+        predMat = TypedMatrix(numNode, numNode, 'i', shmPred.buf)
+        dist_apsp.data[:] = distMat.data
+        pred_apsp.data[:] = predMat.data
+        distMat.Close()
+        predMat.Close()
+    finally:
+        shmDist.close()
+        shmDist.unlink()
+        shmPred.close()
+        shmPred.unlink()
+
+    print('Processing time for SPP with {0} workers\t: {1: .2f}'
+          .format(numWorker, time() - st)+' s.')
+
+
+def BenchmarkAPSPParallel(method='dij', numWorkers=(1, 2, 4, 8)):
+    """ report the speedup of CalculateAPSPParallel() over CalculateAPSP()
+    for each number of workers in numWorkers
+
+    It also checks that the parallel results are exactly the same as the serial
+    ones and returns the speedups as a dict keyed by the number of workers.
+    """
+    st = time()
+    CalculateAPSP(method)
+    t0 = time() - st
+    dist_ = dist_apsp
+    pred_ = pred_apsp
+
+    speedups = {}
+    for n in numWorkers:
+        st = time()
+        CalculateAPSPParallel(method, n)
+        t = time() - st
+        if dist_apsp != dist_ or pred_apsp != pred_:
+            raise Exception('INCONSISTENT RESULTS FOUND between SERIAL and '
+                            +'PARALLEL APSP with '+str(n)+' workers!!')
+        speedups[n] = t0 / t
+        print('Speedup with {0} workers\t: {1: .2f}'.format(n, speedups[n]))
+
+    return speedups
+
+
+def _InitAPSPStreamWorker(csr, method, scale):
+    """ set up the worker process for IterateAPSP() """
+    _worker['csr'] = csr
+    _worker['method'] = method
+    _worker['scale'] = scale
+
+
+def _CalculateAPSPRows(srcNodeIDs):
+    """ calculate SSSP from each node of srcNodeIDs in a worker process and
+    return the rows as arrays, which are much cheaper to pickle than lists
+    """
+    csr = _worker['csr']
+    method = _worker['method']
+    scale = _worker['scale']
+    numNode = csr.numNode
+
+    rows = []
+    ws = SSSPWorkspace(numNode)
+    for i in srcNodeIDs:
+        CalculateSSSP(i, numNode, ws.dist, ws.pred, method, csr, ws, scale)
+        rows.append((i, array('d', ws.dist), array('i', ws.pred)))
+
+    return rows
+
+
+def IterateAPSP(method='dij', numWorker=1, blockSize=64, scale=None):
+    """ generate the distance labels and predecessors from each source node
+    in order of internal node id as (srcNodeID, dist, pred)
+
+    Different from CalculateAPSP(), only a few rows are held in memory at a
+    time rather than the n x n matrices. Please choose one of the
+    implementations in SSSP_METHODS or auto (see CalculateAPSP()). scale is
+    passed to CalculateSSSP() for dial and radix.
+
+    If numWorker is 1, dist and pred are lists reused by the next row. Please
+    copy them if they are needed afterward. Otherwise, source nodes are split
+    into blocks of blockSize and distributed to a pool of numWorker processes
+    (os.cpu_count() if None), which return dist and pred as arrays.
+    """
+    csr = GetCSRGraph()
+    method_ = _GetAPSPMethod(method, csr)
+    if not method_.startswith(SSSP_METHODS):
+        raise Exception('Please choose correct shortest path algorithm: '
+                        +'; '.join(SSSP_METHODS)+'; auto.')
+
+    numNode = csr.numNode
+    if numWorker == 1:
+        ws = SSSPWorkspace(numNode)
+        for i in range(numNode):
+            CalculateSSSP(i, numNode, ws.dist, ws.pred, method_, csr, ws,
+                          scale)
+            yield i, ws.dist, ws.pred
+        return
+
+    if numWorker is None:
+        numWorker = os.cpu_count()
+
+    blocks = [range(i, min(i + blockSize, numNode))
+              for i in range(0, numNode, blockSize)]
+    initArgs = (csr, method_, scale)
+    with Pool(numWorker, _InitAPSPStreamWorker, initArgs) as pool:
+        # only a few blocks are submitted ahead rather than all of them so
+        # that finished rows never pile up in memory
+        pending = collections.deque()
+        for b in blocks:
+            pending.append(pool.apply_async(_CalculateAPSPRows, (b,)))
+            if len(pending) > 2 * numWorker:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+
+def StreamAPSP(sinks, method='dij', numWorker=1, scale=None):
+    """ All Pair Shortest Paths (APSP) streamed to sinks
+
+    Each row from IterateAPSP(method, numWorker, scale=scale) is passed to
+    every sink of sinks through sink.Write(srcNodeID, dist, pred) as soon as
+    it is done, and sink.Close() is called at the end. See sinks.py for the
+    available ones.
+
+    Neither dist_apsp nor pred_apsp is touched.
+    """
+    st = time()
+
+    try:
+        for i, dist, pred in IterateAPSP(method, numWorker, scale=scale):
+            for sink in sinks:
+                sink.Write(i, dist, pred)
+    finally:
+        for sink in sinks:
+            sink.Close()
+
+    print('Processing time for SPP\t: {0: .2f}'.format(time() - st)+' s.')
+
+
+def _UpdateSSSP(srcNodeID, dist, pred, incLinks, decLinks, csr, csrRev):
+    """ repair the shortest path tree from srcNodeID given by dist and pred
+    after link lengths change, and return the set of relabeled nodes
+
+    incLinks and decLinks are lists of (tail, head, new length) of the links
+    whose lengths are increased and decreased, where csr and csrRev already
+    have the new lengths.
+
+    It follows the dynamic SSSP algorithm by Ramalingam and Reps (1996).
+        1. The nodes on the subtrees rooted at the heads of increased tree
+           links are affected. Each of them is relabeled by its best incoming
+           link from the unaffected nodes.
+        2. The heads of decreased links are relabeled if the links give
+           shorter paths.
+        3. Dijkstra's algorithm from all relabeled nodes propagates the
+           changes until no label can be improved.
+    All other nodes keep their distance labels and predecessors.
+    """
+    numNode = csr.numNode
+    offsets, heads, lens = csr.GetArrays()
+    affected = []
+    roots = [j for i, j, _ in incLinks if pred[j] == i]
+    if roots:
+        children = [[] for _ in range(numNode)]
+        for j in range(numNode):
+            if pred[j] != -1:
+                children[pred[j]].append(j)
+        status = [0] * numNode
+        stack = roots
+        while stack:
+            i = stack.pop()
+            if status[i]:
+                continue
+            status[i] = 1
+            affected.append(i)
+            stack.extend(children[i])
+
+    for j in affected:
+        dist[j] = MAX_LABEL
+        pred[j] = -1
+
+    selist = []
+    relabeled = set(affected)
+    for j in affected:
+        # the distance labels of affected nodes are all MAX_LABEL
+        for p in range(csrRev.offsets[j], csrRev.offsets[j+1]):
+            i = csrRev.heads[p]
+            if dist[j] > dist[i] + csrRev.lens[p]:
+                dist[j] = dist[i] + csrRev.lens[p]
+                pred[j] = i
+        if dist[j] < MAX_LABEL:
+            heapq.heappush(selist, (dist[j], j))
+
+    for i, j, len_ in decLinks:
+        if dist[j] > dist[i] + len_:
+            dist[j] = dist[i] + len_
+            pred[j] = i
+            heapq.heappush(selist, (dist[j], j))
+            relabeled.add(j)
+
+    # label setting
+    while selist:
+        (k, i) = heapq.heappop(selist)
+        if k > dist[i]:
+            continue
+        for p in range(offsets[i], offsets[i+1]):
+            j = heads[p]
+            if dist[j] > k + lens[p]:
+                dist[j] = k + lens[p]
+                pred[j] = i
+                heapq.heappush(selist, (dist[j], j))
+                relabeled.add(j)
+
+    return relabeled
+
+
+def UpdateAPSP(linkLens):
+    """ update link lengths and repair dist_apsp and pred_apsp incrementally
+
+    linkLens is a dict of new link lengths keyed by internal link ids. See
+    _UpdateSSSP() for the dynamic SSSP algorithm applied to each source node.
+    Only the rows whose shortest path trees can be changed are read and
+    rewritten, i.e., those with an increased link on the tree or a decreased
+    link giving a shorter path.
+
+    It returns the total number of relabeled nodes over all source nodes,
+    which is n x n for a full recompute by CalculateAPSP().
+    """
+    if len(dist_apsp) != GetNumNodes():
+        raise Exception('PLEASE RUN CalculateAPSP() BEFORE UpdateAPSP()!!')
+
+    st = time()
+
+    # make sure that both CSR graphs are built before updating link lengths
+    csr = GetCSRGraph()
+    csrRev = GetReverseCSRGraph()
+    incLinks = []
+    decLinks = []
+    for k, len_ in linkLens.items():
+        link = GetLink(k)
+        if link is None:
+            raise Exception('LINK '+str(k)+' NOT EXIST!!')
+        oldLen = link.GetLen()
+        SetLinkLen(k, len_)
+        if len_ > oldLen:
+            incLinks.append((link.origNodeID, link.destNodeID, len_))
+        elif len_ < oldLen:
+            decLinks.append((link.origNodeID, link.destNodeID, len_))
+
+    numNode = csr.numNode
+    numRelabeled = 0
+    numRow = 0
+    for s in range(numNode):
+        dist = dist_apsp[s]
+        pred = pred_apsp[s]
+        if (not any(pred[j] == i for i, j, _ in incLinks)
+            and not any(dist[j] > dist[i] + l for i, j, l in decLinks)):
+            continue
+
+        dist = dist.tolist()
+        pred = pred.tolist()
+        relabeled = _UpdateSSSP(s, dist, pred, incLinks, decLinks, csr,
+                                csrRev)
+        dist_apsp.SetRow(s, dist)
+        pred_apsp.SetRow(s, pred)
+        numRelabeled += len(relabeled)
+        numRow += 1
+
+    print('Processing time for APSP update\t: {0: .2f}'.format(time() - st)
+          +' s.')
+    print('Number of updated rows\t: '+str(numRow)+' out of '+str(numNode))
+    print('Number of relabeled nodes\t: '+str(numRelabeled)+' vs '
+          +str(numNode * numNode)+' by full recompute')
+
+    return numRelabeled
+
+
+def _GetHeapqMaxSize(srcNodeID, numNode, csr):
+    """ return the maximum heap size of CalculateSSSPDijkstraII() """
+    offsets, heads, lens = csr.GetArrays()
+    dist = [MAX_LABEL] * numNode
+    dist[srcNodeID] = 0
+    selist = [(0, srcNodeID)]
+    maxSize = 1
+    while selist:
+        (k, i) = heapq.heappop(selist)
+        for p in range(offsets[i], offsets[i+1]):
+            j = heads[p]
+            if dist[j] > k + lens[p]:
+                dist[j] = k + lens[p]
+                heapq.heappush(selist, (dist[j], j))
+                if len(selist) > maxSize:
+                    maxSize = len(selist)
+
+    return maxSize
+
+
+def _GetIndexedHeapMaxSize(srcNodeID, numNode, d, csr):
+    """ return the maximum heap size of CalculateSSSPDijkstraIII() """
+    offsets, heads, lens = csr.GetArrays()
+    dist = [MAX_LABEL] * numNode
+    dist[srcNodeID] = 0
+    selist = IndexedHeapPy(numNode, d)
+    selist.push(srcNodeID, 0)
+    while selist:
+        i = selist.pop()
+        for k in range(offsets[i], offsets[i+1]):
+            j = heads[k]
+            if dist[j] > dist[i] + lens[k]:
+                dist[j] = dist[i] + lens[k]
+                selist.push(j, dist[j])
+
+    return selist.maxSize
+
+
+def BenchmarkDijkstraHeaps(ds=(2, 4, 8), numSource=100, seed=0):
+    """ compare CalculateSSSPDijkstraIII() using indexed d-ary heaps with
+    CalculateSSSPDijkstraII() using heapq on random source nodes of the
+    current network
+
+    It checks that all of them give the same distance labels, and reports the
+    running times and the average maximum heap sizes, which are also returned
+    as a dict keyed by heapq or d.
+    """
+    csr = GetCSRGraph()
+    numNode = csr.numNode
+    rng = Random(seed)
+    srcNodeIDs = [rng.randrange(numNode) for _ in range(numSource)]
+
+    st = time()
+    distRef = []
+    for s in srcNodeIDs:
+        dist = [MAX_LABEL] * numNode
+        pred = [-1] * numNode
+        CalculateSSSPDijkstraII(s, dist, pred, csr)
+        distRef.append(dist)
+    t = time() - st
+    maxSize = sum(_GetHeapqMaxSize(s, numNode, csr) for s in srcNodeIDs)
+    stats = {'heapq': (t, maxSize / numSource)}
+
+    for d in ds:
+        st = time()
+        maxSize = 0
+        for s, ref in zip(srcNodeIDs, distRef):
+            dist = [MAX_LABEL] * numNode
+            pred = [-1] * numNode
+            CalculateSSSPDijkstraIII(s, numNode, dist, pred, d, csr)
+            if dist != ref:
+                raise Exception('INCONSISTENT RESULTS FOUND between heapq '
+                                +'and '+str(d)+'-ary heap!!')
+        t = time() - st
+        # heap sizes are measured separately from running times
+        for s in srcNodeIDs:
+            maxSize += _GetIndexedHeapMaxSize(s, numNode, d, csr)
+        stats[d] = (t, maxSize / numSource)
+
+    for k, v in stats.items():
+        name = 'heapq' if k == 'heapq' else str(k)+'-ary heap'
+        print('{0}\t: {1: .2f} s, max heap size {2: .1f}'
+              .format(name, v[0], v[1]))
 
-    print('Processing time for SPP\t: {0: .2f}'.format(time() - st)+' s.')
\ No newline at end of file
+    return stats
@@ -5,12 +5,27 @@
 
 
 import csv
-from sys import maxsize
-from classes import Link, Node
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import islice, zip_longest
+from math import asin, cos, inf, isnan, nan, radians, sin, sqrt
+from random import Random
 
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is only required by ReadNetworkBulk()
+    np = None
 
-# maximum or infinite number used to initialize distance labels
-MAX_LABEL = maxsize
+from classes import CSRGraph, GraphCache, Link, Node, TypedMatrix
+
+
+# infinite number used to initialize distance labels
+MAX_LABEL = inf
 # distance labels for APSP
 dist_apsp = []
 # predecessors for APSP
@@ -21,6 +36,39 @@ _dict_nodes = {}
 _dict_links = {}
 # map user-defined node id to internal node id
 _map_uid_id = {}
+# CSR representation of the network built from _dict_nodes and _dict_links
+_csr_graph = None
+# CSR representation of the reverse network for backward searches
+_csr_graph_rev = None
+# x and y coordinates of each node indexed by internal node id
+_x_coords = array('d')
+_y_coords = array('d')
+# scaling factors keeping each heuristic admissible on the current network
+_heuristic_scales = {}
+# mean earth radius in km for the haversine distance
+EARTH_RADIUS = 6371.0
+# network loaded from a binary cache file, see ReadNetwork()
+_graph_cache = None
+# version of the current network, which is increased whenever the network is
+# replaced or rebuilt or any link length is changed, see GetNetworkVersion()
+_network_version = 0
+# node orderings available to ReorderNodes()
+NODE_ORDERS = ('bfs', 'dfs', 'rcm', 'hilbert', 'random')
+
+# file format of SaveGraphCache(): a header of magic, version, byte order,
+# delimiter, numNode, numLink, and size, mtime, and SHA-1 of the node file and
+# the link file, a table of (offset, size) of each section, and sections of
+# the following typecodes aligned on 8 bytes:
+#   offsets, heads, lens, and linkIDs of the CSR graph,
+#   offsets, heads, lens, and linkIDs of the reverse CSR graph,
+#   position of each link in the CSR graph,
+#   x and y coordinates,
+#   offsets and UTF-8 bytes of node UIDs, offsets and UTF-8 bytes of link UIDs
+GRAPH_CACHE_MAGIC = b'SPG\0'
+GRAPH_CACHE_VERSION = 1
+GRAPH_CACHE_HEADER = struct.Struct('<4sIcc2xqqqq20sqq20s')
+GRAPH_CACHE_SECTIONS = ('i', 'i', 'd', 'i', 'i', 'i', 'd', 'i', 'i', 'd', 'd',
+                        'q', 'B', 'q', 'B')
 
 
 def ReadLinks(fileName, delimiter_=','):
@@ -44,8 +92,13 @@ def ReadLinks(fileName, delimiter_=','):
             _dict_links[linkID] = pLink
             # update outgoing links from orig node
             _dict_nodes[origNodeID].AddOutgoingLinks(linkID)
+            # update incoming links to dest node
+            _dict_nodes[destNodeID].AddIncomingLinks(linkID)
             linkID += 1
 
+    BuildCSRGraph()
+    _heuristic_scales.clear()
+
 
 def ReadNodes(fileName, delimiter_=','):
     """ read node input file and set up node objects.
@@ -54,8 +107,15 @@ def ReadNodes(fileName, delimiter_=','):
     Internal node IDs are consecutive non-negative integers starting from 0 as
     required by initializations of dist_apsp and pred_apsp.
 
+    x_coord and y_coord (i.e., the second and the third columns) are kept in
+    two arrays for goal-directed searches. They are nan if not available.
+
     See CalculateAPSP(method='dij') for details.
     """
+    # any existing network (including the one loaded from cache) is replaced
+    # rather than appended to. See engine.Graph for multiple networks.
+    _ClearNetwork()
+
     with open(fileName) as f:
         # skip the header
         next(f)
@@ -70,32 +130,313 @@ def ReadNodes(fileName, delimiter_=','):
                 _map_uid_id[nodeUID] = nodeID
             else:
                 raise Exception('DUPLICATE NODE ID FOUND: '+nodeUID)
+            try:
+                x, y = float(r[1]), float(r[2])
+            except (IndexError, ValueError):
+                x, y = nan, nan
+            _x_coords.append(x)
+            _y_coords.append(y)
             nodeID += 1
 
 
+def BuildCSRGraph():
+    """ build the CSR graph from the current node and link objects.
+
+    It is called by ReadLinks() automatically. Node and Link objects are only
+    kept for user-defined id lookups after that.
+
+    The CSR graph of the reverse network is reset and will be built on demand.
+    See GetReverseCSRGraph().
+    """
+    global _csr_graph
+    global _csr_graph_rev
+    global _network_version
+    links = [GetLink(k) for k in range(GetNumLinks())]
+    _csr_graph = CSRGraph(GetNumNodes(), links)
+    _csr_graph_rev = None
+    _network_version += 1
+    return _csr_graph
+
+
+def GetNetworkVersion():
+    """ return the version of the current network
+
+    Any result calculated on the current network (e.g., shortest path trees
+    in SPTCache) is out of date once it changes.
+    """
+    return _network_version
+
+
+def GetCSRGraph():
+    """ get the CSR graph of the current network and build it if necessary """
+    if _csr_graph is None:
+        return BuildCSRGraph()
+
+    return _csr_graph
+
+
+def CreateTypedMatrix(numNode, typecode, initVal, fileName=None):
+    """ create a numNode x numNode TypedMatrix with all elements as initVal.
+
+    The matrix is held in memory if fileName is None. Otherwise, it is backed
+    by fileName through mmap, which will be created or overwritten, so that
+    its size is not limited by RAM.
+    """
+    row = array(typecode, [initVal] * numNode)
+    size_ = len(row) * row.itemsize * numNode
+
+    if fileName is None:
+        buf = bytearray(size_)
+    else:
+        # mmap cannot map an empty file, which is padded to one element
+        size_ = max(size_, row.itemsize)
+        with open(fileName, 'w+b') as f:
+            f.truncate(size_)
+            buf = mmap.mmap(f.fileno(), size_)
+
+    m = TypedMatrix(numNode, numNode, typecode, buf)
+    for i in range(numNode):
+        m.SetRow(i, row)
+
+    return m
+
+
+def GetMatrixFileName(dirName, name):
+    """ return the file backing matrix name under dirName or None if dirName
+    is None
+    """
+    if dirName is None:
+        return None
+
+    return os.path.join(dirName, name+'.bin')
+
+
+def GetNodeCoords():
+    """ return the arrays of x and y coordinates indexed by internal node
+    id
+    """
+    return _x_coords, _y_coords
+
+
+def GetEuclideanDist(x1, y1, x2, y2):
+    """ Euclidean distance between (x1, y1) and (x2, y2) """
+    return sqrt((x1 - x2) ** 2 + (y1 - y2) ** 2)
+
+
+def GetHaversineDist(x1, y1, x2, y2):
+    """ great-circle distance in km between (x1, y1) and (x2, y2), where x is
+    longitude and y is latitude in degrees
+    """
+    x1, y1, x2, y2 = radians(x1), radians(y1), radians(x2), radians(y2)
+    a = sin((y2 - y1) / 2) ** 2 + cos(y1) * cos(y2) * sin((x2 - x1) / 2) ** 2
+    return 2 * EARTH_RADIUS * asin(min(sqrt(a), 1))
+
+
+def GetHeuristicScale(heuristic='euclidean'):
+    """ return the factor scaling coordinate distances to lower bounds of
+    shortest path distances.
+
+    Coordinates are usually in different units from link length. The factor is
+    the minimum ratio of link length to the coordinate distance between its two
+    end nodes over all links. Multiplied by it, the coordinate distance of
+    every link is no larger than its length, and the heuristic is therefore
+    admissible and consistent by the triangle inequality. A tiny margin is
+    taken off against rounding errors.
+
+    heuristic is either euclidean or haversine (for longitude and latitude).
+    The factor is computed once for each network.
+    """
+    heuristic = heuristic.lower()
+    if heuristic in _heuristic_scales:
+        return _heuristic_scales[heuristic]
+
+    if heuristic.startswith('euc'):
+        distFunc = GetEuclideanDist
+    elif heuristic.startswith('hav'):
+        distFunc = GetHaversineDist
+    else:
+        raise Exception('Please choose correct heuristic: '
+                        +'euclidean; haversine.')
+
+    csr = GetCSRGraph()
+    scale = inf
+    for i in range(csr.numNode):
+        if isnan(_x_coords[i]) or isnan(_y_coords[i]):
+            raise Exception('NO COORDINATES FOUND for Node '
+                            +GetNodeUID(i)+'!!')
+        for k in range(csr.offsets[i], csr.offsets[i+1]):
+            j = csr.heads[k]
+            d = distFunc(_x_coords[i], _y_coords[i],
+                         _x_coords[j], _y_coords[j])
+            if d > 0 and csr.lens[k] / d < scale:
+                scale = csr.lens[k] / d
+
+    # it reduces to Dijkstra's algorithm if no link has positive distance
+    scale = 0 if scale == inf else scale * (1 - 1e-9)
+    _heuristic_scales[heuristic] = scale
+    return scale
+
+
+def GetReverseCSRGraph():
+    """ get the CSR graph of the reverse network and build it if necessary """
+    global _csr_graph_rev
+    if _csr_graph_rev is None:
+        links = [GetLink(k) for k in range(GetNumLinks())]
+        _csr_graph_rev = CSRGraph(GetNumNodes(), links, reverse=True)
+
+    return _csr_graph_rev
+
+
+def GetNetworkFingerprint(csr=None):
+    """ return a hash string identifying the topology and link lengths of a
+    CSR graph (the current network by default)
+    """
+    if csr is None:
+        csr = GetCSRGraph()
+
+    h = hashlib.sha1()
+    for a in (csr.offsets, csr.heads, csr.lens, csr.linkIDs):
+        h.update(a.tobytes())
+
+    return h.hexdigest()
+
+
+def GetScaledLens(scale=None, csr=None):
+    """ return integer link lengths, i.e., link lengths multiplied by scale,
+    of a CSR graph (the current network by default) and scale
+
+    If scale is None, the smallest power of 10 (up to 10^9) making all of them
+    integers is used. An exception is raised if any link length cannot be
+    scaled exactly or is negative, as the bucket-based implementations would
+    no longer give exact shortest paths.
+    """
+    if csr is None:
+        csr = GetCSRGraph()
+
+    scales = [10**k for k in range(10)] if scale is None else [scale]
+    for s in scales:
+        if s in csr.scaledLens:
+            return csr.scaledLens[s], s
+        intLens = array('q', [0] * csr.numLink)
+        for k, l in enumerate(csr.lens):
+            if l < 0:
+                raise Exception('NEGATIVE LINK LENGTH FOUND: '+str(l))
+            x = round(l * s)
+            if abs(l * s - x) > 1e-9 * max(x, 1):
+                break
+            intLens[k] = x
+        else:
+            csr.scaledLens[s] = intLens
+            return intLens, s
+
+    raise Exception('LINK LENGTHS CANNOT BE SCALED EXACTLY to INTEGERS by '
+                    +str(scales[-1])+'!!')
+
+
 def GetNumNodes():
     """ return the number of nodes on the current network """
+    if _graph_cache is not None:
+        return _graph_cache.numNode
+
     return len(_dict_nodes.keys())
 
 
+def GetNumLinks():
+    """ return the number of links on the current network """
+    if _graph_cache is not None:
+        return _graph_cache.numLink
+
+    return len(_dict_links.keys())
+
+
 def GetNode(nodeID):
-    """ get the corresponding node object given internal nodeID """
+    """ get the corresponding node object given internal nodeID
+
+    Node objects of the network loaded from cache are created on demand.
+    """
     try:
         return _dict_nodes[nodeID]
     except KeyError:
-        return None
+        if _graph_cache is None or not 0 <= nodeID < _graph_cache.numNode:
+            return None
+        _dict_nodes[nodeID] = _graph_cache.CreateNode(nodeID)
+        return _dict_nodes[nodeID]
 
 
 def GetLink(linkID):
-    """ get the corresponding link object given internal linkID """
+    """ get the corresponding link object given internal linkID
+
+    Link objects of the network loaded from cache are created on demand.
+    """
     try:
         return _dict_links[linkID]
     except KeyError:
-        return None
+        if _graph_cache is None or not 0 <= linkID < _graph_cache.numLink:
+            return None
+        _dict_links[linkID] = _graph_cache.CreateLink(linkID)
+        return _dict_links[linkID]
+
+
+def SetLinkLen(linkID, linkLen):
+    """ set the length of link linkID in place
+
+    Both the link object and the CSR graphs (if built) are updated, while the
+    caches depending on link lengths (e.g., scaled link lengths and heuristic
+    scales) are cleared, and the network version is increased.
+    """
+    global _network_version
+    link = GetLink(linkID)
+    if link is None:
+        raise Exception('LINK '+str(linkID)+' NOT EXIST!!')
+    if linkLen < 0:
+        raise Exception('NEGATIVE LINK LENGTH FOUND: '+str(linkLen))
+
+    _network_version += 1
+    link.linkLen = linkLen
+    for csr, i in ((_csr_graph, link.origNodeID),
+                   (_csr_graph_rev, link.destNodeID)):
+        if csr is None:
+            continue
+        for k in range(csr.offsets[i], csr.offsets[i+1]):
+            if csr.linkIDs[k] == linkID:
+                csr.lens[k] = linkLen
+                break
+        csr.scaledLens.clear()
+
+    _heuristic_scales.clear()
+
+
+def GetNodeUID(nodeID):
+    """ get the user-defined node id given an internal node id """
+    if _graph_cache is not None:
+        return _graph_cache.GetNodeUID(nodeID)
+
+    return _dict_nodes[nodeID].uid
+
+
+def GetNodePath(srcNodeID, destNodeID, pred):
+    """ return the list of internal node ids on the path from srcNodeID to
+    destNodeID given predecessors pred, or an empty list if unreachable
+    """
+    if srcNodeID != destNodeID and pred[destNodeID] == -1:
+        return []
+
+    path = [destNodeID]
+    i = destNodeID
+    while i != srcNodeID:
+        i = pred[i]
+        path.append(i)
+
+    path.reverse()
+    return path
 
 
 def GetNodeID(nodeUID):
     """ get the internal node id given a user-defined node id """
+    # the map is built on the first call for the network loaded from cache
+    if _graph_cache is not None and not _map_uid_id:
+        for i, uid in enumerate(_graph_cache.GetNodeUIDs()):
+            _map_uid_id[uid] = i
     try:
         return _map_uid_id[nodeUID]
     except KeyError:
@@ -116,4 +457,562 @@ def GetNextNodeID(nodes, dist):
             min_ = dist[i]
             nodeID = i
 
-    return nodeID
\ No newline at end of file
+    return nodeID
+
+
+def _ClearNetwork():
+    """ remove the current network and everything built on it """
+    global _csr_graph
+    global _csr_graph_rev
+    global _x_coords
+    global _y_coords
+    global _graph_cache
+    global _network_version
+
+    _network_version += 1
+    _dict_nodes.clear()
+    _dict_links.clear()
+    _map_uid_id.clear()
+    _heuristic_scales.clear()
+    _csr_graph = None
+    _csr_graph_rev = None
+    _x_coords = array('d')
+    _y_coords = array('d')
+    _graph_cache = None
+
+
+def _GetFileSignature(fileName):
+    """ return size, mtime (in ns), and SHA-1 digest of fileName """
+    st = os.stat(fileName)
+    h = hashlib.sha1()
+    with open(fileName, 'rb') as f:
+        for b in iter(lambda: f.read(1 << 20), b''):
+            h.update(b)
+
+    return st.st_size, st.st_mtime_ns, h.digest()
+
+
+def _IsFileChanged(fileName, size_, mtime, digest):
+    """ check fileName against its signature from _GetFileSignature()
+
+    Its content is only hashed if size or mtime does not match.
+    """
+    st = os.stat(fileName)
+    if st.st_size != size_:
+        return True
+    if st.st_mtime_ns == mtime:
+        return False
+
+    return _GetFileSignature(fileName)[2] != digest
+
+
+def _SetGraphCache(cache):
+    """ replace the current network with GraphCache cache """
+    global _csr_graph
+    global _csr_graph_rev
+    global _x_coords
+    global _y_coords
+    global _graph_cache
+
+    _ClearNetwork()
+    _csr_graph = cache.csr
+    _csr_graph_rev = cache.csrRev
+    _x_coords = cache.xCoords
+    _y_coords = cache.yCoords
+    _graph_cache = cache
+
+
+def SaveGraphCache(cacheFile, nodeFile, linkFile, delimiter_=','):
+    """ save the current network read from nodeFile and linkFile to cacheFile
+
+    See GRAPH_CACHE_HEADER for the file format and ReadNetwork() for loading
+    it. The signatures of nodeFile and linkFile are kept to tell whether the
+    cache is stale.
+    """
+    csr = GetCSRGraph()
+    csrRev = GetReverseCSRGraph()
+    linkPos = array('i', [0] * csr.numLink)
+    for k, linkID in enumerate(csr.linkIDs):
+        linkPos[linkID] = k
+
+    sections = [csr.offsets, csr.heads, csr.lens, csr.linkIDs,
+                csrRev.offsets, csrRev.heads, csrRev.lens, csrRev.linkIDs,
+                linkPos, _x_coords, _y_coords]
+    for uids in ([GetNodeUID(i) for i in range(csr.numNode)],
+                 [GetLink(k).uid for k in range(csr.numLink)]):
+        offsets = array('q', [0])
+        data = bytearray()
+        for uid in uids:
+            data += uid.encode('utf-8')
+            offsets.append(len(data))
+        sections.append(offsets)
+        sections.append(data)
+
+    header = GRAPH_CACHE_HEADER.pack(GRAPH_CACHE_MAGIC,
+                                     GRAPH_CACHE_VERSION,
+                                     sys.byteorder[0].encode(),
+                                     delimiter_.encode(),
+                                     csr.numNode,
+                                     csr.numLink,
+                                     *_GetFileSignature(nodeFile),
+                                     *_GetFileSignature(linkFile))
+    table = array('q', [0] * (2 * len(sections)))
+    pos = GRAPH_CACHE_HEADER.size + len(table) * table.itemsize
+    for i, a in enumerate(sections):
+        pos = (pos + 7) // 8 * 8
+        table[2*i] = pos
+        table[2*i+1] = len(memoryview(a).cast('B'))
+        pos += table[2*i+1]
+
+    # write to a temporary file first so that a partially written cache is
+    # never loaded
+    tmpFile = cacheFile+'.tmp'
+    with open(tmpFile, 'wb') as f:
+        f.write(header)
+        f.write(table.tobytes())
+        for i, a in enumerate(sections):
+            f.write(bytes(table[2*i] - f.tell()))
+            f.write(a)
+    os.replace(tmpFile, cacheFile)
+
+
+def _LoadGraphCache(cacheFile, nodeFile, linkFile, delimiter_):
+    """ load the network from cacheFile through mmap and return True, or
+    return False if it does not exist or is stale
+    """
+    try:
+        f = open(cacheFile, 'rb')
+    except FileNotFoundError:
+        return False
+
+    with f:
+        header = f.read(GRAPH_CACHE_HEADER.size)
+        if len(header) < GRAPH_CACHE_HEADER.size:
+            return False
+        (magic, version, byteorder, delimiter, numNode, numLink,
+         *signatures) = GRAPH_CACHE_HEADER.unpack(header)
+        if (magic != GRAPH_CACHE_MAGIC
+            or version != GRAPH_CACHE_VERSION
+            or byteorder != sys.byteorder[0].encode()
+            or delimiter != delimiter_.encode()
+            or _IsFileChanged(nodeFile, *signatures[:3])
+            or _IsFileChanged(linkFile, *signatures[3:])):
+            return False
+        # copy-on-write
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    table = memoryview(buf)[GRAPH_CACHE_HEADER.size:].cast('B')
+    table = table[:16*len(GRAPH_CACHE_SECTIONS)].cast('q')
+    sections = []
+    for i, typecode in enumerate(GRAPH_CACHE_SECTIONS):
+        pos = table[2*i]
+        size_ = table[2*i+1]
+        sections.append(memoryview(buf)[pos:pos+size_].cast(typecode))
+
+    _SetGraphCache(GraphCache(buf,
+                              CSRGraph.FromArrays(*sections[:4]),
+                              CSRGraph.FromArrays(*sections[4:8], True),
+                              *sections[8:]))
+    return True
+
+
+def ReadNetwork(nodeFile, linkFile, cacheFile=None, delimiter_=',',
+                bulk=False):
+    """ read the network from nodeFile and linkFile, or from cacheFile if it
+    is up to date
+
+    If cacheFile is None, it is the same as ReadNodes() and ReadLinks().
+    Otherwise, the network is loaded from cacheFile through mmap without
+    parsing anything (see GraphCache), unless it does not exist, or it is saved
+    by a different version or from different node or link files. The cache is
+    then rebuilt from the CSV files. Whether the two files are changed is
+    checked by their sizes and mtimes first and their SHA-1 digests next.
+
+    The CSV files are read by ReadNetworkBulk() if bulk is True, or by
+    ReadNodes() and ReadLinks() otherwise.
+
+    It returns True if the network is loaded from cacheFile.
+    """
+    if cacheFile is not None and _LoadGraphCache(cacheFile, nodeFile,
+                                                 linkFile, delimiter_):
+        return True
+
+    _ClearNetwork()
+    if bulk:
+        ReadNetworkBulk(nodeFile, linkFile, delimiter_)
+    else:
+        ReadNodes(nodeFile, delimiter_)
+        ReadLinks(linkFile, delimiter_)
+    if cacheFile is not None:
+        SaveGraphCache(cacheFile, nodeFile, linkFile, delimiter_)
+
+    return False
+
+
+def _ReadColumns(fileName, delimiter_, types, chunkSize):
+    """ read the first len(types) columns of a CSV file (excluding the header)
+    as NumPy arrays, where each type is either str or float
+
+    The whole file is parsed by np.loadtxt() at once. If it fails on missing
+    or invalid fields, the file is read by csv.reader in chunks of chunkSize
+    rows instead, which are transposed to columns of strings (empty ones for
+    missing fields).
+    """
+    numCol = len(types)
+    dtype = np.dtype([('f'+str(j), object if t is str else np.float64)
+                      for j, t in enumerate(types)])
+    try:
+        data = np.loadtxt(fileName, dtype=dtype, delimiter=delimiter_,
+                          skiprows=1, usecols=range(numCol), comments=None,
+                          quotechar='"', ndmin=1)
+        return [data[n].astype(str) if data[n].dtype == object else data[n]
+                for n in dtype.names]
+    except ValueError:
+        pass
+
+    chunks = [[] for _ in range(numCol)]
+    with open(fileName) as f:
+        # skip the header
+        next(f)
+        csvf = csv.reader(f, delimiter=delimiter_)
+        while True:
+            rows = list(islice(csvf, chunkSize))
+            if not rows:
+                break
+            cols = list(zip_longest(*rows, fillvalue=''))
+            for j in range(numCol):
+                col = cols[j] if j < len(cols) else ('',) * len(rows)
+                chunks[j].append(np.array(col, dtype=str))
+
+    return [np.concatenate(c) if c else np.array([], dtype=str)
+            for c in chunks]
+
+
+def _ParseCoords(col):
+    """ convert a column of coordinates from _ReadColumns() to float64, where
+    missing or invalid ones are nan as ReadNodes()
+    """
+    if col.dtype.kind != 'U':
+        return col
+
+    col = np.where(np.char.str_len(np.char.strip(col)) > 0, col, 'nan')
+    try:
+        return col.astype(np.float64)
+    except ValueError:
+        # invalid coordinates are rare, which are parsed one by one
+        coords = []
+        for x in col:
+            try:
+                coords.append(float(x))
+            except ValueError:
+                coords.append(nan)
+        return np.array(coords)
+
+
+def _GetNodeIDs(sortedUIDs, order, uids):
+    """ map user-defined node ids uids to internal node ids through one sorted
+    search, where sortedUIDs are all node UIDs in ascending order and order
+    gives their internal node ids. -1 is returned for any undefined node.
+    """
+    if not len(sortedUIDs):
+        return np.full(len(uids), -1, dtype=np.int64)
+
+    k = np.searchsorted(sortedUIDs, uids)
+    k[k == len(sortedUIDs)] = 0
+    return np.where(sortedUIDs[k] == uids, order[k], -1)
+
+
+def _ToArray(typecode, x):
+    """ copy NumPy array x to an array of typecode """
+    a = array(typecode)
+    a.frombytes(x.astype(np.dtype(typecode)).tobytes())
+    return a
+
+
+def _BuildCSRArrays(numNode, tails, heads, lens):
+    """ return CSR graph with tails, heads, and lens of links (see CSRGraph)
+    by a stable sort on tails, and the sorted link ids
+    """
+    order = np.argsort(tails, kind='stable')
+    offsets = np.zeros(numNode + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tails, minlength=numNode), out=offsets[1:])
+    csr = CSRGraph.FromArrays(_ToArray('i', offsets),
+                              _ToArray('i', heads[order]),
+                              _ToArray('d', lens[order]),
+                              _ToArray('i', order))
+    return csr, order
+
+
+def _PackUIDs(uids):
+    """ return offsets and UTF-8 bytes of concatenated string array uids (see
+    GraphCache)
+    """
+    data = ''.join(uids.tolist()).encode('utf-8')
+    sizes = np.char.str_len(uids)
+    # the number of bytes of each UID differs from its number of characters
+    # only if any of them is not ASCII
+    if len(data) != sizes.sum():
+        sizes = np.array([len(x.encode('utf-8')) for x in uids.tolist()])
+
+    offsets = np.zeros(len(uids) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    return _ToArray('q', offsets), data
+
+
+def ReadNetworkBulk(nodeFile, linkFile, delimiter_=',', chunkSize=1<<20):
+    """ read node and link files in columns with NumPy
+
+    It is equivalent to ReadNodes() and ReadLinks() except that
+        1. each file is parsed into typed columns at once rather than row by
+           row (see _ReadColumns());
+        2. endpoints of all links are mapped to internal node ids by one
+           sorted search on node UIDs;
+        3. the CSR graphs are built by sorting links on their tails (heads)
+           rather than walking Node and Link objects, which are created on
+           demand afterward (see GraphCache);
+        4. all duplicate node UIDs and all links with undefined nodes are
+           reported in one exception.
+    """
+    if np is None:
+        raise Exception('NumPy is REQUIRED for ReadNetworkBulk()!!')
+
+    nodeUIDs, xCoords, yCoords = _ReadColumns(nodeFile, delimiter_,
+                                              (str, float, float), chunkSize)
+    nodeUIDs = np.char.strip(nodeUIDs)
+    numNode = len(nodeUIDs)
+    order = np.argsort(nodeUIDs, kind='stable')
+    sortedUIDs = nodeUIDs[order]
+    dup = sortedUIDs[1:] == sortedUIDs[:-1]
+    if dup.any():
+        raise Exception('DUPLICATE NODE ID FOUND: '
+                        +', '.join(np.unique(sortedUIDs[1:][dup])))
+
+    linkUIDs, origUIDs, destUIDs, lens = _ReadColumns(linkFile, delimiter_,
+                                                      (str, str, str, float),
+                                                      chunkSize)
+    linkUIDs = np.char.strip(linkUIDs)
+    tails = _GetNodeIDs(sortedUIDs, order, origUIDs)
+    heads = _GetNodeIDs(sortedUIDs, order, destUIDs)
+    bad = np.flatnonzero((tails < 0) | (heads < 0))
+    if len(bad):
+        errors = ['Link '+linkUIDs[k]+': Node '
+                  +(origUIDs[k] if tails[k] < 0 else destUIDs[k])
+                  for k in bad]
+        raise Exception('INCONSISTENCY FOUND between LINK and NODE FILES: '
+                        +str(len(bad))+' LINKS with NODES NOT EXIST in NODE '
+                        +'FILE!!\n'+'\n'.join(errors))
+    lens = lens.astype(np.float64)
+    xCoords = _ParseCoords(xCoords)
+    yCoords = _ParseCoords(yCoords)
+    # both are nan if either is not available
+    xCoords[np.isnan(yCoords)] = nan
+    yCoords[np.isnan(xCoords)] = nan
+
+    csr, order = _BuildCSRArrays(numNode, tails, heads, lens)
+    csrRev, _ = _BuildCSRArrays(numNode, heads, tails, lens)
+    csrRev.reverse = True
+    linkPos = np.empty(len(order), dtype=np.int64)
+    linkPos[order] = np.arange(len(order))
+
+    _SetGraphCache(GraphCache(None, csr, csrRev, _ToArray('i', linkPos),
+                              _ToArray('d', xCoords),
+                              _ToArray('d', yCoords),
+                              *_PackUIDs(nodeUIDs),
+                              *_PackUIDs(linkUIDs)))
+
+
+def _GetUndirectedAdjacency():
+    """ return the list of distinct neighbors (by either outgoing or incoming
+    links) of each node on the current network, excluding itself
+    """
+    csr = GetCSRGraph()
+    csrRev = GetReverseCSRGraph()
+    adj = []
+    for i in range(csr.numNode):
+        nbrs = dict.fromkeys(csr.heads[csr.offsets[i]:csr.offsets[i+1]])
+        nbrs.update(dict.fromkeys(
+            csrRev.heads[csrRev.offsets[i]:csrRev.offsets[i+1]]))
+        nbrs.pop(i, None)
+        adj.append(list(nbrs))
+
+    return adj
+
+
+def _GetBFSOrder(adj, degreeOrder=False):
+    """ return nodes in breadth-first order, component by component
+
+    If degreeOrder is True, each component starts from a node of the minimum
+    degree and the neighbors of each node are visited in ascending order of
+    their degrees, i.e., Cuthill-McKee ordering.
+    """
+    numNode = len(adj)
+    roots = range(numNode)
+    if degreeOrder:
+        degree = [len(x) for x in adj]
+        roots = sorted(roots, key=degree.__getitem__)
+
+    visited = bytearray(numNode)
+    order = []
+    for r in roots:
+        if visited[r]:
+            continue
+        visited[r] = 1
+        head = len(order)
+        order.append(r)
+        while head < len(order):
+            i = order[head]
+            head += 1
+            nbrs = [j for j in adj[i] if not visited[j]]
+            if degreeOrder:
+                nbrs.sort(key=degree.__getitem__)
+            for j in nbrs:
+                visited[j] = 1
+                order.append(j)
+
+    return order
+
+
+def _GetDFSOrder(adj):
+    """ return nodes in depth-first preorder, component by component """
+    numNode = len(adj)
+    visited = bytearray(numNode)
+    order = []
+    for r in range(numNode):
+        if visited[r]:
+            continue
+        stack = [r]
+        while stack:
+            i = stack.pop()
+            if visited[i]:
+                continue
+            visited[i] = 1
+            order.append(i)
+            # the first neighbor is visited first
+            stack.extend(j for j in reversed(adj[i]) if not visited[j])
+
+    return order
+
+
+def _GetHilbertIndex(x, y, bits=16):
+    """ index of integer point (x, y) on the Hilbert curve filling the
+    2^bits x 2^bits grid
+    """
+    n = 1 << bits
+    d = 0
+    s = n >> 1
+    while s:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        d += s * s * ((3 * rx) ^ ry)
+        # rotate the quadrant
+        if not ry:
+            if rx:
+                x = n - 1 - x
+                y = n - 1 - y
+            x, y = y, x
+        s >>= 1
+
+    return d
+
+
+def _GetHilbertOrder(bits=16):
+    """ return nodes in ascending order of their indices on the Hilbert curve
+    over the bounding box of node coordinates
+    """
+    for i in range(GetNumNodes()):
+        if isnan(_x_coords[i]) or isnan(_y_coords[i]):
+            raise Exception('NO COORDINATES FOUND for Node '
+                            +GetNodeUID(i)+'!!')
+
+    if not _x_coords:
+        return []
+
+    minX, maxX = min(_x_coords), max(_x_coords)
+    minY, maxY = min(_y_coords), max(_y_coords)
+    k = (1 << bits) - 1
+    scaleX = k / (maxX - minX) if maxX > minX else 0
+    scaleY = k / (maxY - minY) if maxY > minY else 0
+    keys = [_GetHilbertIndex(int((x - minX) * scaleX),
+                             int((y - minY) * scaleY), bits)
+            for x, y in zip(_x_coords, _y_coords)]
+
+    return sorted(range(len(keys)), key=keys.__getitem__)
+
+
+def _RenumberNodes(newIDs):
+    """ renumber the internal id of node i on the current network to
+    newIDs[i] and rebuild everything depending on it
+    """
+    global _x_coords
+    global _y_coords
+    global _graph_cache
+
+    numNode = GetNumNodes()
+    # create all node and link objects of the network loaded from cache
+    nodes = [GetNode(i) for i in range(numNode)]
+    links = [GetLink(k) for k in range(GetNumLinks())]
+    xCoords = array('d', bytes(numNode * 8))
+    yCoords = array('d', bytes(numNode * 8))
+    for i, j in enumerate(newIDs):
+        xCoords[j] = _x_coords[i]
+        yCoords[j] = _y_coords[i]
+
+    _dict_nodes.clear()
+    _map_uid_id.clear()
+    for node, j in zip(nodes, newIDs):
+        node.id = j
+        _dict_nodes[j] = node
+        _map_uid_id[node.uid] = j
+    for link in links:
+        link.origNodeID = newIDs[link.origNodeID]
+        link.destNodeID = newIDs[link.destNodeID]
+
+    _x_coords = xCoords
+    _y_coords = yCoords
+    _graph_cache = None
+    BuildCSRGraph()
+
+
+def ReorderNodes(order='rcm', seed=0):
+    """ renumber internal node ids of the current network in the order of
+    NODE_ORDERS for better memory locality of SSSP
+
+        1. bfs: breadth-first order over links in either direction;
+        2. dfs: depth-first preorder over links in either direction;
+        3. rcm: reverse Cuthill-McKee ordering, which keeps the ids of
+           adjacent nodes close and minimizes the bandwidth;
+        4. hilbert: Hilbert curve over node coordinates;
+        5. random: random shuffle by seed, e.g., as a baseline.
+
+    Node and Link objects, coordinates, and the CSR graphs are rebuilt in the
+    new order, while user-defined node ids, internal link ids, and their
+    lookups (e.g., GetNodeID() and GetNodeUID()) stay the same. Any result
+    indexed by internal node ids before (e.g., dist_apsp, ContractionHierarchy,
+    and Landmarks) is no longer valid.
+
+    It returns newIDs as an array, where newIDs[i] is the new internal id of
+    node i.
+    """
+    order_ = order.lower()
+    if order_ == 'bfs':
+        nodes = _GetBFSOrder(_GetUndirectedAdjacency())
+    elif order_ == 'dfs':
+        nodes = _GetDFSOrder(_GetUndirectedAdjacency())
+    elif order_ == 'rcm':
+        nodes = _GetBFSOrder(_GetUndirectedAdjacency(), True)
+        nodes.reverse()
+    elif order_ == 'hilbert':
+        nodes = _GetHilbertOrder()
+    elif order_ == 'random':
+        nodes = list(range(GetNumNodes()))
+        Random(seed).shuffle(nodes)
+    else:
+        raise Exception('Please choose correct node order: '
+                        +'; '.join(NODE_ORDERS)+'.')
+
+    newIDs = array('i', bytes(len(nodes) * 4))
+    for k, i in enumerate(nodes):
+        newIDs[i] = k
+
+    _RenumberNodes(newIDs)
+    return newIDs
@@ -0,0 +1,88 @@
+"""Shared fixtures of the tests, which are run from the repository root by
+
+    python -m pytest tests
+
+after SimpleDequeC is built in place (see src/module-c/setup.py).
+"""
+
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'src'),
+                os.path.join(ROOT, 'src', 'module-c')]
+
+import pytest
+
+from spalgm import CalculateSSSPDijkstraII
+from utils import MAX_LABEL, GetNumNodes, ReadNetwork
+
+
+DATA_DIR = os.path.join(ROOT, 'data')
+
+
+@pytest.fixture
+def sioux_falls():
+    """ load the Sioux Falls network (24 nodes) bundled in data/ """
+    ReadNetwork(os.path.join(DATA_DIR, 'node.csv'),
+                os.path.join(DATA_DIR, 'link.csv'))
+
+
+@pytest.fixture
+def chicago():
+    """ load the Chicago Sketch network (933 nodes) bundled in data/ """
+    ReadNetwork(os.path.join(DATA_DIR, 'node_chicago.csv'),
+                os.path.join(DATA_DIR, 'link_chicago.csv'))
+
+
+@pytest.fixture(params=['sioux_falls', 'chicago'])
+def network(request):
+    """ load each of the bundled networks used for equivalence tests """
+    request.getfixturevalue(request.param)
+    return request.param
+
+
+@pytest.fixture
+def dijkstra():
+    """ return a function giving the distance labels and predecessors from a
+    node by CalculateSSSPDijkstraII() as the reference
+    """
+    def _Run(srcNodeID):
+        numNode = GetNumNodes()
+        dist = [MAX_LABEL] * numNode
+        pred = [-1] * numNode
+        CalculateSSSPDijkstraII(srcNodeID, dist, pred)
+        return dist, pred
+
+    return _Run
+
+
+def AssertSameDist(dist, ref):
+    """ assert that distance labels dist are the same as ref up to rounding
+    errors (e.g., of scaled link lengths)
+    """
+    assert len(dist) == len(ref)
+    for a, b in zip(dist, ref):
+        assert a == b or abs(a - b) <= 1e-9 * max(b, 1)
+
+
+@pytest.fixture
+def load_network(tmp_path):
+    """ return a function loading the network of numNode nodes (with node ids
+    0, 1, ..., numNode-1 on a line) and links of (tail, head, length)
+    """
+    def _Load(numNode, triples):
+        nodeFile = tmp_path / 'node.csv'
+        linkFile = tmp_path / 'link.csv'
+        with open(nodeFile, 'w') as f:
+            f.write('node_id,x_coord,y_coord\n')
+            for i in range(numNode):
+                f.write('{0},{0},0\n'.format(i))
+        with open(linkFile, 'w') as f:
+            f.write('link_id,from_node_id,to_node_id,length\n')
+            for k, (i, j, w) in enumerate(triples):
+                f.write('{0},{1},{2},{3}\n'.format(k, i, j, w))
+        ReadNetwork(str(nodeFile), str(linkFile))
+
+    return _Load
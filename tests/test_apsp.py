@@ -0,0 +1,118 @@
+import pytest
+
+import spalgm
+from classes import SSSPWorkspace
+from conftest import AssertSameDist
+from utils import CreateTypedMatrix
+
+
+@pytest.mark.parametrize('typecode, initVal', [('d', 0.5), ('f', 0.5),
+                                               ('i', -1)])
+def test_typed_matrix_mmap(tmp_path, typecode, initVal):
+    fileName = str(tmp_path / 'm.bin')
+    m = CreateTypedMatrix(3, typecode, initVal, fileName)
+    m.SetRow(1, [7, 8, 9])
+    itemsize = m.data.itemsize
+    m.Close()
+    assert (tmp_path / 'm.bin').stat().st_size == 9 * itemsize
+
+    n = CreateTypedMatrix(3, typecode, initVal)
+    n.SetRow(1, [7, 8, 9])
+    assert n.tolist() == [[initVal] * 3, [7, 8, 9], [initVal] * 3]
+
+
+@pytest.mark.parametrize('fileName', [None, 'm.bin'])
+@pytest.mark.parametrize('typecode', ['d', 'f', 'i'])
+def test_empty_typed_matrix(tmp_path, fileName, typecode):
+    if fileName is not None:
+        fileName = str(tmp_path / fileName)
+    m = CreateTypedMatrix(0, typecode, 0, fileName)
+    assert len(m) == 0
+    assert m.tolist() == []
+
+
+@pytest.mark.parametrize('method', spalgm.SSSP_METHODS + ('auto', 'fw'))
+def test_apsp_empty_network(load_network, method):
+    if method == 'fw' and spalgm.np is None:
+        pytest.skip('NumPy is not available')
+    load_network(0, [])
+    spalgm.CalculateAPSP(method)
+    assert spalgm.dist_apsp.tolist() == []
+    assert spalgm.pred_apsp.tolist() == []
+
+
+def test_apsp_scale(load_network):
+    load_network(3, [(0, 1, 0.5), (1, 2, 1.5), (2, 0, 2)])
+    spalgm.CalculateAPSP('dij')
+    ref = spalgm.dist_apsp.tolist()
+    for method in ('dial', 'radix'):
+        spalgm.CalculateAPSP(method, scale=10)
+        assert spalgm.dist_apsp.tolist() == ref
+        assert [r[0] for r in spalgm.IterateAPSP(method, scale=2)] == [0, 1, 2]
+        # 0.5 cannot be scaled to an integer by 1
+        with pytest.raises(Exception):
+            spalgm.CalculateAPSP(method, scale=1)
+
+
+def test_dial_falls_back_to_radix(load_network):
+    load_network(3, [(0, 1, 0.5), (1, 2, 1.5), (2, 0, 2)])
+    spalgm.CalculateAPSP('radix', scale=1000)
+    ref = spalgm.dist_apsp.tolist()
+    # C * n = 2000 * 3 buckets at most
+    with pytest.warns(UserWarning):
+        for i in range(3):
+            ws = SSSPWorkspace(3)
+            spalgm.CalculateSSSPDial(i, 3, ws.dist, ws.pred, 1000, None, ws,
+                                     maxSpan=5999)
+            assert ws.dist == ref[i]
+
+
+def _GetAPSP():
+    return spalgm.dist_apsp.tolist(), spalgm.pred_apsp.tolist()
+
+
+@pytest.mark.parametrize('method', spalgm.SSSP_METHODS + ('auto', 'fw'))
+def test_apsp_same_as_dijkstra(sioux_falls, dijkstra, method):
+    if method == 'fw' and spalgm.np is None:
+        pytest.skip('NumPy is not available')
+    spalgm.CalculateAPSP(method)
+    dist, _ = _GetAPSP()
+    for s, row in enumerate(dist):
+        AssertSameDist(row, dijkstra(s)[0])
+
+
+@pytest.mark.parametrize('method', ['dij', 'deq'])
+def test_apsp_parallel(sioux_falls, method):
+    spalgm.CalculateAPSP(method)
+    ref = _GetAPSP()
+    spalgm.CalculateAPSPParallel(method, 2)
+    assert _GetAPSP() == ref
+
+
+def test_apsp_float32_mmap(sioux_falls, tmp_path):
+    spalgm.CalculateAPSP('dij')
+    ref = _GetAPSP()
+    spalgm.CalculateAPSP('dij', 'f', str(tmp_path))
+    # all distances of Sioux Falls are exact in float32
+    assert _GetAPSP() == ref
+    assert spalgm.dist_apsp.data.itemsize == 4
+    assert (tmp_path / 'dist_apsp.bin').exists()
+
+
+def test_update_apsp(sioux_falls):
+    spalgm.CalculateAPSP('dij')
+    spalgm.UpdateAPSP({0: 1.5, 3: 40, 10: 2})
+    updated = _GetAPSP()[0]
+    spalgm.CalculateAPSP('dij')
+    assert updated == _GetAPSP()[0]
+
+
+@pytest.mark.parametrize('numWorker', [1, 2])
+def test_iterate_apsp(sioux_falls, numWorker):
+    spalgm.CalculateAPSP('dij')
+    ref = _GetAPSP()
+    rows = [(i, list(d), list(p))
+            for i, d, p in spalgm.IterateAPSP('dij', numWorker, 5)]
+    assert [i for i, _, _ in rows] == list(range(len(ref[0])))
+    assert [d for _, d, _ in rows] == ref[0]
+    assert [p for _, _, p in rows] == ref[1]
@@ -0,0 +1,25 @@
+import json
+
+from benchmark import ALL_VARIANTS, main
+from conftest import DATA_DIR
+
+
+def test_benchmark_main(tmp_path):
+    output = str(tmp_path / 'results.json')
+    argv = ['-n', 'sample', 'grid:6x5', '-s', 'all', '-d', DATA_DIR,
+            '-o', output]
+    assert main(argv) == 0
+    with open(output) as f:
+        records = json.load(f)['results']
+    assert len(records) == 2 * len(ALL_VARIANTS)
+    assert all(r['agree'] or r['skipped'] for r in records)
+
+
+def test_benchmark_many_to_many(tmp_path):
+    output = str(tmp_path / 'results.json')
+    argv = ['-n', 'sample', '-v', 'DijkstraII', '-m', '5', '10', '-d',
+            DATA_DIR, '-o', output]
+    assert main(argv) == 0
+    with open(output) as f:
+        records = json.load(f)['manyToMany']
+    assert [r['n'] for r in records] == [5, 10]
@@ -0,0 +1,63 @@
+import pytest
+
+from chalgm import BuildContractionHierarchy, FindShortestPathCH, \
+                   LoadContractionHierarchy, SaveContractionHierarchy
+from utils import MAX_LABEL, GetCSRGraph, GetLink, GetNodeUID, GetNumNodes
+
+
+def _CheckCH(ch, dijkstra, srcNodeIDs):
+    n = GetNumNodes()
+    links = {GetLink(k).uid: GetLink(k)
+             for k in range(GetCSRGraph().numLink)}
+    for s in srcNodeIDs:
+        ref, _ = dijkstra(s)
+        for j in range(0, n, 7):
+            d, linkUIDs = FindShortestPathCH(GetNodeUID(s), GetNodeUID(j), ch)
+            assert d == pytest.approx(ref[j], rel=1e-9)
+            if ref[j] == MAX_LABEL or s == j:
+                assert linkUIDs == []
+                continue
+            # the unpacked path goes from s to j with the same length
+            i = s
+            length = 0
+            for uid in linkUIDs:
+                link = links[uid]
+                assert link.GetOrigNodeID() == i
+                i = link.GetDestNodeID()
+                length += link.GetLen()
+            assert i == j
+            assert length == pytest.approx(ref[j], rel=1e-9)
+
+
+def test_ch_same_as_dijkstra(network, dijkstra):
+    ch = BuildContractionHierarchy()
+    _CheckCH(ch, dijkstra, range(0, GetNumNodes(), 97))
+
+
+def test_save_and_load_ch(sioux_falls, dijkstra, tmp_path, request):
+    fileName = str(tmp_path / 'ch.bin')
+    ch = BuildContractionHierarchy()
+    SaveContractionHierarchy(ch, fileName)
+    ch_ = LoadContractionHierarchy(fileName)
+    _CheckCH(ch_, dijkstra, range(3))
+    for k in ('ranks', 'tails', 'heads', 'linkIDs', 'children1', 'children2',
+              'fingerprint'):
+        assert getattr(ch_, k) == getattr(ch, k)
+    for g, g_ in ((ch.upGraph, ch_.upGraph), (ch.downGraph, ch_.downGraph)):
+        assert g_.reverse == g.reverse
+        assert g_.GetArrays() == g.GetArrays()
+        assert g_.linkIDs == g.linkIDs
+
+    # saved by an incompatible version
+    with open(fileName, 'r+b') as f:
+        f.seek(4)
+        f.write(b'\0')
+    with pytest.raises(Exception, match='INCOMPATIBLE'):
+        LoadContractionHierarchy(fileName)
+
+    SaveContractionHierarchy(ch, fileName)
+
+    # built on a different network
+    request.getfixturevalue('chicago')
+    with pytest.raises(Exception):
+        LoadContractionHierarchy(fileName)
@@ -0,0 +1,79 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import DATA_DIR
+from engine import NATIVE_METHODS, BenchmarkEngine, Engine, Graph
+from spalgm import SSSP_METHODS
+from utils import GetNodeUID, GetNumNodes
+
+
+def _LoadGrid(load_network, numRow, numCol):
+    """ grid with fractional link lengths, which are not exact after scaling
+    """
+    triples = []
+    for r in range(numRow):
+        for c in range(numCol):
+            i = r * numCol + c
+            w = round(0.1 + ((7 * i) % 13) * 0.37, 2)
+            if c + 1 < numCol:
+                triples += [(i, i + 1, w), (i + 1, i, w + 0.01)]
+            if r + 1 < numRow:
+                triples += [(i, i + numCol, w + 0.2),
+                            (i + numCol, i, w + 0.03)]
+    load_network(numRow * numCol, triples)
+
+
+@pytest.mark.parametrize('method', SSSP_METHODS + NATIVE_METHODS)
+def test_benchmark_engine(load_network, method):
+    _LoadGrid(load_network, 8, 8)
+    stats = BenchmarkEngine(numPair=200, numOrig=10, methods=(method,),
+                            numThreads=(1, 2))
+    assert (method, 2) in stats
+
+
+@pytest.mark.parametrize('method', SSSP_METHODS + NATIVE_METHODS)
+def test_query_batch(sioux_falls, dijkstra, method):
+    graph = Graph.Read(os.path.join(DATA_DIR, 'node.csv'),
+                       os.path.join(DATA_DIR, 'link.csv'))
+    n = GetNumNodes()
+    pairs = [(GetNodeUID(i), GetNodeUID(j))
+             for i in range(0, n, 3) for j in range(n)]
+    with Engine(graph, method, 2) as engine:
+        dists = engine.QueryBatch(pairs)
+    ref = [dijkstra(i)[0][j] for i in range(0, n, 3) for j in range(n)]
+    assert dists == pytest.approx(ref)
+
+
+def test_engine_scale(load_network):
+    _LoadGrid(load_network, 3, 3)
+    graph = Graph.FromCurrentNetwork()
+    pairs = [(GetNodeUID(0), GetNodeUID(8))]
+    with Engine(graph, 'dij') as engine:
+        ref = engine.QueryBatch(pairs)
+    with Engine(graph, 'dial', scale=1000) as engine:
+        assert engine.scale == 1000
+        assert engine.QueryBatch(pairs) == pytest.approx(ref)
+    with pytest.raises(Exception):
+        Engine(graph, 'radix', scale=1)
+
+
+@pytest.mark.parametrize('method', ['dial', 'radix'])
+def test_graph_sssp_threads(sioux_falls, dijkstra, method):
+    graph = Graph.FromCurrentNetwork()
+    scaledLens = dict(graph.csr.scaledLens)
+    assert graph.scale in scaledLens
+
+    def _Run(s):
+        return list(graph.CalculateSSSP(s, method)[0])
+
+    srcNodeIDs = list(range(graph.numNode)) * 4
+    with ThreadPoolExecutor(4) as pool:
+        dists = list(pool.map(_Run, srcNodeIDs))
+    for s, dist in zip(srcNodeIDs, dists):
+        assert dist == pytest.approx(dijkstra(s)[0])
+    # queries never write to the shared graph
+    assert graph.csr.scaledLens == scaledLens
+    with pytest.raises(Exception):
+        graph.CalculateSSSP(0, method, scale=10 * graph.scale)
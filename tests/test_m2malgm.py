@@ -0,0 +1,61 @@
+import pytest
+
+from chalgm import BuildContractionHierarchy
+from m2malgm import BUCKET_SEARCH_SIZE, BenchmarkManyToMany, \
+                   CalculateManyToMany, CalculateManyToManyBucket, \
+                   CalculateOneToMany
+from utils import MAX_LABEL, GetNodeUID, GetNumNodes
+
+
+def _GetUIDs():
+    return [GetNodeUID(i) for i in range(GetNumNodes())]
+
+
+@pytest.mark.parametrize('method', ['dij', 'deq', 'fifo'])
+@pytest.mark.parametrize('maxDist', [MAX_LABEL, 12])
+def test_one_to_many(network, dijkstra, method, maxDist):
+    n = GetNumNodes()
+    destNodeIDs = list(range(0, n, 13))
+    for s in range(0, n, 101):
+        ref, _ = dijkstra(s)
+        dist = CalculateOneToMany(s, destNodeIDs, method, maxDist)
+        assert dist == pytest.approx([ref[j] if ref[j] <= maxDist
+                                      else MAX_LABEL for j in destNodeIDs])
+
+
+@pytest.mark.parametrize('maxDist', [MAX_LABEL, 12])
+def test_many_to_many(sioux_falls, dijkstra, maxDist):
+    uids = _GetUIDs()
+    origNodeIDs = range(0, len(uids), 2)
+    m = CalculateManyToMany(uids[::2], uids, maxDist=maxDist)
+    assert m.tolist() == [[d if d <= maxDist else MAX_LABEL
+                           for d in dijkstra(s)[0]] for s in origNodeIDs]
+
+
+@pytest.mark.parametrize('useCH, maxDist', [(True, MAX_LABEL), (True, 12),
+                                            (False, MAX_LABEL), (False, 12)])
+@pytest.mark.parametrize('maxSettled', [0, 1, 8, None])
+def test_bucket_same_as_plain(sioux_falls, useCH, maxDist, maxSettled):
+    uids = _GetUIDs()
+    ch = BuildContractionHierarchy() if useCH else None
+    ref = CalculateManyToMany(uids, uids, maxDist=maxDist)
+    m = CalculateManyToManyBucket(uids, uids, ch, maxDist, maxSettled)
+    assert m.tolist() == ref.tolist()
+
+
+@pytest.mark.parametrize('maxSettled', [1, BUCKET_SEARCH_SIZE])
+def test_bucket_chicago(chicago, maxSettled):
+    uids = _GetUIDs()
+    origs = uids[::37]
+    dests = uids[5::41]
+    ref = CalculateManyToMany(origs, dests)
+    m = CalculateManyToManyBucket(origs, dests, maxSettled=maxSettled)
+    for row, refRow in zip(m.tolist(), ref.tolist()):
+        assert row == pytest.approx(refRow)
+
+
+def test_benchmark_many_to_many(sioux_falls):
+    times = BenchmarkManyToMany((5, 10), BuildContractionHierarchy())
+    assert list(times) == [5, 10]
+    assert all(list(t) == ['plain', 'bucket', 'bucket-ch']
+               for t in times.values())
@@ -0,0 +1,92 @@
+from array import array
+
+import pytest
+
+import SimpleDequeC
+from classes import CSRGraph, Link, SSSPWorkspace
+from conftest import AssertSameDist
+from spalgm import CalculateSSSPDEQC, CalculateSSSPDEQIII, \
+                   CalculateSSSPDijkstraC, CalculateSSSPDijkstraII
+from utils import GetNumNodes
+
+
+def _GetCSRGraph(numNode, triples):
+    links = [Link(k, str(k), i, j, w) for k, (i, j, w) in enumerate(triples)]
+    return CSRGraph(numNode, links)
+
+
+def _GetRing(numNode, length):
+    """ ring of numNode nodes with links of length in both directions plus a
+    chord from each node to the one halfway across
+    """
+    triples = []
+    for i in range(numNode):
+        triples.append((i, (i + 1) % numNode, length))
+        triples.append(((i + 1) % numNode, i, length))
+        triples.append((i, (i + numNode // 2) % numNode, 3 * length + i))
+    return _GetCSRGraph(numNode, triples)
+
+
+@pytest.mark.parametrize('native, ref', [
+    (CalculateSSSPDijkstraC, CalculateSSSPDijkstraII),
+    (CalculateSSSPDEQC,
+     lambda s, d, p, csr, ws: CalculateSSSPDEQIII(s, csr.numNode, d, p, csr,
+                                                  ws)),
+])
+def test_native_same_as_python(native, ref):
+    csr = _GetRing(50, 1.5)
+    ws = SSSPWorkspace(csr.numNode)
+    dist = array('d', bytes(8 * csr.numNode))
+    pred = array('i', bytes(4 * csr.numNode))
+    for s in range(csr.numNode):
+        native(s, dist, pred, csr)
+        ref(s, ws.dist, ws.pred, csr, ws)
+        assert list(dist) == ws.dist
+        assert list(pred) == ws.pred
+
+
+@pytest.mark.parametrize('native', [CalculateSSSPDijkstraC,
+                                    CalculateSSSPDEQC])
+def test_native_same_as_dijkstra(network, dijkstra, native):
+    n = GetNumNodes()
+    dist = array('d', bytes(8 * n))
+    pred = array('i', bytes(4 * n))
+    for s in range(0, n, 47):
+        native(s, dist, pred)
+        AssertSameDist(dist, dijkstra(s)[0])
+
+
+@pytest.mark.parametrize('numNode', [50, 400])
+def test_dijkstra_rejects_negative_lens(numNode):
+    # negative cycles used to overflow the heap sized for numLink + 1 entries
+    csr = _GetRing(numNode, -1.0)
+    dist = array('d', bytes(8 * numNode))
+    pred = array('i', bytes(4 * numNode))
+    with pytest.raises(ValueError):
+        CalculateSSSPDijkstraC(0, dist, pred, csr)
+
+
+def test_invalid_arrays():
+    offsets = array('i', [0, 1, 1])
+    dist = array('d', bytes(16))
+    pred = array('i', bytes(8))
+    with pytest.raises(ValueError):
+        # head out of range
+        SimpleDequeC.check_csr(offsets, array('i', [5]))
+    with pytest.raises(ValueError):
+        # decreasing offsets
+        SimpleDequeC.check_csr(array('i', [0, 2, 1, 2]), array('i', [0, 1]))
+    with pytest.raises(ValueError):
+        CSRGraph.FromArrays(offsets, array('i', [-1]), array('d', [1]),
+                            array('i', [0]))
+    SimpleDequeC.check_csr(offsets, array('i', [1]))
+    with pytest.raises(ValueError):
+        # offsets not ending with the number of links
+        SimpleDequeC.sssp_deq(0, array('i', [0, 1, 2]), array('i', [1]),
+                              array('d', [1]), dist, pred)
+    with pytest.raises(ValueError):
+        SimpleDequeC.sssp_dijkstra(2, offsets, array('i', [1]),
+                                   array('d', [1]), dist, pred)
+    with pytest.raises(TypeError):
+        SimpleDequeC.sssp_deq(0, offsets, array('i', [1]), array('f', [1]),
+                              dist, pred)
@@ -0,0 +1,100 @@
+import pytest
+
+import p2palgm
+from p2palgm import BenchmarkALT, BenchmarkAStar, BenchmarkBiDijkstra, \
+                   BuildLandmarks, FindShortestPathALT, \
+                   FindShortestPathAStar, FindShortestPathBiDijkstra, \
+                   LoadLandmarks, SaveLandmarks
+from utils import MAX_LABEL, GetNodeUID, GetNumNodes
+
+
+@pytest.fixture
+def landmarks(network):
+    return BuildLandmarks(k=4)
+
+
+def _CheckPath(findPath, dijkstra, srcNodeIDs):
+    n = GetNumNodes()
+    for s in srcNodeIDs:
+        ref, _ = dijkstra(s)
+        for j in range(0, n, 11):
+            d, path = findPath(GetNodeUID(s), GetNodeUID(j))
+            assert d == pytest.approx(ref[j], rel=1e-9)
+            if ref[j] == MAX_LABEL:
+                assert path == []
+            else:
+                assert path[0] == GetNodeUID(s)
+                assert path[-1] == GetNodeUID(j)
+
+
+def test_astar_same_as_dijkstra(network, dijkstra):
+    _CheckPath(FindShortestPathAStar, dijkstra, range(0, GetNumNodes(), 97))
+
+
+def test_bidijkstra_same_as_dijkstra(network, dijkstra):
+    _CheckPath(FindShortestPathBiDijkstra, dijkstra,
+               range(0, GetNumNodes(), 97))
+
+
+def test_alt_same_as_dijkstra(landmarks, dijkstra):
+    def findPath(s, d):
+        return FindShortestPathALT(s, d, landmarks)
+
+    _CheckPath(findPath, dijkstra, range(0, GetNumNodes(), 97))
+
+
+def test_benchmark_p2p(landmarks):
+    # each of them raises an exception on any inconsistent distance
+    for stats in (BenchmarkAStar(numQuery=20), BenchmarkBiDijkstra(20),
+                  BenchmarkALT(landmarks, 20)):
+        assert stats['settled'] > 0
+
+
+@pytest.mark.parametrize('strategy', ['farthest', 'avoid'])
+def test_build_landmarks(network, strategy):
+    lm = BuildLandmarks(k=4, strategy=strategy)
+    ref = BuildLandmarks(k=4, strategy=strategy, numWorker=2)
+    assert list(lm.nodeIDs) == list(ref.nodeIDs)
+    assert list(lm.distFrom.data) == list(ref.distFrom.data)
+    assert list(lm.distTo.data) == list(ref.distTo.data)
+
+
+def test_landmark_sssp_count(sioux_falls, dijkstra, monkeypatch):
+    calculateSSSP = p2palgm.CalculateSSSP
+    srcNodeIDs = []
+
+    def _CountSSSP(srcNodeID, *args):
+        srcNodeIDs.append(srcNodeID)
+        return calculateSSSP(srcNodeID, *args)
+
+    monkeypatch.setattr(p2palgm, 'CalculateSSSP', _CountSSSP)
+    lm = BuildLandmarks(k=4, strategy='farthest')
+    # one SSSP from the random node plus one forward and one backward SSSP
+    # from each landmark
+    assert len(srcNodeIDs) == 1 + 2 * len(lm)
+    for l, s in enumerate(lm.nodeIDs):
+        assert lm.distFrom[l].tolist() == dijkstra(s)[0]
+
+
+def test_save_and_load_landmarks(sioux_falls, tmp_path, request):
+    fileName = str(tmp_path / 'landmarks.bin')
+    ref = BuildLandmarks(k=4)
+    SaveLandmarks(ref, fileName)
+    lm = LoadLandmarks(fileName)
+    assert list(lm.nodeIDs) == list(ref.nodeIDs)
+    assert list(lm.distFrom.data) == list(ref.distFrom.data)
+    assert list(lm.distTo.data) == list(ref.distTo.data)
+
+    # built on a different network
+    request.getfixturevalue('chicago')
+    with pytest.raises(Exception):
+        LoadLandmarks(fileName)
+
+
+@pytest.mark.parametrize('strategy', ['farthest', 'avoid'])
+def test_more_landmarks_than_nodes(load_network, strategy):
+    # node 2 is not reachable from or to the others
+    load_network(3, [(0, 1, 1), (1, 0, 2)])
+    lm = BuildLandmarks(k=5, strategy=strategy)
+    assert 0 < len(lm.nodeIDs) <= 3
+    assert len(set(lm.nodeIDs)) == len(lm.nodeIDs)
@@ -0,0 +1,76 @@
+import pytest
+
+from paths import AccumulateLinkVolumes, GetPaths, ReadPaths, WritePaths
+from utils import MAX_LABEL, GetLink, GetNumLinks, GetNumNodes
+
+
+def _GetODPairs():
+    n = GetNumNodes()
+    return [(i, j) for i in range(0, n, 5) for j in range(0, n, 3)]
+
+
+def _CheckNodePath(path, s, j, dist):
+    if dist[j] == MAX_LABEL:
+        assert len(path) == 0
+        return
+
+    assert path[0] == s and path[-1] == j
+    links = {(GetLink(k).GetOrigNodeID(), GetLink(k).GetDestNodeID()):
+             GetLink(k).GetLen() for k in range(GetNumLinks())}
+    length = sum(links[path[i], path[i+1]] for i in range(len(path) - 1))
+    assert length == pytest.approx(dist[j], rel=1e-9)
+
+
+def _CheckLinkPath(path, s, j, dist):
+    if dist[j] == MAX_LABEL or s == j:
+        assert len(path) == 0
+        return
+
+    i = s
+    length = 0
+    for k in path:
+        link = GetLink(k)
+        assert link.GetOrigNodeID() == i
+        i = link.GetDestNodeID()
+        length += link.GetLen()
+    assert i == j
+    assert length == pytest.approx(dist[j], rel=1e-9)
+
+
+@pytest.mark.parametrize('useLinks', [False, True])
+def test_get_paths(sioux_falls, dijkstra, useLinks):
+    odPairs = _GetODPairs()
+    batch = GetPaths(odPairs, useLinks)
+    assert len(batch) == len(odPairs)
+    check = _CheckLinkPath if useLinks else _CheckNodePath
+    for k, (s, j) in enumerate(odPairs):
+        check(batch[k], s, j, dijkstra(s)[0])
+
+
+@pytest.mark.parametrize('useLinks', [False, True])
+def test_write_and_read_paths(sioux_falls, tmp_path, useLinks):
+    odPairs = _GetODPairs()
+    fileName = str(tmp_path / 'paths.bin')
+    batch = GetPaths(odPairs, useLinks)
+    numPath = WritePaths(fileName, odPairs, useLinks)
+    paths = dict(ReadPaths(fileName))
+    assert len(paths) == numPath
+    for k in range(len(odPairs)):
+        if k in paths:
+            assert list(paths[k]) == list(batch[k])
+        else:
+            assert len(batch[k]) == 0
+
+
+def test_accumulate_link_volumes(sioux_falls):
+    odPairs = _GetODPairs()
+    odDemands = [(s, j, 1 + (s + j) % 4) for s, j in odPairs]
+    volumes = AccumulateLinkVolumes(odDemands)
+    assert len(volumes) == GetNumLinks()
+
+    ref = [0] * GetNumLinks()
+    batch = GetPaths(odPairs, useLinks=True)
+    for k, (_, _, v) in enumerate(odDemands):
+        for i in batch[k]:
+            ref[i] += v
+    assert list(volumes) == pytest.approx(ref)
@@ -0,0 +1,39 @@
+import csv
+
+import spalgm
+from sinks import BinarySink, CSVSkimSink, ReadBinaryRows, TopKSink
+from utils import MAX_LABEL, GetNodeUID
+
+
+def test_stream_apsp(sioux_falls, tmp_path):
+    spalgm.CalculateAPSP('dij')
+    dist = spalgm.dist_apsp.tolist()
+    pred = spalgm.pred_apsp.tolist()
+    n = len(dist)
+
+    csvFile = str(tmp_path / 'skim.csv')
+    binFile = str(tmp_path / 'apsp.bin.gz')
+    topK = TopKSink(k=3)
+    spalgm.StreamAPSP([CSVSkimSink(csvFile, True), BinarySink(binFile, 'd'),
+                       topK])
+
+    with open(csvFile) as f:
+        rows = list(csv.reader(f))
+    assert len(rows) == 1 + n * n
+    assert rows[1][:2] == [GetNodeUID(0), GetNodeUID(0)]
+    assert sorted(float(r[2]) for r in rows[1:n+1]) == sorted(dist[0])
+
+    rows = list(ReadBinaryRows(binFile))
+    assert [list(d) for _, d, _ in rows] == dist
+    assert [list(p) for _, _, p in rows] == pred
+
+    for s in range(n):
+        nearest = sorted((d, j) for j, d in enumerate(dist[s])
+                         if j != s and d < MAX_LABEL)[:3]
+        assert topK.results[s] == nearest
+
+
+def test_top_k_max_dist(sioux_falls):
+    sink = TopKSink(maxDist=5)
+    spalgm.StreamAPSP([sink])
+    assert all(d <= 5 for r in sink.results.values() for d, _ in r)
@@ -0,0 +1,127 @@
+from random import Random
+
+import pytest
+
+import spalgm
+from classes import IndexedHeapPy, SPTCache, SSSPWorkspace
+from conftest import AssertSameDist
+from spalgm import SSSP_METHODS, STATS_METHODS, CalculateSSSP, \
+                   CalculateSSSPCached, CalculateSSSPWithStats
+from utils import GetCSRGraph, GetNumNodes, SetLinkLen
+
+
+# every implementation with the signature (srcNodeID, numNode, dist, pred,
+# csr, ws)
+KERNELS = {
+    'FIFOI': lambda s, n, d, p, csr, ws:
+        spalgm.CalculateSSSPFIFOI(s, d, p, csr, ws),
+    'FIFOII': spalgm.CalculateSSSPFIFOII,
+    'DEQI': spalgm.CalculateSSSPDEQI,
+    'DEQII-py': lambda s, n, d, p, csr, ws:
+        spalgm.CalculateSSSPDEQII(s, n, d, p, csr, ws, 'py'),
+    'DEQII-c': lambda s, n, d, p, csr, ws:
+        spalgm.CalculateSSSPDEQII(s, n, d, p, csr, ws, 'c'),
+    'DEQII-builtin': lambda s, n, d, p, csr, ws:
+        spalgm.CalculateSSSPDEQII(s, n, d, p, csr, ws, 'builtin'),
+    'DEQIII': spalgm.CalculateSSSPDEQIII,
+    'SLF': spalgm.CalculateSSSPSLF,
+    'LLL': spalgm.CalculateSSSPLLL,
+    'Threshold': lambda s, n, d, p, csr, ws:
+        spalgm.CalculateSSSPThreshold(s, n, d, p, 0.5, csr, ws),
+    'DijkstraI': spalgm.CalculateSSSPDijkstraI,
+    'DijkstraIII-2': lambda s, n, d, p, csr, ws:
+        spalgm.CalculateSSSPDijkstraIII(s, n, d, p, 2, csr, ws),
+    'DijkstraIII-4': lambda s, n, d, p, csr, ws:
+        spalgm.CalculateSSSPDijkstraIII(s, n, d, p, 4, csr, ws),
+    'Dial': lambda s, n, d, p, csr, ws:
+        spalgm.CalculateSSSPDial(s, n, d, p, None, csr, ws),
+    'Radix': lambda s, n, d, p, csr, ws:
+        spalgm.CalculateSSSPRadix(s, n, d, p, None, csr, ws),
+}
+
+
+def _GetSources(numSource=10):
+    n = GetNumNodes()
+    return range(0, n, max(n // numSource, 1))
+
+
+@pytest.mark.filterwarnings('ignore:TOO MANY BUCKETS')
+@pytest.mark.parametrize('name', KERNELS)
+def test_kernel_same_as_dijkstra(network, dijkstra, name):
+    kernel = KERNELS[name]
+    csr = GetCSRGraph()
+    n = csr.numNode
+    # the workspace is reused by all sources as in APSP
+    ws = SSSPWorkspace(n)
+    for s in _GetSources():
+        ref, _ = dijkstra(s)
+        kernel(s, n, ws.dist, ws.pred, csr, ws)
+        AssertSameDist(ws.dist, ref)
+        # without workspace on the current network
+        dist = [spalgm.MAX_LABEL] * n
+        pred = [-1] * n
+        kernel(s, n, dist, pred, None, None)
+        AssertSameDist(dist, ref)
+
+
+@pytest.mark.filterwarnings('ignore:TOO MANY BUCKETS')
+@pytest.mark.parametrize('method', SSSP_METHODS)
+def test_calculate_sssp(network, dijkstra, method):
+    n = GetNumNodes()
+    ws = SSSPWorkspace(n)
+    for s in _GetSources():
+        CalculateSSSP(s, n, ws.dist, ws.pred, method, None, ws)
+        AssertSameDist(ws.dist, dijkstra(s)[0])
+
+
+@pytest.mark.parametrize('method', STATS_METHODS)
+def test_sssp_with_stats(sioux_falls, dijkstra, method):
+    n = GetNumNodes()
+    ws = SSSPWorkspace(n)
+    stats = None
+    for s in range(n):
+        stats = CalculateSSSPWithStats(s, ws.dist, ws.pred, method, None, ws,
+                                       stats)
+        AssertSameDist(ws.dist, dijkstra(s)[0])
+    assert stats.numSearch == n
+    assert stats.scans >= n * n
+    assert stats.relaxations >= stats.updates >= n * (n - 1)
+
+
+def test_select_sssp_method(sioux_falls):
+    method, records = spalgm.SelectSSSPMethod(range(3))
+    assert method in spalgm.AUTO_CANDIDATES
+    assert set(records) == set(spalgm.AUTO_CANDIDATES)
+    # label setting scans each node once, and all nodes are reachable
+    assert records['dij']['scans'] == 3 * GetNumNodes()
+
+
+def test_sssp_cached(sioux_falls, dijkstra):
+    n = GetNumNodes()
+    cache = SPTCache(3 * 12 * n)
+    for s in (0, 1, 2, 0, 3):
+        dist, pred = CalculateSSSPCached(s, cache, 'deq')
+        assert list(dist) == dijkstra(s)[0]
+    assert (cache.hits, cache.misses, len(cache)) == (1, 4, 3)
+
+    # a new network version drops all of them
+    SetLinkLen(0, 100)
+    dist, _ = CalculateSSSPCached(0, cache)
+    assert list(dist) == dijkstra(0)[0]
+    assert len(cache) == 1
+
+
+@pytest.mark.parametrize('d', [2, 4, 8])
+def test_indexed_heap(d):
+    rng = Random(d)
+    heap = IndexedHeapPy(100, d)
+    keys = {}
+    for _ in range(300):
+        i = rng.randrange(100)
+        key = rng.random()
+        heap.push(i, key)
+        # decrease-key only
+        keys[i] = min(key, keys.get(i, key))
+    assert len(heap) == len(keys)
+    nodes = [heap.pop() for _ in range(len(heap))]
+    assert nodes == sorted(keys, key=keys.get)
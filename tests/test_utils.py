@@ -0,0 +1,97 @@
+import os
+import shutil
+
+import pytest
+
+import utils
+from conftest import DATA_DIR
+from spalgm import CalculateSSSPDijkstraII
+from utils import NODE_ORDERS, GetCSRGraph, GetLink, GetNetworkVersion, \
+                  GetNodeID, GetNodeUID, GetNumNodes, GetReverseCSRGraph, \
+                  ReadNetwork, ReadNetworkBulk, ReorderNodes, SetLinkLen
+
+
+def _GetCSR():
+    csr = GetCSRGraph()
+    return [list(a) for a in (csr.offsets, csr.heads, csr.lens, csr.linkIDs)]
+
+
+def _GetDistByUIDs(srcNodeUIDs):
+    """ shortest path distances from srcNodeUIDs keyed by pairs of
+    user-defined node ids
+    """
+    n = GetNumNodes()
+    dists = {}
+    for s in map(GetNodeID, srcNodeUIDs):
+        dist = [utils.MAX_LABEL] * n
+        CalculateSSSPDijkstraII(s, dist, [-1] * n)
+        for j, d in enumerate(dist):
+            dists[GetNodeUID(s), GetNodeUID(j)] = d
+    return dists
+
+
+@pytest.fixture
+def network_files(tmp_path):
+    nodeFile = str(tmp_path / 'node.csv')
+    linkFile = str(tmp_path / 'link.csv')
+    shutil.copy(os.path.join(DATA_DIR, 'node.csv'), nodeFile)
+    shutil.copy(os.path.join(DATA_DIR, 'link.csv'), linkFile)
+    return nodeFile, linkFile
+
+
+def test_graph_cache(network_files, tmp_path):
+    nodeFile, linkFile = network_files
+    cacheFile = str(tmp_path / 'network.bin')
+    assert not ReadNetwork(nodeFile, linkFile, cacheFile)
+    ref = _GetCSR()
+    uids = [GetNodeUID(i) for i in range(GetNumNodes())]
+
+    assert ReadNetwork(nodeFile, linkFile, cacheFile)
+    assert _GetCSR() == ref
+    assert [GetNodeUID(i) for i in range(GetNumNodes())] == uids
+    assert GetLink(3).uid == '3'
+    assert GetReverseCSRGraph().numLink == len(ref[1])
+
+    # stale after the link file is changed
+    with open(linkFile, 'a') as f:
+        f.write('76,0,23,1\n')
+    assert not ReadNetwork(nodeFile, linkFile, cacheFile)
+    assert GetCSRGraph().numLink == len(ref[1]) + 1
+
+
+@pytest.mark.parametrize('chunkSize', [None, 64])
+def test_read_network_bulk(network_files, chunkSize):
+    if utils.np is None:
+        pytest.skip('NumPy is not available')
+    nodeFile, linkFile = network_files
+    ReadNetwork(nodeFile, linkFile)
+    ref = _GetCSR()
+    uids = [GetNodeUID(i) for i in range(GetNumNodes())]
+    if chunkSize is None:
+        ReadNetwork(nodeFile, linkFile, bulk=True)
+    else:
+        ReadNetworkBulk(nodeFile, linkFile, chunkSize=chunkSize)
+    assert _GetCSR() == ref
+    assert [GetNodeUID(i) for i in range(GetNumNodes())] == uids
+
+
+@pytest.mark.parametrize('order', NODE_ORDERS)
+def test_reorder_nodes(chicago, order):
+    uids = [GetNodeUID(i) for i in range(GetNumNodes())]
+    ref = _GetDistByUIDs(uids[::50])
+    newIDs = ReorderNodes(order)
+    assert sorted(newIDs) == list(range(GetNumNodes()))
+    for i, uid in enumerate(uids):
+        assert GetNodeID(uid) == newIDs[i]
+    assert _GetDistByUIDs(uids[::50]) == ref
+
+
+def test_set_link_len(sioux_falls):
+    version = GetNetworkVersion()
+    csr = GetCSRGraph()
+    SetLinkLen(5, 42)
+    assert GetNetworkVersion() > version
+    assert GetLink(5).GetLen() == 42
+    assert 42 in csr.lens
+    with pytest.raises(Exception):
+        SetLinkLen(5, -1)